@@ -1,16 +1,112 @@
 from django.contrib import admin
+from django.utils import timezone
+from api import archival
+from api.counting import EstimatedCountPaginator
 from api.models import (
     UserPreference, Destination, DestinationImage, Hotel, Transport, 
-    TravelPlan, Itinerary
+    TravelPlan, Itinerary, ArchivedTravelPlan
 )
 
+# ==================== SCALABLE CHANGELIST HELPERS ====================
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Sidebar filter rendered as a text box instead of one link per related row,
+    so it stays small no matter how many users/destinations exist
+    """
+    template = 'admin/input_filter.html'
+    lookup = None
+    placeholder = ''
+    
+    def lookups(self, request, model_admin):
+        return ()
+    
+    def has_output(self):
+        return True
+    
+    def choices(self, changelist):
+        # Keep the other active filters when this form is submitted
+        yield {
+            'query_parts': [
+                (name, value) for name, value in changelist.get_filters_params().items()
+                if name != self.parameter_name
+            ],
+            'placeholder': self.placeholder,
+        }
+    
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if value:
+            return queryset.filter(**{self.lookup: value})
+        return queryset
+
+
+class UserFilter(InputFilter):
+    title = 'user'
+    parameter_name = 'username'
+    lookup = 'user__username__istartswith'
+    placeholder = 'Username'
+
+
+class TravelPlanUserFilter(UserFilter):
+    lookup = 'travel_plan__user__username__istartswith'
+
+
+class DestinationFilter(InputFilter):
+    title = 'destination'
+    parameter_name = 'destination_name'
+    lookup = 'destination__name__istartswith'
+    placeholder = 'Destination name'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Estimated counts for unfiltered pages, no second full-table count"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Primary key order: index-backed, and stable for autocomplete pagination
+    ordering = ('-pk',)
+
+
+class ArchivedFilter(admin.SimpleListFilter):
+    title = 'status'
+    parameter_name = 'archived'
+    
+    def lookups(self, request, model_admin):
+        return (('live', 'Live'), ('archived', 'Archived'))
+    
+    def queryset(self, request, queryset):
+        if self.value() == 'live':
+            return queryset.filter(archived_at__isnull=True)
+        if self.value() == 'archived':
+            return queryset.filter(archived_at__isnull=False)
+        return queryset
+
+
+class ArchivableAdmin(LargeTableAdmin):
+    """Lists archived rows too (the default manager hides them) and can restore them"""
+    
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+    
+    def restore_archived(self, request, queryset):
+        restored = archival.restore(queryset)
+        self.message_user(request, f"{restored} {self.model._meta.verbose_name_plural} restored.")
+    restore_archived.short_description = "Restore selected archived %(verbose_name_plural)s"
+
+
 # Register models for admin management
 
 @admin.register(UserPreference)
-class UserPreferenceAdmin(admin.ModelAdmin):
+class UserPreferenceAdmin(LargeTableAdmin):
     list_display = ('user', 'budget', 'objective', 'accommodation_type', 'interest', 'num_travelers', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'location')
     list_filter = ('budget', 'interest', 'objective', 'accommodation_type')
+    autocomplete_fields = ('user',)
     fieldsets = (
         ('User', {
             'fields': ('user',)
@@ -32,10 +128,10 @@ class DestinationImageInline(admin.TabularInline):
 
 
 @admin.register(Destination)
-class DestinationAdmin(admin.ModelAdmin):
-    list_display = ('name', 'country', 'city', 'category', 'budget_level', 'is_active')
+class DestinationAdmin(ArchivableAdmin):
+    list_display = ('name', 'country', 'city', 'category', 'budget_level', 'is_active', 'archived_at')
     search_fields = ('name', 'country', 'city', 'location')
-    list_filter = ('category', 'budget_level', 'country', 'is_active')
+    list_filter = ('category', 'budget_level', 'country', 'is_active', ArchivedFilter)
     inlines = [DestinationImageInline]
     fieldsets = (
         ('Basic Info', {
@@ -54,31 +150,42 @@ class DestinationAdmin(admin.ModelAdmin):
             'fields': ('is_active',)
         }),
     )
-    actions = ['activate_destinations', 'deactivate_destinations']
+    actions = ['activate_destinations', 'deactivate_destinations', 'archive_destinations', 'restore_archived']
     
     def activate_destinations(self, request, queryset):
-        queryset.update(is_active=True)
-        self.message_user(request, f"{queryset.count()} destinations activated.")
+        updated = queryset.exclude(is_active=True).update(is_active=True)
+        self.message_user(request, f"{updated} destinations activated.")
     activate_destinations.short_description = "Activate selected destinations"
     
     def deactivate_destinations(self, request, queryset):
-        queryset.update(is_active=False)
-        self.message_user(request, f"{queryset.count()} destinations deactivated.")
+        updated = queryset.exclude(is_active=False).update(is_active=False)
+        self.message_user(request, f"{updated} destinations deactivated.")
     deactivate_destinations.short_description = "Deactivate selected destinations"
+    
+    def archive_destinations(self, request, queryset):
+        # Soft delete; hotels are archived in the background by the change feed
+        archived = queryset.filter(archived_at__isnull=True).update(is_active=False, archived_at=timezone.now())
+        self.message_user(request, f"{archived} destinations archived.")
+    archive_destinations.short_description = "Archive selected destinations"
 
 
 @admin.register(DestinationImage)
-class DestinationImageAdmin(admin.ModelAdmin):
+class DestinationImageAdmin(LargeTableAdmin):
     list_display = ('destination', 'caption', 'is_primary', 'created_at')
+    list_select_related = ('destination',)
     search_fields = ('destination__name', 'caption')
-    list_filter = ('is_primary', 'destination')
+    list_filter = ('is_primary', DestinationFilter)
+    autocomplete_fields = ('destination',)
 
 
 @admin.register(Hotel)
-class HotelAdmin(admin.ModelAdmin):
-    list_display = ('name', 'destination', 'stars', 'price_per_night', 'budget_category')
+class HotelAdmin(ArchivableAdmin):
+    list_display = ('name', 'destination', 'stars', 'price_per_night', 'budget_category', 'archived_at')
+    list_select_related = ('destination',)
     search_fields = ('name', 'destination__name')
-    list_filter = ('stars', 'budget_category', 'destination')
+    list_filter = ('stars', 'budget_category', DestinationFilter, ArchivedFilter)
+    autocomplete_fields = ('destination',)
+    actions = ['archive_hotels', 'restore_archived']
     fieldsets = (
         ('Basic Info', {
             'fields': ('destination', 'name', 'description')
@@ -90,10 +197,19 @@ class HotelAdmin(admin.ModelAdmin):
             'fields': ('amenities', 'image_url')
         }),
     )
+    
+    def get_queryset(self, request):
+        # Also used by autocomplete widgets, which render Hotel.__str__ per result
+        return super().get_queryset(request).select_related('destination')
+    
+    def archive_hotels(self, request, queryset):
+        archived = queryset.archive()
+        self.message_user(request, f"{archived} hotels archived.")
+    archive_hotels.short_description = "Archive selected hotels"
 
 
 @admin.register(Transport)
-class TransportAdmin(admin.ModelAdmin):
+class TransportAdmin(LargeTableAdmin):
     list_display = ('origin', 'destination', 'transport_type', 'distance_km', 'estimated_price')
     search_fields = ('origin', 'destination')
     list_filter = ('transport_type',)
@@ -111,10 +227,12 @@ class TransportAdmin(admin.ModelAdmin):
 
 
 @admin.register(TravelPlan)
-class TravelPlanAdmin(admin.ModelAdmin):
+class TravelPlanAdmin(LargeTableAdmin):
     list_display = ('user', 'destination', 'travel_date', 'return_date', 'budget')
+    list_select_related = ('user', 'destination')
     search_fields = ('user__username', 'destination__name')
-    list_filter = ('travel_date', 'user')
+    list_filter = ('travel_date', UserFilter, DestinationFilter)
+    autocomplete_fields = ('user', 'destination', 'hotel', 'transport')
     fieldsets = (
         ('User', {
             'fields': ('user',)
@@ -132,10 +250,13 @@ class TravelPlanAdmin(admin.ModelAdmin):
 
 
 @admin.register(Itinerary)
-class ItineraryAdmin(admin.ModelAdmin):
+class ItineraryAdmin(LargeTableAdmin):
     list_display = ('travel_plan', 'day_number', 'created_at')
+    # Itinerary.__str__ → TravelPlan.__str__ → user and destination
+    list_select_related = ('travel_plan__user', 'travel_plan__destination')
     search_fields = ('travel_plan__user__username',)
-    list_filter = ('day_number', 'travel_plan__user')
+    list_filter = ('day_number', TravelPlanUserFilter)
+    raw_id_fields = ('travel_plan',)
     fieldsets = (
         ('Trip', {
             'fields': ('travel_plan', 'day_number')
@@ -148,3 +269,18 @@ class ItineraryAdmin(admin.ModelAdmin):
         }),
     )
 
+
+@admin.register(ArchivedTravelPlan)
+class ArchivedTravelPlanAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'destination_name', 'travel_date', 'return_date', 'budget', 'archived_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'destination_name')
+    list_filter = ('return_date', UserFilter)
+    exclude = ('payload',)
+    readonly_fields = (
+        'id', 'user', 'destination', 'destination_name', 'travel_date', 'return_date',
+        'budget', 'num_travelers', 'has_itinerary', 'created_at', 'archived_at'
+    )
+    
+    def has_add_permission(self, request):
+        return False
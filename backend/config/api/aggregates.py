@@ -0,0 +1,122 @@
+"""
+Per-destination catalog aggregates stored on Destination: number of live
+hotels, their price_per_night and star range, and the number of transport
+routes into the destination (Transport.destination matching its city or
+name, case-insensitively).
+
+A Hotel or Transport save/delete (api/signals.py) recomputes the affected
+destinations only - one grouped query over the (destination, price) hotel
+index each - so a delete that removes the cheapest hotel still leaves an
+exact minimum. Queryset writes that skip signals (archive(), bulk status
+changes) and renamed destinations are caught by the `destination_aggregates`
+change feed handler; manage.py refresh_destination_aggregates rebuilds all.
+"""
+from django.apps import apps as django_apps
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import Lower
+
+from api import changefeed
+
+FIELDS = ['hotel_count', 'hotel_price_min', 'hotel_price_max', 'hotel_stars_min', 'hotel_stars_max', 'route_count']
+
+CHUNK_SIZE = 500
+
+
+def unfiltered(model):
+    """Manager over archived rows too; historical models (migrations) only have _base_manager"""
+    return getattr(model, 'all_objects', model._base_manager)
+
+
+def places_of(destination):
+    """Lower-cased names a Transport.destination may use for this destination"""
+    return {place.strip().lower() for place in (destination.city, destination.name) if place and place.strip()}
+
+
+def destinations_for_places(places, apps=django_apps):
+    """Ids of destinations whose city or name matches one of `places`"""
+    Destination = apps.get_model('api', 'Destination')
+    places = {place.strip() for place in places if place and place.strip()}
+    if not places:
+        return []
+    match = Q()
+    for place in places:
+        match |= Q(city__iexact=place) | Q(name__iexact=place)
+    return list(Destination.all_objects.filter(match).values_list('pk', flat=True))
+
+
+def refresh(destination_ids, apps=django_apps):
+    """Recompute the aggregates of the given destinations; returns rows updated"""
+    Destination = apps.get_model('api', 'Destination')
+    Hotel = apps.get_model('api', 'Hotel')
+    Transport = apps.get_model('api', 'Transport')
+
+    destinations = list(unfiltered(Destination).filter(pk__in=set(destination_ids)).only('id', 'city', 'name'))
+    if not destinations:
+        return 0
+
+    hotels = {
+        row['destination_id']: row
+        for row in unfiltered(Hotel).filter(
+            destination_id__in=[destination.pk for destination in destinations],
+            archived_at__isnull=True
+        ).values('destination_id').annotate(
+            hotel_count=Count('id'),
+            hotel_price_min=Min('price_per_night'),
+            hotel_price_max=Max('price_per_night'),
+            hotel_stars_min=Min('stars'),
+            hotel_stars_max=Max('stars')
+        ).order_by()
+    }
+
+    places = {destination.pk: places_of(destination) for destination in destinations}
+    routes = dict(
+        Transport.objects.annotate(place=Lower('destination')).filter(
+            place__in=set().union(*places.values())
+        ).values('place').annotate(count=Count('id')).order_by().values_list('place', 'count')
+    )
+
+    for destination in destinations:
+        row = hotels.get(destination.pk, {})
+        destination.hotel_count = row.get('hotel_count', 0)
+        for field in FIELDS[1:5]:
+            setattr(destination, field, row.get(field))
+        destination.route_count = sum(routes.get(place, 0) for place in places[destination.pk])
+    unfiltered(Destination).bulk_update(destinations, FIELDS)
+    return len(destinations)
+
+
+def rebuild(apps=django_apps, chunk_size=CHUNK_SIZE):
+    """Recompute every destination, chunk by chunk (backfill / repair)"""
+    Destination = apps.get_model('api', 'Destination')
+    ids = list(unfiltered(Destination).order_by('pk').values_list('pk', flat=True))
+    refreshed = 0
+    for start in range(0, len(ids), chunk_size):
+        refreshed += refresh(ids[start:start + chunk_size], apps=apps)
+    return refreshed
+
+
+@changefeed.register('destination_aggregates', models=['api.destination', 'api.hotel', 'api.transport'])
+def refresh_changed(changes):
+    """Destinations touched by queryset writes or renames (idempotent)"""
+    from api.models import Hotel, Transport
+
+    ids = {'api.destination': set(), 'api.hotel': set(), 'api.transport': set()}
+    for change in changes:
+        if change.model == 'api.destination':
+            # Skip our own writes: only creates and city/name changes move route counts
+            if change.action == 'delete' or (change.changed_fields and not {'city', 'name'} & set(change.changed_fields)):
+                continue
+        elif change.action == 'delete':
+            # Deletes are handled by the post_delete signal, the row is gone
+            continue
+        ids[change.model].add(change.object_id)
+
+    destination_ids = set(ids['api.destination'])
+    destination_ids.update(
+        Hotel.all_objects.filter(pk__in=ids['api.hotel']).values_list('destination_id', flat=True)
+    )
+    destination_ids.update(destinations_for_places(
+        Transport.objects.filter(pk__in=ids['api.transport']).values_list('destination', flat=True)
+    ))
+    if destination_ids:
+        refresh(destination_ids)
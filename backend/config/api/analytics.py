@@ -0,0 +1,97 @@
+"""
+User preference analytics for the admin preferences tracking endpoint.
+All distributions and cross-tabs are folded from ONE grouped query over
+every preference dimension, and the result is cached until a preference
+changes: the cache key carries the id of the newest preference ChangeLog
+row, which every save, queryset update and delete appends in its own
+transaction, so every worker sees the same version without relying on
+cache invalidation.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from api.models import ChangeLog, UserPreference
+
+DIMENSIONS = ['budget', 'interest', 'objective', 'accommodation_type', 'location', 'num_travelers']
+
+# (row dimension, column dimension)
+CROSS_TABS = [
+    ('interest', 'budget'),
+    ('objective', 'accommodation_type'),
+    ('objective', 'budget'),
+]
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def data_version():
+    """Id of the newest preference change (index seek on ChangeLog (model, id))"""
+    return ChangeLog.objects.filter(model='api.userpreference').order_by('-id').values_list('id', flat=True).first()
+
+
+def cache_key(since=None, until=None):
+    return 'preference_analytics:{}:{}:{}'.format(data_version() or 0, since or '', until or '')
+
+
+def grouped_counts(since=None, until=None):
+    """One GROUP BY over all dimensions → [(dimension values dict, count)]"""
+    preferences = UserPreference.objects.all()
+    if since:
+        preferences = preferences.filter(created_at__date__gte=since)
+    if until:
+        preferences = preferences.filter(created_at__date__lte=until)
+    rows = preferences.values(*DIMENSIONS).annotate(count=Count('id')).order_by()
+    for row in rows:
+        count = row.pop('count')
+        yield row, count
+
+
+def build(since=None, until=None):
+    """Distributions per dimension and cross-tabs, from a single pass over the groups"""
+    total = 0
+    distributions = {dimension: Counter() for dimension in DIMENSIONS}
+    cross_tabs = {pair: Counter() for pair in CROSS_TABS}
+    for row, count in grouped_counts(since, until):
+        total += count
+        # Free-text location: group case-insensitively, skip blanks
+        row['location'] = (row['location'] or '').strip().title() or None
+        for dimension in DIMENSIONS:
+            if row[dimension] is not None:
+                distributions[dimension][row[dimension]] += count
+        for pair in CROSS_TABS:
+            cross_tabs[pair][(row[pair[0]], row[pair[1]])] += count
+
+    def distribution(dimension, by_count=False):
+        items = distributions[dimension].items()
+        items = sorted(items, key=lambda item: (-item[1], item[0])) if by_count else sorted(items)
+        return [{dimension: value, 'count': count} for value, count in items]
+
+    return {
+        'total_preferences': total,
+        'budget_distribution': distribution('budget'),
+        'interest_distribution': distribution('interest'),
+        'objective_distribution': distribution('objective'),
+        'accommodation_distribution': distribution('accommodation_type'),
+        'location_preferences': distribution('location', by_count=True),
+        'travelers_distribution': distribution('num_travelers'),
+        'cross_tabs': {
+            f'{first}_by_{second}': [
+                {first: values[0], second: values[1], 'count': count}
+                for values, count in sorted(cross_tabs[(first, second)].items())
+            ]
+            for first, second in CROSS_TABS
+        },
+        'date_range': {'since': since, 'until': until},
+    }
+
+
+def preference_analytics(since=None, until=None):
+    """Cached analytics; since/until are ISO date strings (created_at range)"""
+    key = cache_key(since, until)
+    result = cache.get(key)
+    if result is None:
+        result = build(since, until)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
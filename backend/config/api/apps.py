@@ -5,3 +5,6 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
 
+    def ready(self):
+        # Register signal receivers (popularity counters, change log) and change feed handlers
+        from api import signals, changefeed, archival, aggregates, snapshots  # noqa: F401
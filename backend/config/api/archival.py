@@ -0,0 +1,92 @@
+"""
+Soft-delete cascades, restores and purging for archived destinations and hotels.
+Archiving a destination is a one-row UPDATE on the request path; its hotels
+are archived by the `archive_cascade` change feed handler in small chunks.
+restore() brings rows back (with the hotels the cascade took) until
+purge_archived() deletes rows archived long enough ago, chunk by chunk, so
+no single statement locks a large destination's rows for long.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from api import changefeed
+from api.models import Destination, DestinationImage, Hotel, TravelPlan
+
+CHUNK_SIZE = 500
+
+
+def in_chunks(queryset, chunk_size=CHUNK_SIZE):
+    """Yield lists of primary keys until the queryset is exhausted"""
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+
+
+def archive_hotels_of(destination_ids, chunk_size=CHUNK_SIZE):
+    archived = 0
+    for ids in in_chunks(Hotel.objects.filter(destination_id__in=destination_ids), chunk_size):
+        archived += Hotel.objects.filter(pk__in=ids).archive()
+    return archived
+
+
+@changefeed.register('archive_cascade', models=['api.destination'])
+def cascade_archived_destinations(changes):
+    """Archive hotels of destinations archived since the last run (idempotent)"""
+    candidates = {
+        change.object_id for change in changes
+        if change.action == 'update' and (not change.changed_fields or 'archived_at' in change.changed_fields)
+    }
+    if candidates:
+        archived = Destination.all_objects.filter(pk__in=candidates, archived_at__isnull=False)
+        archive_hotels_of(list(archived.values_list('pk', flat=True)))
+
+
+def restore(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Un-archive the destinations or hotels of `queryset`; returns rows restored.
+    Hotels archived with a destination (by the cascade, so at or after it)
+    come back with it; hotels archived on their own before it stay archived.
+    Destinations stay inactive until activated.
+    """
+    archived = queryset.filter(archived_at__isnull=False)
+    if queryset.model is Destination:
+        for destination_id, archived_at in list(archived.values_list('pk', 'archived_at')):
+            cascaded = Hotel.all_objects.filter(destination_id=destination_id, archived_at__gte=archived_at)
+            for ids in in_chunks(cascaded, chunk_size):
+                Hotel.all_objects.filter(pk__in=ids).restore()
+    restored = 0
+    for ids in in_chunks(archived, chunk_size):
+        restored += queryset.model.all_objects.filter(pk__in=ids).restore()
+    return restored
+
+
+def delete_in_chunks(queryset, chunk_size=CHUNK_SIZE):
+    deleted = 0
+    for ids in in_chunks(queryset, chunk_size):
+        with transaction.atomic():
+            queryset.model._base_manager.filter(pk__in=ids).delete()
+        deleted += len(ids)
+    return deleted
+
+
+def purge_archived(days=30, chunk_size=CHUNK_SIZE):
+    """Hard-delete destinations and hotels archived more than `days` days ago"""
+    cutoff = timezone.now() - timedelta(days=days)
+    purged = {'destinations': 0, 'hotels': 0}
+    for destination_id in list(Destination.all_objects.filter(
+        archived_at__lt=cutoff
+    ).values_list('pk', flat=True)):
+        # Children first, each chunk in its own short transaction
+        delete_in_chunks(DestinationImage.objects.filter(destination_id=destination_id), chunk_size)
+        purged['hotels'] += delete_in_chunks(Hotel.all_objects.filter(destination_id=destination_id), chunk_size)
+        for ids in in_chunks(TravelPlan.objects.filter(destination_id=destination_id), chunk_size):
+            TravelPlan.objects.filter(pk__in=ids).update(destination=None)
+        with transaction.atomic():
+            Destination.all_objects.filter(pk=destination_id).delete()
+        purged['destinations'] += 1
+    purged['hotels'] += delete_in_chunks(Hotel.all_objects.filter(archived_at__lt=cutoff), chunk_size)
+    return purged
@@ -0,0 +1,76 @@
+"""
+Delta sync of the public catalog (destinations, hotels, transport).
+A sync token is a ChangeLog id. Changes after the token are read from the
+change log (indexed by model, id), collapsed to one entry per row, and
+answered with the current state of each touched row: rows still visible in
+the catalog come back serialized, rows deleted, archived or deactivated come
+back as tombstones (ids only).
+
+Tokens older than the change log retention (changefeed.purge) cannot be
+continued; the client then downloads the full catalog again and continues
+from a fresh token.
+"""
+from collections import OrderedDict
+
+from api import changefeed
+from api.models import ChangeLog, Destination, Hotel, Transport
+from api.serializers import DestinationListSerializer, HotelSerializer, TransportSerializer
+
+# Response key → (model label, model, serializer, filter for rows visible in the catalog)
+CATALOG = OrderedDict([
+    ('destinations', ('api.destination', Destination, DestinationListSerializer, {'is_active': True})),
+    ('hotels', ('api.hotel', Hotel, HotelSerializer, {})),
+    ('transports', ('api.transport', Transport, TransportSerializer, {})),
+])
+
+LABELS = [label for label, _, _, _ in CATALOG.values()]
+
+
+class TokenExpired(Exception):
+    """The token predates the oldest retained change"""
+
+
+def parse_token(token):
+    """ChangeLog id from a token string, or None when malformed"""
+    token = (token or '').strip()
+    return int(token) if token.isdigit() else None
+
+
+def current_token():
+    """Token of the newest settled catalog change (start of an incremental sync)"""
+    latest = ChangeLog.objects.filter(
+        model__in=LABELS, created_at__lte=changefeed.settle_cutoff()
+    ).order_by('-id').values_list('id', flat=True).first()
+    return str(max(latest or 0, changefeed.purged_through()))
+
+
+def changes_since(since, limit, request=None):
+    """
+    Catalog changes after token `since`, at most `limit` change log rows:
+    {token, has_more, destinations: {updated, deleted}, hotels: ..., transports: ...}
+    """
+    if since < changefeed.purged_through():
+        raise TokenExpired()
+
+    rows = list(ChangeLog.objects.filter(
+        model__in=LABELS, id__gt=since, created_at__lte=changefeed.settle_cutoff()
+    ).order_by('id').values_list('id', 'model', 'object_id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    touched = {label: set() for label in LABELS}
+    for _, label, object_id in rows:
+        touched[label].add(object_id)
+
+    changes = OrderedDict([('token', str(rows[-1][0] if rows else since)), ('has_more', has_more)])
+    for key, (label, model, serializer_class, visible) in CATALOG.items():
+        ids = touched[label]
+        updated = []
+        if ids:
+            queryset = model.objects.filter(pk__in=ids, **visible).order_by('pk')
+            queryset = serializer_class.setup_queryset(queryset, request)
+            rows_now = list(queryset)
+            updated = serializer_class(rows_now, many=True, context={'request': request}).data
+            ids = ids - {row.pk for row in rows_now}
+        changes[key] = {'updated': updated, 'deleted': sorted(ids)}
+    return changes
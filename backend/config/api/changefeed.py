@@ -0,0 +1,137 @@
+"""
+Change feed over the ChangeLog outbox.
+Tracked models (ChangeTrackedModel) append a ChangeLog row in the same
+transaction as every create/update/delete, including queryset update().
+`process()` (manage.py process_changes) reads new rows in id order, batches
+them and hands each registered handler the changes for the models it
+subscribes to. Every handler has its own ChangeCursor that only moves after
+the handler returns, so delivery is at-least-once: a failing handler sees the
+same batch again on the next run and handlers must be idempotent.
+
+Rows younger than CHANGEFEED_SETTLE_SECONDS are left for the next run so a
+slower transaction that took a lower id can commit first.
+"""
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api.models import ChangeCursor, ChangeLog
+
+logger = logging.getLogger(__name__)
+
+Handler = namedtuple('Handler', ['name', 'func', 'models'])
+
+# Cursor row remembering the highest purged change id (not a handler)
+PURGED_CURSOR = '_purged'
+
+HANDLERS = {}
+
+
+def register(name, models=None):
+    """
+    Decorator registering func(changes) as a change feed handler.
+    models: model labels to receive (e.g. ['api.destination']); None = all
+    """
+    def decorator(func):
+        HANDLERS[name] = Handler(name, func, tuple(models) if models else None)
+        return func
+    return decorator
+
+
+def settle_cutoff():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'CHANGEFEED_SETTLE_SECONDS', 2))
+
+
+def pending(handler, after_id, batch_size, cutoff):
+    changes = ChangeLog.objects.filter(id__gt=after_id, created_at__lte=cutoff)
+    if handler.models:
+        changes = changes.filter(model__in=handler.models)
+    return list(changes.order_by('id')[:batch_size])
+
+
+def run_handler(handler, batch_size=500, max_batches=None):
+    """Deliver pending changes to one handler; returns changes delivered"""
+    cursor, _ = ChangeCursor.objects.get_or_create(handler=handler.name)
+    cutoff = settle_cutoff()
+    delivered = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        changes = pending(handler, cursor.last_id, batch_size, cutoff)
+        if not changes:
+            break
+        try:
+            with transaction.atomic():
+                handler.func(changes)
+                cursor.last_id = changes[-1].id
+                cursor.save(update_fields=['last_id', 'updated_at'])
+        except Exception:
+            logger.exception('Change feed handler %s failed after change %s', handler.name, cursor.last_id)
+            break
+        delivered += len(changes)
+        batches += 1
+    return delivered
+
+
+def process(batch_size=500, max_batches=None):
+    """Run every registered handler once; returns {handler name: changes delivered}"""
+    return {
+        name: run_handler(handler, batch_size, max_batches)
+        for name, handler in HANDLERS.items()
+    }
+
+
+def purge(keep_days=7):
+    """Delete changes every handler has processed and that are older than keep_days"""
+    cursors = ChangeCursor.objects.filter(handler__in=list(HANDLERS))
+    if cursors.count() < len(HANDLERS):
+        return 0
+    processed = min(cursor.last_id for cursor in cursors) if HANDLERS else 0
+    purgeable = ChangeLog.objects.filter(
+        id__lte=processed,
+        created_at__lt=timezone.now() - timedelta(days=keep_days)
+    )
+    with transaction.atomic():
+        highest = purgeable.aggregate(highest=Max('id'))['highest']
+        deleted, _ = purgeable.delete()
+        if highest is not None:
+            watermark, _ = ChangeCursor.objects.select_for_update().get_or_create(handler=PURGED_CURSOR)
+            if highest > watermark.last_id:
+                watermark.last_id = highest
+                watermark.save(update_fields=['last_id', 'updated_at'])
+    return deleted
+
+
+def purged_through():
+    """Highest change id already purged: readers that stopped before it missed changes"""
+    return ChangeCursor.objects.filter(handler=PURGED_CURSOR).values_list('last_id', flat=True).first() or 0
+
+
+# ==================== BUILT-IN HANDLERS ====================
+
+def model_version(model):
+    """Version counter of a model label, bumped whenever its rows change"""
+    return cache.get(f'changefeed:version:{model}', 0)
+
+
+def bump_model_version(model):
+    """Also called directly from post_save/post_delete where a stale version would be visible"""
+    key = f'changefeed:version:{model}'
+    if cache.add(key, 1, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+@register('model_versions')
+def bump_model_versions(changes):
+    """Invalidate cached derived data per model (admin stats, cached responses)"""
+    for model in {change.model for change in changes}:
+        bump_model_version(model)
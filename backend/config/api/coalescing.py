@@ -0,0 +1,69 @@
+import threading
+
+
+class _Call:
+    """An in-flight call that followers can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Request coalescing ("single flight").
+    While a call for `key` is running, identical calls from other threads
+    wait for it and share its result instead of running again. Nothing is
+    cached: once the leader returns, the next call for `key` runs fresh.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers using the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+# Shared by the public recommendation endpoints
+recommendations_flight = SingleFlight()
+
+
+def request_key(request, prefix, personalized=False):
+    """
+    Key identifying a GET request by path and (sorted) query string.
+    Personalized responses also key on the user, so they are only shared
+    between concurrent requests of the same user.
+    """
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    key = (prefix, request.path, tuple(params))
+    if personalized:
+        key += (request.user.pk,)
+    return key
@@ -0,0 +1,100 @@
+"""
+"Users like you" destination similarity.
+An offline job (manage.py build_similarity) turns TravelPlan history into a
+binary user × destination matrix X and computes item-item cosine similarity
+
+    similarity(a, b) = |users(a) ∩ users(b)| / sqrt(|users(a)| × |users(b)|)
+
+from the sparse co-occurrence matrix Xᵀ·X. The top-N neighbours of every
+destination are stored in SimilarDestination, so serving is an indexed lookup.
+"""
+from itertools import chain
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from api.models import ArchivedTravelPlan, SimilarDestination, TravelPlan
+
+# numpy/scipy are only needed by the offline build, never at request time
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover
+    np = None
+    sparse = None
+
+
+def load_interactions(chunk_size=20000):
+    """(user_ids, destination_ids) arrays, one pair per distinct user/destination"""
+    pairs = TravelPlan.objects.filter(
+        destination__isnull=False
+    ).values_list('user_id', 'destination_id').order_by().union(
+        ArchivedTravelPlan.objects.filter(destination__isnull=False).values_list('user_id', 'destination_id').order_by()
+    )
+    flat = np.fromiter(chain.from_iterable(pairs.iterator(chunk_size=chunk_size)), dtype=np.int64)
+    flat = flat.reshape(-1, 2)
+    return flat[:, 0], flat[:, 1]
+
+
+def similarity_matrix(user_ids, destination_ids, min_overlap=1):
+    """
+    Destination keys and the destination × destination cosine similarity
+    (CSR, zero diagonal). Pairs shared by fewer than min_overlap users are dropped.
+    """
+    destinations, columns = np.unique(destination_ids, return_inverse=True)
+    users, rows = np.unique(user_ids, return_inverse=True)
+    interactions = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(users), len(destinations))
+    )
+    interactions.sum_duplicates()
+    interactions.data[:] = 1
+
+    co_occurrence = (interactions.T @ interactions).tocsr()
+    planners = co_occurrence.diagonal()
+    co_occurrence.setdiag(0)
+    if min_overlap > 1:
+        co_occurrence.data[co_occurrence.data < min_overlap] = 0
+    co_occurrence.eliminate_zeros()
+
+    scale = sparse.diags(1 / np.sqrt(np.maximum(planners, 1)))
+    return destinations, (scale @ co_occurrence @ scale).tocsr()
+
+
+def top_neighbours(similarity, top_n):
+    """Yield (row, column, score, rank) for the top_n entries of every row"""
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        scores = similarity.data[start:end]
+        columns = similarity.indices[start:end]
+        if len(scores) > top_n:
+            keep = np.argpartition(-scores, top_n - 1)[:top_n]
+            scores, columns = scores[keep], columns[keep]
+        # Highest score first, ties by column for a stable ranking
+        for rank, index in enumerate(np.lexsort((columns, -scores)), start=1):
+            yield row, columns[index], float(scores[index]), rank
+
+
+def build_similarity(top_n=20, min_overlap=1, batch_size=5000):
+    """Recompute SimilarDestination from all travel plans; returns rows written"""
+    if np is None:
+        raise ImproperlyConfigured('numpy and scipy are required to build destination similarity')
+
+    user_ids, destination_ids = load_interactions()
+    rows = []
+    if len(user_ids):
+        destinations, similarity = similarity_matrix(user_ids, destination_ids, min_overlap)
+        rows = [
+            SimilarDestination(
+                destination_id=int(destinations[row]),
+                similar_id=int(destinations[column]),
+                score=round(score, 6),
+                rank=rank
+            )
+            for row, column, score, rank in top_neighbours(similarity, top_n)
+        ]
+
+    with transaction.atomic():
+        SimilarDestination.objects.all().delete()
+        SimilarDestination.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
@@ -0,0 +1,92 @@
+"""
+Row counts without full table scans.
+InnoDB has no stored row count, so COUNT(*) over a large table reads the
+whole table. For unfiltered querysets on tables above a threshold we use the
+table statistics the database already keeps (MySQL information_schema,
+PostgreSQL pg_class). Filtered querysets on such tables are counted exactly
+but the result is cached per query for a minute; small tables are always
+counted exactly.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+ESTIMATE_TIMEOUT = 60
+COUNT_TIMEOUT = 60
+
+
+def count_threshold():
+    return getattr(settings, 'ESTIMATED_COUNT_THRESHOLD', 100000)
+
+
+def table_estimate(model, using='default'):
+    """Approximate row count from table statistics, or None if unavailable"""
+    table = model._meta.db_table
+    key = f'estimated_count:{using}:{table}'
+    estimate = cache.get(key)
+    if estimate is not None:
+        return estimate
+
+    connection = connections[using]
+    if connection.vendor == 'mysql':
+        sql = ('SELECT TABLE_ROWS FROM information_schema.TABLES '
+               'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s')
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for never-analyzed tables
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    cache.set(key, int(row[0]), ESTIMATE_TIMEOUT)
+    return int(row[0])
+
+
+def is_unfiltered(queryset):
+    """True when the queryset has no filters beyond its model's default manager"""
+    return queryset.query.where == queryset.model._default_manager.all().query.where
+
+
+def cached_count(queryset):
+    """Exact COUNT(*) of the query, reused for COUNT_TIMEOUT seconds"""
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha1(f'{sql}:{params!r}'.encode()).hexdigest()
+    key = f'cached_count:{queryset.db}:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def fast_count(queryset, threshold=None):
+    """
+    Row count of a queryset on a table above `threshold` rows: the table
+    estimate when unfiltered, a cached exact count when filtered.
+    Smaller tables (or unknown statistics) get a plain COUNT(*).
+    """
+    threshold = count_threshold() if threshold is None else threshold
+    estimate = table_estimate(queryset.model, queryset.db)
+    if estimate is None or estimate < threshold:
+        return queryset.count()
+    if is_unfiltered(queryset) and not queryset.query.distinct:
+        return estimate
+    return cached_count(queryset)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count comes from fast_count (admin changelists, API pages)"""
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return fast_count(self.object_list)
+        return super().count
@@ -0,0 +1,74 @@
+"""
+Per-user cache for the dashboard bundle.
+Each user has a random version token, replaced whenever one of their travel
+plans or their preferences change (signals in api/signals.py). The ETag is
+derived from the token, today's date and the change feed versions of the
+catalog models shown in the bundle, so a conditional GET can be answered
+with 304 from the cache alone, without building or even loading the bundle.
+Saves and deletes of catalog rows bump those versions right away; bulk
+updates, which send no signals, when process_changes runs.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import parse_etags
+
+from api import changefeed
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Catalog data embedded in the bundle (names, prices)
+CATALOG_MODELS = ['api.destination', 'api.hotel', 'api.transport']
+
+
+def version_key(user_id):
+    return f'dashboard:version:{user_id}'
+
+
+def invalidate(user_id):
+    cache.set(version_key(user_id), uuid.uuid4().hex, CACHE_TIMEOUT)
+
+
+def user_version(user_id):
+    """Current token; a fresh one if evicted, so an old ETag can never match again"""
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def etag_for(user_id):
+    parts = [user_version(user_id), timezone.localdate().isoformat()]
+    parts += [str(changefeed.model_version(model)) for model in CATALOG_MODELS]
+    return '"{}"'.format(hashlib.sha1(':'.join(parts).encode()).hexdigest())
+
+
+def etag_matches(etag, if_none_match):
+    """
+    Weak comparison, as RFC 9110 requires for If-None-Match: the compression
+    middleware sends W/"..." and clients echo that back. "*" matches any ETag.
+    """
+    tags = parse_etags(if_none_match or '')
+    if '*' in tags:
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.removeprefix('W/') == opaque for tag in tags)
+
+
+def bundle_key(user_id, etag):
+    return f'dashboard:bundle:{user_id}:{etag}'
+
+
+def get_bundle(user_id, build):
+    """(etag, bundle) - bundle from cache, or build() and cache it"""
+    etag = etag_for(user_id)
+    key = bundle_key(user_id, etag)
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = build()
+        cache.set(key, bundle, CACHE_TIMEOUT)
+    return etag, bundle
@@ -0,0 +1,171 @@
+"""
+Streaming export of everything stored about a user, as a zip archive.
+The archive is written into a small buffer that is drained after every
+file chunk, and plans are read with .iterator(), so memory stays bounded
+no matter how many plans the user has. Used by the export endpoint
+(StreamingHttpResponse) and by manage.py export_user_data.
+
+Contents:
+    profile.json, preferences.json
+    travel_plans.json       plans with their nested itinerary
+    travel_plans.csv        one row per plan, hot and archived
+    archived_travel_plans.json
+    destinations.json, hotels.json, transports.json
+                            snapshots of everything the plans reference
+"""
+import csv
+import io
+import json
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from api import trip_archive
+from api.models import ArchivedTravelPlan, Destination, Hotel, Transport, TravelPlan, UserPreference
+from api.serializers import (
+    DestinationListSerializer, HotelSerializer, ItinerarySerializer, TransportSerializer,
+    UserPreferenceSerializer
+)
+
+CHUNK_SIZE = 500
+
+PLAN_FIELDS = ['id', 'destination', 'hotel', 'transport', 'travel_date', 'return_date',
+               'budget', 'num_travelers', 'notes', 'created_at', 'updated_at']
+
+CSV_FIELDS = ['id', 'destination', 'travel_date', 'return_date', 'budget', 'num_travelers', 'archived']
+
+
+class StreamBuffer:
+    """Write-only file object for ZipFile; drain() hands back what was written since last time"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def json_array(items):
+    """Encoded pieces of a JSON array, one item at a time"""
+    yield '['
+    for position, item in enumerate(items):
+        yield (',\n' if position else '\n') + dumps(item)
+    yield '\n]\n'
+
+
+def csv_rows(rows):
+    line = io.StringIO()
+    writer = csv.writer(line)
+    for row in rows:
+        writer.writerow(row)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+
+
+def plan_rows(user, references):
+    """Plans with their itinerary; records referenced ids into `references`"""
+    plans = TravelPlan.objects.filter(user=user).select_related('itinerary').order_by('id')
+    for plan in plans.iterator(chunk_size=CHUNK_SIZE):
+        for name in ('destination', 'hotel', 'transport'):
+            if getattr(plan, f'{name}_id') is not None:
+                references[name].add(getattr(plan, f'{name}_id'))
+        row = {field: getattr(plan, f'{field}_id' if field in references else field) for field in PLAN_FIELDS}
+        try:
+            row['itinerary'] = ItinerarySerializer(plan.itinerary).data
+        except TravelPlan.itinerary.RelatedObjectDoesNotExist:
+            row['itinerary'] = None
+        yield row
+
+
+def archived_rows(user):
+    archived = ArchivedTravelPlan.objects.filter(user=user).order_by('id').values_list('payload', flat=True)
+    for payload in archived.iterator(chunk_size=CHUNK_SIZE):
+        yield trip_archive.decompress(payload)
+
+
+def csv_plan_rows(user):
+    yield CSV_FIELDS
+    plans = TravelPlan.objects.filter(user=user).order_by('id').values_list(
+        'id', 'destination__name', 'travel_date', 'return_date', 'budget', 'num_travelers'
+    )
+    for row in plans.iterator(chunk_size=CHUNK_SIZE):
+        yield list(row) + [False]
+    archived = ArchivedTravelPlan.objects.filter(user=user).order_by('id').values_list(
+        'id', 'destination_name', 'travel_date', 'return_date', 'budget', 'num_travelers'
+    )
+    for row in archived.iterator(chunk_size=CHUNK_SIZE):
+        yield list(row) + [True]
+
+
+def snapshot_rows(model, serializer_class, ids):
+    """Serialized rows for the given ids (archived catalog rows included), a chunk at a time"""
+    manager = getattr(model, 'all_objects', model.objects)
+    ids = sorted(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        rows = serializer_class.setup_queryset(manager.filter(pk__in=ids[start:start + CHUNK_SIZE]).order_by('pk'))
+        yield from serializer_class(rows, many=True).data
+
+
+def export_files(user):
+    """(file name, iterable of str) in archive order"""
+    references = {'destination': set(), 'hotel': set(), 'transport': set()}
+    preference = UserPreference.objects.filter(user=user).first()
+    profile = {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'date_joined': user.date_joined,
+        'last_login': user.last_login,
+        'exported_at': timezone.now(),
+    }
+    yield 'profile.json', [dumps(profile)]
+    yield 'preferences.json', [dumps(UserPreferenceSerializer(preference).data if preference else None)]
+    yield 'travel_plans.json', json_array(plan_rows(user, references))
+    yield 'archived_travel_plans.json', json_array(archived_rows(user))
+    yield 'travel_plans.csv', csv_rows(csv_plan_rows(user))
+    # Referenced ids are known once travel_plans.json has been written
+    yield 'destinations.json', json_array(snapshot_rows(Destination, DestinationListSerializer, references['destination']))
+    yield 'hotels.json', json_array(snapshot_rows(Hotel, HotelSerializer, references['hotel']))
+    yield 'transports.json', json_array(snapshot_rows(Transport, TransportSerializer, references['transport']))
+
+
+def export_user(user):
+    """Yield the zip archive of a user's data as byte chunks"""
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, pieces in export_files(user):
+            # Unseekable output: sizes go into data descriptors after each entry
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for piece in pieces:
+                    entry.write(piece.encode())
+                    if buffer.chunks:
+                        yield buffer.drain()
+            yield buffer.drain()
+    # Central directory
+    yield buffer.drain()
+
+
+def filename_for(user):
+    return f'{user.username}-export-{timezone.localdate().isoformat()}.zip'
@@ -0,0 +1,123 @@
+"""
+Geospatial helpers: geohash cells for the spatial index and haversine distances.
+Destinations and hotels store a geohash of their coordinates (maintained on
+save, indexed). A "within R km" query first narrows rows to the 3×3 block of
+geohash cells around the point (an indexed prefix match) and only then
+computes exact haversine distances for those rows.
+"""
+import math
+
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+GEOHASH_PRECISION = 9
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point, e.g. encode(-6.8, 39.28, 5) == 'kygcm'"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = bits * 2 + 1
+                lon_range[0] = mid
+            else:
+                bits = bits * 2
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = bits * 2 + 1
+                lat_range[0] = mid
+            else:
+                bits = bits * 2
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) of a geohash cell in degrees"""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def precision_for_radius(radius_km, latitude):
+    """
+    Longest geohash whose cells are at least radius_km in both directions,
+    so the 3×3 block around a point covers the whole circle.
+    None if even single-character cells are too small.
+    """
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if height * KM_PER_DEGREE >= radius_km and width * KM_PER_DEGREE * cos_lat >= radius_km:
+            return precision
+    return None
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes of the cell containing the point and its 8 neighbours"""
+    precision = precision_for_radius(radius_km, latitude)
+    if precision is None:
+        return None
+    height, width = cell_size(precision)
+    cells = set()
+    for d_lat in (-height, 0, height):
+        for d_lon in (-width, 0, width):
+            lat = min(max(latitude + d_lat, -90.0), 90.0 - 1e-9)
+            lon = (longitude + d_lon + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lon, precision))
+    return sorted(cells)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in km"""
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (math.sin(d_lat / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_expression(latitude, longitude, lat_field='latitude', lon_field='longitude'):
+    """Haversine distance in km from a point, as a database expression"""
+    a = (
+        Power(Sin(Radians(F(lat_field) - Value(latitude)) / 2), 2)
+        + Cos(Radians(Value(latitude))) * Cos(Radians(F(lat_field)))
+        * Power(Sin(Radians(F(lon_field) - Value(longitude)) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0)))
+
+
+def near(queryset, latitude, longitude, radius_km):
+    """
+    Rows of a queryset with coordinates within radius_km of a point,
+    annotated with distance_km and ordered nearest first.
+    """
+    queryset = queryset.exclude(geohash='')
+    cells = covering_cells(latitude, longitude, radius_km)
+    if cells is not None:
+        prefix_match = Q()
+        for cell in cells:
+            prefix_match |= Q(geohash__startswith=cell)
+        queryset = queryset.filter(prefix_match)
+    return queryset.annotate(
+        distance_km=distance_expression(latitude, longitude)
+    ).filter(distance_km__lte=radius_km).order_by('distance_km', 'id')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import trip_archive
+
+
+class Command(BaseCommand):
+    """
+    Move travel plans that returned more than --days days ago (default
+    TRAVEL_PLAN_ARCHIVE_DAYS) into the compressed archive table, e.g. nightly.
+    Usage: python manage.py archive_travel_plans [--days 365] [--chunk-size 500]
+    """
+    help = 'Archive past travel plans'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Archive plans returned more than this many days ago')
+        parser.add_argument('--chunk-size', type=int, default=trip_archive.CHUNK_SIZE, help='Plans per transaction')
+    
+    def handle(self, *args, **options):
+        archived = trip_archive.archive_past_plans(days=options['days'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} travel plans'))
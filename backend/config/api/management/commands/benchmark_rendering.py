@@ -0,0 +1,76 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Destination, TravelPlan
+from api.renderers import FastJSONRenderer, orjson
+from api.middleware import brotli
+from api.serializers import DestinationSerializer, TravelPlanSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compare render time and bytes on the wire for the default JSONRenderer
+    and FastJSONRenderer, using payloads shaped like the admin destination
+    list and the travel plan lists.
+    Usage: python manage.py benchmark_rendering --rows 2000 --repeat 20
+    """
+    help = 'Benchmark JSON rendering and response compression'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per payload')
+        parser.add_argument('--repeat', type=int, default=10, help='Renders per measurement')
+    
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+        
+        payloads = {
+            'destinations': self.build_payload(
+                DestinationSerializer, Destination.objects.prefetch_related('images'), rows
+            ),
+            'travel_plans': self.build_payload(
+                TravelPlanSerializer,
+                TravelPlan.objects.select_related('destination', 'hotel__destination', 'transport', 'itinerary')
+                .prefetch_related('destination__images'),
+                rows
+            ),
+        }
+        payloads = {name: data for name, data in payloads.items() if data}
+        if not payloads:
+            raise CommandError('No destinations or travel plans found - load some data first')
+        
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: FastJSONRenderer falls back to json'))
+        
+        renderers = [('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())]
+        
+        for name, data in payloads.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} ({len(data)} rows)'))
+            for label, renderer in renderers:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    body = renderer.render(data)
+                elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+                self.stdout.write(f'  {label:<18} {elapsed_ms:9.2f} ms  {len(body):>10,} bytes')
+            
+            self.stdout.write(f'  {"gzip":<18} {self.time_compress(gzip.compress, body, repeat)}')
+            if brotli is not None:
+                self.stdout.write(f'  {"brotli (q=5)":<18} {self.time_compress(lambda b: brotli.compress(b, quality=5), body, repeat)}')
+    
+    def build_payload(self, serializer_class, queryset, rows):
+        """Serialize up to `rows` rows, repeating existing rows if the table is smaller"""
+        data = list(serializer_class(queryset[:rows], many=True).data)
+        if not data:
+            return data
+        return (data * (rows // len(data) + 1))[:rows]
+    
+    def time_compress(self, compress, body, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            compressed = compress(body)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+        ratio = len(compressed) / len(body) * 100
+        return f'{elapsed_ms:9.2f} ms  {len(compressed):>10,} bytes ({ratio:.1f}%)'
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api import snapshots
+
+
+class Command(BaseCommand):
+    """
+    Write the static catalog snapshot (JSON, MessagePack when installed,
+    gzip/brotli variants) to CATALOG_SNAPSHOT_DIR and point manifest.json at it.
+    Also rebuilt automatically by the `catalog_snapshot` change feed handler.
+    Usage: python manage.py build_catalog_snapshot [--force]
+    """
+    help = 'Build the static catalog snapshot'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rewrite even if the catalog did not change')
+    
+    def handle(self, *args, **options):
+        manifest = snapshots.build_snapshot(force=options['force'])
+        counts = ', '.join(f'{count} {name}' for name, count in manifest['counts'].items())
+        self.stdout.write(self.style.SUCCESS(f"Catalog snapshot {manifest['version']} ({counts})"))
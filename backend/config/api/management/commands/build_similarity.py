@@ -0,0 +1,29 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from api.collaborative import build_similarity
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the "similar destinations" table from travel plan history.
+    Run offline (e.g. nightly); requires numpy and scipy.
+    Usage: python manage.py build_similarity --top-n 20 --min-overlap 2
+    """
+    help = 'Build collaborative destination similarity from travel plans'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--top-n', type=int, default=20, help='Neighbours stored per destination')
+        parser.add_argument('--min-overlap', type=int, default=1,
+                            help='Minimum users who planned both destinations')
+    
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            written = build_similarity(top_n=options['top_n'], min_overlap=options['min_overlap'])
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Stored {written} similar destination pairs in {elapsed:.1f}s'))
@@ -0,0 +1,36 @@
+import csv
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from api.schema import export_all
+
+
+class Command(BaseCommand):
+    """
+    Export the data dictionary (CSV), PlantUML class diagram and JSON schema
+    of the api models, generated from live model metadata.
+    Usage: python manage.py export_schema --output docs/schema
+    """
+    help = 'Export data dictionary, PlantUML class diagram and JSON schema from the models'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='schema', help='Output directory')
+        parser.add_argument('--app', default='api', help='App label to export')
+    
+    def handle(self, *args, **options):
+        output = Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        exported = export_all(options['app'])
+        
+        rows = exported['data_dictionary']
+        with open(output / 'data_dictionary.csv', 'w', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+        (output / 'class_diagram.puml').write_text(exported['plantuml'])
+        (output / 'schema.json').write_text(json.dumps(exported['json_schema'], indent=2, default=str))
+        
+        for name in ['data_dictionary.csv', 'class_diagram.puml', 'schema.json']:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {output / name}'))
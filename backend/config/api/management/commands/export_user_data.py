@@ -0,0 +1,39 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api import export
+
+
+class Command(BaseCommand):
+    """
+    Write the data export zip of a user (same archive as GET /api/auth/export/).
+    Usage: python manage.py export_user_data <username> [--output file.zip]
+    Without --output the archive is written to stdout.
+    """
+    help = "Export a user's data as a zip archive"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--output', '-o', help='Zip file to write (default: stdout)')
+    
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} not found")
+        
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                written = self.write(user, output)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
+        else:
+            self.write(user, sys.stdout.buffer)
+    
+    def write(self, user, output):
+        written = 0
+        for chunk in export.export_user(user):
+            output.write(chunk)
+            written += len(chunk)
+        return written
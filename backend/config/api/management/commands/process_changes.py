@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import changefeed
+
+
+class Command(BaseCommand):
+    """
+    Deliver new ChangeLog rows to the registered change feed handlers.
+    Run once (cron) or keep running with --loop.
+    Usage: python manage.py process_changes --loop --interval 5
+    """
+    help = 'Process the model change feed'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Changes per handler call')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for changes')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help='Delete processed changes older than this many days')
+    
+    def handle(self, *args, **options):
+        while True:
+            delivered = changefeed.process(batch_size=options['batch_size'])
+            purged = changefeed.purge(keep_days=options['purge_days'])
+            for name, count in delivered.items():
+                if count:
+                    self.stdout.write(f'{name}: {count} changes')
+            if purged:
+                self.stdout.write(f'Purged {purged} processed changes')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
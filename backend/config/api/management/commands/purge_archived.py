@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.archival import purge_archived
+
+
+class Command(BaseCommand):
+    """
+    Hard-delete destinations and hotels archived more than --days ago.
+    Children are deleted in chunks, each in its own short transaction.
+    Usage: python manage.py purge_archived --days 30 --chunk-size 500
+    """
+    help = 'Purge archived destinations and hotels'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Only purge rows archived this long ago')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows deleted per transaction')
+    
+    def handle(self, *args, **options):
+        purged = purge_archived(days=options['days'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {purged['destinations']} destinations and {purged['hotels']} hotels"
+        ))
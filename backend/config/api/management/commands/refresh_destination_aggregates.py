@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api import aggregates
+
+
+class Command(BaseCommand):
+    """
+    Recompute hotel count, hotel price/star range and route count of every
+    destination, e.g. after bulk imports that bypass model signals.
+    Usage: python manage.py refresh_destination_aggregates [--chunk-size 500]
+    """
+    help = 'Rebuild denormalized destination aggregates'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=aggregates.CHUNK_SIZE, help='Destinations per query')
+    
+    def handle(self, *args, **options):
+        refreshed = aggregates.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed aggregates for {refreshed} destinations'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api import popularity
+
+
+class Command(BaseCommand):
+    """
+    Slide the 7/30 day popularity windows to today (e.g. from a daily cron),
+    or recount every destination from the TravelPlan table with --rebuild
+    after bulk imports that bypass model signals.
+    Usage: python manage.py refresh_popularity [--rebuild]
+    """
+    help = 'Refresh destination popularity counters'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recount from all travel plans')
+    
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            refreshed = popularity.rebuild()
+        else:
+            refreshed = popularity.refresh_windows()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed popularity for {refreshed} destinations'))
@@ -0,0 +1,83 @@
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+# brotli is an optional dependency: without it only gzip is negotiated
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into {coding: q-value}
+    e.g. "gzip, br;q=0.9, *;q=0" -> {'gzip': 1.0, 'br': 0.9, '*': 0.0}
+    """
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Negotiated response compression.
+    Uses brotli when the client prefers it (and the package is installed),
+    gzip otherwise. Responses smaller than COMPRESSION_MIN_SIZE bytes are
+    sent as-is because compressing them costs more than it saves.
+    """
+    
+    def process_response(self, request, response):
+        min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+        
+        if response.has_header('Content-Encoding'):
+            return response
+        
+        # Already compressed (e.g. data export archives)
+        if response.get('Content-Type', '').startswith('application/zip'):
+            return response
+        
+        codings = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        use_brotli = (
+            brotli is not None
+            and not response.streaming
+            and codings.get('br', 0) > 0
+            and codings.get('br', 0) >= codings.get('gzip', codings.get('*', 0))
+        )
+        if not use_brotli:
+            if codings.get('gzip') == 0:
+                patch_vary_headers(response, ('Accept-Encoding',))
+                return response
+            return super().process_response(request, response)
+        
+        patch_vary_headers(response, ('Accept-Encoding',))
+        quality = getattr(settings, 'BROTLI_QUALITY', 5)
+        compressed_content = brotli.compress(response.content, quality=quality)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+        
+        # Weaken strong ETags the same way GZipMiddleware does
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        
+        return response
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_destination_booking_url_destination_budget_max_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['destination', 'price_per_night', 'id'], name='hotel_dest_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['destination', 'stars', 'price_per_night'], name='hotel_dest_stars_idx'),
+        ),
+    ]
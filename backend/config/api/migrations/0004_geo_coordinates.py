@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_hotel_price_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Geohash of the coordinates (spatial index)', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Latitude in decimal degrees', null=True),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='longitude',
+            field=models.FloatField(blank=True, help_text='Longitude in decimal degrees', null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Geohash of the coordinates (spatial index)', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Latitude in decimal degrees', null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='longitude',
+            field=models.FloatField(blank=True, help_text='Longitude in decimal degrees', null=True),
+        ),
+        migrations.AlterField(
+            model_name='transport',
+            name='distance_km',
+            field=models.IntegerField(blank=True, help_text='Computed from coordinates if left empty', null=True),
+        ),
+    ]
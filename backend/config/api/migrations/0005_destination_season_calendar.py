@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:33
+
+from django.db import migrations, models
+
+from api import seasons
+
+
+def compute_season_calendar(apps, schema_editor):
+    Destination = apps.get_model('api', 'Destination')
+    for destination in Destination.objects.only('id', 'best_season', 'latitude').iterator():
+        season_mask = seasons.parse_season(destination.best_season, destination.latitude)
+        Destination.objects.filter(pk=destination.pk).update(
+            season_mask=season_mask,
+            shoulder_mask=seasons.shoulder_of(season_mask),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_geo_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='season_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='In-season months bitmask'),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='shoulder_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Shoulder months bitmask'),
+        ),
+        migrations.RunPython(compute_season_calendar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from api import popularity
+
+
+def backfill_popularity(apps, schema_editor):
+    popularity.rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_destination_season_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DestinationPopularity',
+            fields=[
+                ('destination', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='api.destination')),
+                ('total_plans', models.PositiveIntegerField(default=0)),
+                ('unique_users', models.PositiveIntegerField(default=0)),
+                ('plans_7d', models.PositiveIntegerField(default=0, help_text='Plans created in the last 7 days')),
+                ('plans_30d', models.PositiveIntegerField(default=0, help_text='Plans created in the last 30 days')),
+                ('window_date', models.DateField(blank=True, help_text='Day the 7/30 day windows were computed for', null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-plans_7d', '-total_plans'], name='popularity_7d_idx'), models.Index(fields=['-plans_30d', '-total_plans'], name='popularity_30d_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DestinationDailyPlans',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_plans', to='api.destination')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'destination'], name='daily_plans_day_idx')],
+                'unique_together': {('destination', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_popularity, migrations.RunPython.noop),
+    ]
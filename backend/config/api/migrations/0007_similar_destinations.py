@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_destination_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarDestination',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Cosine similarity of the users who planned both')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_destinations', to='api.destination')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_from', to='api.destination')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['similar', 'destination'], name='similar_lookup_idx')],
+                'unique_together': {('destination', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_similar_destinations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCursor',
+            fields=[
+                ('handler', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(help_text='Model label, e.g. api.destination', max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('changed_fields', models.JSONField(blank=True, default=list, help_text='Fields written (empty = all)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'id'], name='changelog_model_idx')],
+            },
+        ),
+    ]
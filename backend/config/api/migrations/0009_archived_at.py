@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_archived_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transport',
+            index=models.Index(fields=['transport_type', 'distance_km'], name='transport_type_distance_idx'),
+        ),
+    ]
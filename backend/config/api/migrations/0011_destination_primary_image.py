@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+def copy_primary_images(apps, schema_editor):
+    Destination = apps.get_model('api', 'Destination')
+    DestinationImage = apps.get_model('api', 'DestinationImage')
+    primary = {}
+    images = DestinationImage.objects.order_by('destination_id', '-is_primary', 'created_at', 'id')
+    for destination_id, image_url in images.values_list('destination_id', 'image_url').iterator():
+        primary.setdefault(destination_id, image_url)
+    for destination_id, image_url in primary.items():
+        Destination.objects.filter(pk=destination_id).update(primary_image_url=image_url)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_transport_distance_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='primary_image_url',
+            field=models.URLField(blank=True, default='', editable=False, help_text='Primary gallery image'),
+        ),
+        migrations.RunPython(copy_primary_images, migrations.RunPython.noop),
+    ]
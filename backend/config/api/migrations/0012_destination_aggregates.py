@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:48
+
+from django.db import migrations, models
+
+from api import aggregates
+
+
+def backfill_aggregates(apps, schema_editor):
+    aggregates.rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_destination_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='hotel_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='hotel_price_max',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='hotel_price_min',
+            field=models.DecimalField(decimal_places=2, editable=False, help_text='Cheapest hotel per night', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='hotel_stars_max',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='hotel_stars_min',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='route_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Transport routes to this destination'),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0012_destination_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTravelPlan',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Original TravelPlan id', primary_key=True, serialize=False)),
+                ('destination_name', models.CharField(blank=True, max_length=200)),
+                ('travel_date', models.DateField()),
+                ('return_date', models.DateField()),
+                ('budget', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('num_travelers', models.IntegerField()),
+                ('has_itinerary', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', models.BinaryField(help_text='zlib-compressed JSON of the serialized plan')),
+                ('destination', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_plans', to='api.destination')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_travel_plans', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-return_date', '-id'], name='archived_plan_user_idx')],
+            },
+        ),
+    ]
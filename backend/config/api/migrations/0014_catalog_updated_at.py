@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:55
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Existing rows: last known modification is their creation
+    for name in ('Destination', 'Hotel', 'Transport'):
+        apps.get_model('api', name).objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_archived_travel_plans'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='transport',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
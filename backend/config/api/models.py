@@ -1,9 +1,137 @@
-from django.db import models
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
+from api import geo, seasons
+
+
+class ChangeTrackedQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk writes also append to the ChangeLog outbox,
+    in the same transaction (e.g. admin activate/deactivate actions)
+    """
+    
+    def update(self, **kwargs):
+        # auto_now fields are not set by queryset updates
+        if self.model.has_modification_time() and 'updated_at' not in kwargs:
+            kwargs['updated_at'] = timezone.now()
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            ChangeLog.record_many(self.model, ids, ChangeLog.UPDATE, kwargs)
+        return rows
+    
+    def bulk_update(self, objs, fields, batch_size=None):
+        if self.model.has_modification_time() and 'updated_at' not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields = list(fields) + ['updated_at']
+        with transaction.atomic(using=self.db):
+            rows = super().bulk_update(objs, fields, batch_size=batch_size)
+            ChangeLog.record_many(self.model, [obj.pk for obj in objs], ChangeLog.UPDATE, fields)
+        return rows
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            # Primary keys are only known on backends that return them (not MySQL)
+            ChangeLog.record_many(self.model, [obj.pk for obj in objs if obj.pk is not None], ChangeLog.CREATE)
+        return objs
+
+
+class ChangeTrackedModel(models.Model):
+    """
+    Appends a ChangeLog row in the same transaction as every save.
+    Deletes are logged by a post_delete receiver (api/signals.py), which runs
+    inside the delete transaction for both instance and queryset deletes.
+    """
+    objects = ChangeTrackedQuerySet.as_manager()
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def has_modification_time(cls):
+        """True for models with an auto_now updated_at, which queryset writes must set themselves"""
+        try:
+            return cls._meta.get_field('updated_at').auto_now
+        except FieldDoesNotExist:
+            return False
+    
+    def save(self, *args, **kwargs):
+        action = ChangeLog.CREATE if self._state.adding else ChangeLog.UPDATE
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.has_modification_time():
+            kwargs['update_fields'] = set(update_fields) | {'updated_at'}
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            ChangeLog.record(self, action, kwargs.get('update_fields'))
+
+
+class ArchivableQuerySet(ChangeTrackedQuerySet):
+    
+    def archive(self):
+        """Soft-delete in one UPDATE; returns rows archived"""
+        return self.filter(archived_at__isnull=True).update(archived_at=timezone.now())
+    
+    def restore(self):
+        return self.filter(archived_at__isnull=False).update(archived_at=None)
+
+
+class LiveManager(models.Manager.from_queryset(ArchivableQuerySet)):
+    """Default manager: archived rows are hidden (archived_at is indexed)"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(archived_at__isnull=True)
+
+
+class ArchivableModel(ChangeTrackedModel):
+    """
+    Soft delete: archive() stamps archived_at instead of deleting, so no
+    cascade runs on the request path. `objects` hides archived rows,
+    `all_objects` sees everything; related rows are archived in chunks by the
+    change feed (api/archival.py) and purged later by manage.py purge_archived.
+    Forward foreign keys (e.g. plan.destination) still resolve archived rows.
+    """
+    archived_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
+    
+    objects = LiveManager()
+    all_objects = ArchivableQuerySet.as_manager()
+    
+    class Meta:
+        abstract = True
+    
+    def archive(self):
+        self.archived_at = timezone.now()
+        self.save(update_fields=['archived_at'])
+
+
+class GeoLocatedModel(models.Model):
+    """
+    Latitude/longitude plus a geohash spatial index kept in sync on save.
+    Note: queryset.update()/bulk_create() bypass save(); set geohash yourself there.
+    """
+    latitude = models.FloatField(null=True, blank=True, help_text="Latitude in decimal degrees")
+    longitude = models.FloatField(null=True, blank=True, help_text="Longitude in decimal degrees")
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False,
+                               help_text="Geohash of the coordinates (spatial index)")
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
 
 # User Preferences Model
-class UserPreference(models.Model):
+class UserPreference(ChangeTrackedModel):
     BUDGET_CHOICES = [
         ('low', 'Low'),
         ('medium', 'Medium'),
@@ -53,7 +181,7 @@ class UserPreference(models.Model):
 
 
 # Destination Model
-class Destination(models.Model):
+class Destination(GeoLocatedModel, ArchivableModel):
     OBJECTIVE_CHOICES = [
         ('leisure', 'Leisure'),
         ('adventure', 'Adventure'),
@@ -88,10 +216,55 @@ class Destination(models.Model):
     objectives_supported = models.JSONField(default=list, blank=True, help_text="List of supported travel objectives")
     is_active = models.BooleanField(default=True, help_text="Is this destination active/available?")
     booking_url = models.URLField(blank=True, null=True, help_text="External booking link")
+    # Copy of the first DestinationImage (primary first), kept in sync by api/signals.py
+    primary_image_url = models.URLField(blank=True, default='', editable=False, help_text="Primary gallery image")
+    # Month calendar parsed from best_season on save: bit (month - 1) set = in season
+    season_mask = models.PositiveSmallIntegerField(default=0, editable=False, help_text="In-season months bitmask")
+    shoulder_mask = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Shoulder months bitmask")
+    # Catalog aggregates maintained by api/aggregates.py (live hotels, routes in)
+    hotel_count = models.PositiveIntegerField(default=0, editable=False)
+    hotel_price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False, help_text="Cheapest hotel per night")
+    hotel_price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False)
+    hotel_stars_min = models.PositiveSmallIntegerField(null=True, editable=False)
+    hotel_stars_max = models.PositiveSmallIntegerField(null=True, editable=False)
+    route_count = models.PositiveIntegerField(default=0, editable=False, help_text="Transport routes to this destination")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    def archive(self):
+        """Archive and deactivate; hotels follow via the change feed"""
+        self.is_active = False
+        self.archived_at = timezone.now()
+        self.save(update_fields=['is_active', 'archived_at'])
+    
+    def save(self, *args, **kwargs):
+        self.season_mask = seasons.parse_season(self.best_season, self.latitude)
+        self.shoulder_mask = seasons.shoulder_of(self.season_mask)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'best_season', 'latitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'season_mask', 'shoulder_mask'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.name}, {self.country}"
+    
+    @classmethod
+    def coordinates_of(cls, place):
+        """(latitude, longitude) of a destination matching a city or name, or None"""
+        match = cls.objects.filter(
+            models.Q(city__iexact=place) | models.Q(name__iexact=place),
+            latitude__isnull=False, longitude__isnull=False
+        ).values_list('latitude', 'longitude').first()
+        return match
+    
+    @classmethod
+    def distance_between(cls, origin, destination):
+        """Haversine distance in km between two places, or None if either is unknown"""
+        start = cls.coordinates_of(origin)
+        end = cls.coordinates_of(destination)
+        if start is None or end is None:
+            return None
+        return geo.haversine_km(*start, *end)
 
 
 # Destination Image Model - for multiple images per destination
@@ -107,10 +280,18 @@ class DestinationImage(models.Model):
     
     def __str__(self):
         return f"Image for {self.destination.name}"
+    
+    @classmethod
+    def refresh_primary_image(cls, destination_id):
+        """Copy the destination's primary (else oldest) image URL onto Destination"""
+        image_url = cls.objects.filter(destination_id=destination_id).order_by(
+            '-is_primary', 'created_at', 'id'
+        ).values_list('image_url', flat=True).first()
+        Destination.all_objects.filter(pk=destination_id).update(primary_image_url=image_url or '')
 
 
 # Hotel Model
-class Hotel(models.Model):
+class Hotel(GeoLocatedModel, ArchivableModel):
     STAR_CHOICES = [
         (1, '1 Star'),
         (2, '2 Stars'),
@@ -132,13 +313,21 @@ class Hotel(models.Model):
     image_url = models.URLField(blank=True, null=True)
     amenities = models.TextField(help_text="Comma-separated amenities")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            # Cheapest-first / star-sorted browsing within a destination
+            models.Index(fields=['destination', 'price_per_night', 'id'], name='hotel_dest_price_idx'),
+            models.Index(fields=['destination', 'stars', 'price_per_night'], name='hotel_dest_stars_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.destination.name}"
 
 
 # Transport Model
-class Transport(models.Model):
+class Transport(ChangeTrackedModel):
     TRANSPORT_TYPES = [
         ('bus', 'Bus'),
         ('train', 'Train'),
@@ -149,18 +338,33 @@ class Transport(models.Model):
     origin = models.CharField(max_length=100)
     destination = models.CharField(max_length=100)
     transport_type = models.CharField(max_length=20, choices=TRANSPORT_TYPES)
-    distance_km = models.IntegerField()
+    distance_km = models.IntegerField(null=True, blank=True, help_text="Computed from coordinates if left empty")
     estimated_price = models.DecimalField(max_digits=10, decimal_places=2)
     duration_hours = models.FloatField()
     availability = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            # Transport recommendations by type and similar distance
+            models.Index(fields=['transport_type', 'distance_km'], name='transport_type_distance_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Fill in the distance from the coordinates of known places
+        if self.distance_km is None:
+            distance = Destination.distance_between(self.origin, self.destination)
+            if distance is not None:
+                self.distance_km = round(distance)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.origin} to {self.destination} - {self.transport_type}"
 
 
 # Travel Plan Model
-class TravelPlan(models.Model):
+class TravelPlan(ChangeTrackedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='travel_plans')
     destination = models.ForeignKey(Destination, on_delete=models.SET_NULL, null=True, blank=True)
     hotel = models.ForeignKey(Hotel, on_delete=models.SET_NULL, null=True, blank=True)
@@ -189,3 +393,129 @@ class Itinerary(models.Model):
     def __str__(self):
         return f"Itinerary for {self.travel_plan} - Day {self.day_number}"
 
+
+
+# Archived Travel Plan - past plans moved out of TravelPlan/Itinerary (see api/trip_archive.py)
+class ArchivedTravelPlan(models.Model):
+    id = models.BigIntegerField(primary_key=True, help_text="Original TravelPlan id")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_travel_plans')
+    destination = models.ForeignKey(Destination, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_plans')
+    # Summary columns for statistics; the full plan lives in payload
+    destination_name = models.CharField(max_length=200, blank=True)
+    travel_date = models.DateField()
+    return_date = models.DateField()
+    budget = models.DecimalField(max_digits=15, decimal_places=2)
+    num_travelers = models.IntegerField()
+    has_itinerary = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = models.BinaryField(help_text="zlib-compressed JSON of the serialized plan")
+    
+    class Meta:
+        indexes = [
+            # Past trips of a user, newest first
+            models.Index(fields=['user', '-return_date', '-id'], name='archived_plan_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived trip {self.id} to {self.destination_name or 'Unknown'}"
+
+
+# Destination Popularity - counters maintained on TravelPlan create/delete (see api/popularity.py)
+class DestinationPopularity(models.Model):
+    destination = models.OneToOneField(Destination, on_delete=models.CASCADE, primary_key=True, related_name='popularity')
+    total_plans = models.PositiveIntegerField(default=0)
+    unique_users = models.PositiveIntegerField(default=0)
+    plans_7d = models.PositiveIntegerField(default=0, help_text="Plans created in the last 7 days")
+    plans_30d = models.PositiveIntegerField(default=0, help_text="Plans created in the last 30 days")
+    window_date = models.DateField(null=True, blank=True, help_text="Day the 7/30 day windows were computed for")
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-plans_7d', '-total_plans'], name='popularity_7d_idx'),
+            models.Index(fields=['-plans_30d', '-total_plans'], name='popularity_30d_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.destination_id}: {self.total_plans} plans"
+
+
+# Daily rollup of plans created per destination - source for the sliding windows
+class DestinationDailyPlans(models.Model):
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='daily_plans')
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['destination', 'day']
+        indexes = [models.Index(fields=['day', 'destination'], name='daily_plans_day_idx')]
+    
+    def __str__(self):
+        return f"{self.destination_id} on {self.day}: {self.count}"
+
+
+# Similar Destinations - item-item similarity from travel plan history (see api/collaborative.py)
+class SimilarDestination(models.Model):
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='similar_destinations')
+    similar = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='similar_from')
+    score = models.FloatField(help_text="Cosine similarity of the users who planned both")
+    rank = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        unique_together = ['destination', 'rank']
+        indexes = [models.Index(fields=['similar', 'destination'], name='similar_lookup_idx')]
+    
+    def __str__(self):
+        return f"{self.destination_id} ~ {self.similar_id} ({self.score:.3f})"
+
+
+# Change Log - transactional outbox of model changes, consumed by api/changefeed.py
+class ChangeLog(models.Model):
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (DELETE, 'Delete'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=100, help_text="Model label, e.g. api.destination")
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_fields = models.JSONField(default=list, blank=True, help_text="Fields written (empty = all)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['model', 'id'], name='changelog_model_idx')]
+    
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.model}:{self.object_id}"
+    
+    @classmethod
+    def record(cls, instance, action, fields=None):
+        return cls.objects.create(
+            model=instance._meta.label_lower,
+            object_id=instance.pk,
+            action=action,
+            changed_fields=sorted(fields or [])
+        )
+    
+    @classmethod
+    def record_many(cls, model, ids, action, fields=None):
+        changed_fields = sorted(fields or [])
+        return cls.objects.bulk_create([
+            cls(model=model._meta.label_lower, object_id=object_id, action=action, changed_fields=changed_fields)
+            for object_id in ids
+        ], batch_size=1000)
+
+
+# Change Cursor - last ChangeLog id each change feed handler has processed
+class ChangeCursor(models.Model):
+    handler = models.CharField(max_length=100, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.handler} @ {self.last_id}"
@@ -0,0 +1,148 @@
+import heapq
+from decimal import Decimal
+
+from django.db.models.functions import Lower
+
+from api import geo
+from api.models import Destination, Hotel, Transport
+
+
+def to_cents(amount):
+    """Decimal/str/float amount → integer cents"""
+    return int((Decimal(str(amount)) * 100).to_integral_value())
+
+
+def from_cents(cents):
+    return (Decimal(cents) / 100).quantize(Decimal('0.01'))
+
+
+class TripOptimizer:
+    """
+    Total-trip-cost optimizer.
+    Evaluates destination × hotel × transport combinations and returns the
+    best `limit` plans whose total cost fits the budget, where
+        hotel cost     = price_per_night × nights × travelers
+        transport cost = estimated_price × travelers
+    (the same formulas as the budget summary).
+    
+    Plans are ranked by hotel stars (highest first), then total cost
+    (cheapest first), then journey duration.
+    
+    Instead of building the full cross product, each destination's cheapest
+    hotel and cheapest route are precomputed so whole destinations and
+    hotels are pruned as soon as they cannot fit the budget, and the K best
+    combinations are drawn lazily from a heap (each hotel only advances to
+    its next-cheapest route when its current one has been taken).
+    All arithmetic is done in integer cents on plain tuples.
+    """
+    
+    def __init__(self, budget, nights, num_travelers, origin=None, limit=5):
+        self.budget = to_cents(budget)
+        self.nights = max(int(nights), 0)
+        self.num_travelers = max(int(num_travelers), 1)
+        self.origin = origin
+        self.limit = limit
+    
+    def load_hotels(self, destination_ids):
+        """{destination_id: [(hotel_cost, stars, hotel_id), ...]} cheapest first"""
+        hotels = {}
+        rows = Hotel.objects.filter(destination_id__in=destination_ids).order_by(
+            'destination_id', 'price_per_night', 'id'
+        ).values_list('destination_id', 'id', 'stars', 'price_per_night')
+        for destination_id, hotel_id, stars, price in rows.iterator():
+            cost = to_cents(price) * self.nights * self.num_travelers
+            hotels.setdefault(destination_id, []).append((cost, stars, hotel_id))
+        return hotels
+    
+    def load_routes(self, destinations):
+        """{destination_id: [(transport_cost, duration_hours, transport_id), ...]} cheapest first"""
+        # Transport.destination is free text: match it against city or name
+        by_place = {}
+        for destination_id, city, name in destinations:
+            for place in {city.lower(), name.lower()}:
+                by_place.setdefault(place, set()).add(destination_id)
+        
+        query = Transport.objects.annotate(place=Lower('destination')).filter(place__in=list(by_place))
+        if self.origin:
+            query = query.filter(origin__iexact=self.origin)
+        rows = query.values_list('place', 'id', 'estimated_price', 'duration_hours')
+        
+        routes = {}
+        for place, transport_id, price, duration in rows.iterator():
+            cost = to_cents(price) * self.num_travelers
+            for destination_id in by_place[place]:
+                routes.setdefault(destination_id, []).append((cost, duration, transport_id))
+        for options in routes.values():
+            options.sort()
+        return routes
+    
+    def optimize(self, destinations):
+        """
+        Best plans for a destination queryset, as a list of dicts with
+        destination/hotel/transport ids and the cost breakdown.
+        With an origin, destinations without a route from it are skipped;
+        without one, destinations with no known routes are planned without
+        transport.
+        """
+        rows = list(destinations.values_list('id', 'city', 'name', 'latitude', 'longitude'))
+        if not rows:
+            return []
+        destination_rows = [row[:3] for row in rows]
+        
+        # Straight-line distance from the origin, when both have coordinates
+        distances = {}
+        origin_point = Destination.coordinates_of(self.origin) if self.origin else None
+        if origin_point is not None:
+            for destination_id, _, _, latitude, longitude in rows:
+                if latitude is not None and longitude is not None:
+                    distances[destination_id] = round(geo.haversine_km(*origin_point, latitude, longitude))
+        
+        hotels = self.load_hotels([row[0] for row in destination_rows])
+        routes = self.load_routes(destination_rows)
+        # No transport cost is only valid when the traveller did not say where they start
+        no_route = None if self.origin else [(0, 0.0, None)]
+        
+        # Heap entries: (-stars, total, duration, hotel_id, route_index, destination_id, hotel_cost)
+        heap = []
+        for destination_id, _, _ in destination_rows:
+            destination_hotels = hotels.get(destination_id)
+            if not destination_hotels:
+                continue
+            options = routes.get(destination_id, no_route)
+            if not options:
+                # Unreachable from the origin
+                continue
+            cheapest_route = options[0][0]
+            
+            # Bound: hotels are cheapest first, so stop at the first that cannot fit
+            for hotel_cost, stars, hotel_id in destination_hotels:
+                if hotel_cost + cheapest_route > self.budget:
+                    break
+                heap.append((-stars, hotel_cost + cheapest_route, options[0][1],
+                             hotel_id, 0, destination_id, hotel_cost))
+        heapq.heapify(heap)
+        
+        plans = []
+        while heap and len(plans) < self.limit:
+            neg_stars, total, duration, hotel_id, index, destination_id, hotel_cost = heapq.heappop(heap)
+            options = routes.get(destination_id, no_route)
+            transport_cost, _, transport_id = options[index]
+            plans.append({
+                'destination_id': destination_id,
+                'distance_km': distances.get(destination_id),
+                'hotel_id': hotel_id,
+                'transport_id': transport_id,
+                'stars': -neg_stars,
+                'hotel_cost': from_cents(hotel_cost),
+                'transport_cost': from_cents(transport_cost),
+                'total_cost': from_cents(total),
+                'remaining_budget': from_cents(self.budget - total),
+            })
+            
+            # Same hotel with the next-cheapest route, if it still fits
+            if index + 1 < len(options):
+                next_cost, next_duration, _ = options[index + 1]
+                if hotel_cost + next_cost <= self.budget:
+                    heapq.heappush(heap, (neg_stars, hotel_cost + next_cost, next_duration,
+                                          hotel_id, index + 1, destination_id, hotel_cost))
+        return plans
@@ -0,0 +1,180 @@
+import base64
+import json
+from collections import OrderedDict
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from api.counting import EstimatedCountPaginator, fast_count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    PageNumberPagination whose `count` avoids exact COUNT(*) on large tables
+    (table statistics when unfiltered, cached counts when filtered; see
+    api.counting). Small tables are still counted exactly.
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+
+class WindowPagination(BasePagination):
+    """
+    Page-number pagination without COUNT(*) in the page query: each page
+    fetches limit + 1 rows and the extra row only says whether a next page
+    exists. Depth is capped at RECOMMENDATIONS_MAX_RESULTS rows so OFFSET
+    stays bounded. The total `count` comes from api.counting.fast_count.
+    """
+    page_query_param = 'page'
+    limit_query_param = 'limit'
+    
+    def __init__(self):
+        self.default_limit = getattr(settings, 'RECOMMENDATIONS_PAGE_SIZE', 20)
+        self.max_limit = getattr(settings, 'RECOMMENDATIONS_MAX_PAGE_SIZE', 100)
+        self.max_results = getattr(settings, 'RECOMMENDATIONS_MAX_RESULTS', 500)
+        self.page_number = 1
+        self.has_next = False
+        self.request = None
+        self.queryset = None
+    
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+    
+    def get_page_number(self, request):
+        try:
+            return max(1, int(request.query_params.get(self.page_query_param, 1)))
+        except ValueError:
+            raise NotFound('Invalid page')
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.queryset = queryset
+        self.page_number = self.get_page_number(request)
+        limit = self.get_limit(request)
+        offset = (self.page_number - 1) * limit
+        if offset >= self.max_results:
+            self.has_next = False
+            return []
+        
+        stop = min(offset + limit, self.max_results)
+        rows = list(queryset[offset:stop + 1])
+        self.has_next = len(rows) > stop - offset and stop < self.max_results
+        return rows[:stop - offset]
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+    
+    def get_count(self):
+        """Total rows across all pages (estimated on large tables)"""
+        return fast_count(self.queryset)
+    
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.get_count()),
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a fixed ordering.
+    Instead of OFFSET, each page continues from the sort key of the last row
+    of the previous page (an opaque ?cursor= token), so with an index on the
+    ordering columns every page is an index range scan no matter how deep
+    the client pages. The ordering must end in a unique column (e.g. 'id').
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 20
+    max_limit = 100
+    invalid_cursor_message = 'Invalid cursor'
+    
+    def __init__(self, ordering=('id',), default_limit=None, max_limit=None):
+        self.ordering = tuple(ordering)
+        if default_limit is not None:
+            self.default_limit = default_limit
+        if max_limit is not None:
+            self.max_limit = max_limit
+        self.next_cursor = None
+        self.request = None
+    
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+    
+    def encode_cursor(self, values):
+        raw = json.dumps([str(value) for value in values]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+    
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+    
+    def keyset_filter(self, values):
+        """
+        Rows strictly after `values` in the ordering, e.g. for
+        ('price_per_night', 'id'): price > p OR (price = p AND id > i)
+        """
+        clauses = []
+        for position, key in enumerate(self.ordering):
+            field = key.lstrip('-')
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            equal = {
+                prev.lstrip('-'): value
+                for prev, value in zip(self.ordering[:position], values)
+            }
+            clauses.append(Q(**equal, **{f'{field}__{lookup}': values[position]}))
+        return reduce(lambda left, right: left | right, clauses)
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        limit = self.get_limit(request)
+        
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.keyset_filter(self.decode_cursor(cursor)))
+        
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset.order_by(*self.ordering)[:limit + 1])
+        page = rows[:limit]
+        
+        if len(rows) > limit:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(
+                getattr(last, key.lstrip('-')) for key in self.ordering
+            )
+        else:
+            self.next_cursor = None
+        return page
+    
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+    
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,179 @@
+"""
+Destination popularity counters.
+Every TravelPlan create/delete adjusts DestinationPopularity (total plans,
+unique users, plans in the last 7/30 days) and the per-day rollup in
+DestinationDailyPlans, so popularity reads never touch the plan table.
+Archived plans (api/trip_archive.py) keep counting.
+
+The 7/30 day windows slide with the calendar: a counter row remembers the
+day it was computed for (window_date) and is recomputed from at most 30
+daily rollup rows the first time a plan touches it on a new day, or by the
+daily refresh_popularity command. trending() does not write: it sums the
+rollup rows inside the window (index on day, destination) in its query.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+WINDOWS = (7, 30)
+
+
+def plan_day(plan):
+    """Local day a plan was created on (bucket key)"""
+    return timezone.localdate(plan.created_at) if plan.created_at else timezone.localdate()
+
+
+def window_start(days, today):
+    """First day inside the last `days` days, today included"""
+    return today - timedelta(days=days - 1)
+
+
+def record_plan(plan):
+    """Count a newly created plan"""
+    _apply(plan, plan.destination_id, plan_day(plan), 1)
+
+
+def forget_plan(plan, destination_id=None):
+    """Uncount a deleted plan (or a plan moved away from destination_id)"""
+    _apply(plan, destination_id or plan.destination_id, plan_day(plan), -1)
+
+
+def _apply(plan, destination_id, day, delta):
+    from api.models import ArchivedTravelPlan, DestinationDailyPlans, DestinationPopularity, TravelPlan
+
+    if destination_id is None:
+        return
+
+    today = timezone.localdate()
+    with transaction.atomic():
+        DestinationDailyPlans.objects.get_or_create(destination_id=destination_id, day=day)
+        buckets = DestinationDailyPlans.objects.filter(destination_id=destination_id, day=day)
+        if delta < 0:
+            buckets = buckets.filter(count__gt=0)
+        buckets.update(count=F('count') + delta)
+
+        popularity, _ = DestinationPopularity.objects.select_for_update().get_or_create(
+            destination_id=destination_id
+        )
+        updates = {'total_plans': F('total_plans') + delta}
+        # Unique users: this plan is the user's only one for the destination
+        other_plans = TravelPlan.objects.filter(
+            user_id=plan.user_id, destination_id=destination_id
+        ).exclude(pk=plan.pk)
+        archived_plans = ArchivedTravelPlan.objects.filter(user_id=plan.user_id, destination_id=destination_id)
+        if not other_plans.exists() and not archived_plans.exists():
+            updates['unique_users'] = F('unique_users') + delta
+        if popularity.window_date == today:
+            for days in WINDOWS:
+                if day >= window_start(days, today):
+                    field = f'plans_{days}d'
+                    updates[field] = F(field) + delta
+        DestinationPopularity.objects.filter(pk=destination_id).update(**updates)
+
+        if popularity.window_date != today:
+            refresh_windows([destination_id])
+
+
+def refresh_windows(destination_ids=None, apps=django_apps):
+    """
+    Recompute plans_7d/plans_30d from the daily rollup.
+    Without destination_ids only rows not yet computed for today are refreshed.
+    """
+    DestinationDailyPlans = apps.get_model('api', 'DestinationDailyPlans')
+    DestinationPopularity = apps.get_model('api', 'DestinationPopularity')
+
+    today = timezone.localdate()
+    with transaction.atomic():
+        rows = DestinationPopularity.objects.select_for_update()
+        if destination_ids is None:
+            rows = rows.exclude(window_date=today)
+        else:
+            rows = rows.filter(pk__in=destination_ids)
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        window_days = max(WINDOWS)
+        rollups = DestinationDailyPlans.objects.filter(
+            destination_id__in=[row.pk for row in rows],
+            day__gte=window_start(window_days, today)
+        ).values('destination_id').annotate(**{
+            f'plans_{days}d': Sum('count', filter=Q(day__gte=window_start(days, today)))
+            for days in WINDOWS
+        })
+        counts = {rollup['destination_id']: rollup for rollup in rollups}
+
+        for row in rows:
+            rollup = counts.get(row.pk, {})
+            for days in WINDOWS:
+                setattr(row, f'plans_{days}d', rollup.get(f'plans_{days}d') or 0)
+            row.window_date = today
+        DestinationPopularity.objects.bulk_update(
+            rows, [f'plans_{days}d' for days in WINDOWS] + ['window_date']
+        )
+    return len(rows)
+
+
+def rebuild(apps=django_apps):
+    """Recount everything from the TravelPlan and archived plan tables (backfill / repair)"""
+    TravelPlan = apps.get_model('api', 'TravelPlan')
+    DestinationDailyPlans = apps.get_model('api', 'DestinationDailyPlans')
+    DestinationPopularity = apps.get_model('api', 'DestinationPopularity')
+
+    sources = [TravelPlan.objects.filter(destination__isnull=False)]
+    try:
+        ArchivedTravelPlan = apps.get_model('api', 'ArchivedTravelPlan')
+    except LookupError:
+        # Migration state before the archive table existed
+        ArchivedTravelPlan = None
+    if ArchivedTravelPlan is not None:
+        sources.append(ArchivedTravelPlan.objects.filter(destination__isnull=False))
+
+    daily = Counter()
+    totals = Counter()
+    travellers = set()
+    for plans in sources:
+        for row in plans.annotate(day=TruncDate('created_at')).values(
+            'destination_id', 'day'
+        ).annotate(count=Count('id')).order_by():
+            daily[(row['destination_id'], row['day'])] += row['count']
+            totals[row['destination_id']] += row['count']
+        travellers.update(plans.values_list('destination_id', 'user_id').distinct().order_by())
+    unique_users = Counter(destination_id for destination_id, _ in travellers)
+
+    with transaction.atomic():
+        DestinationDailyPlans.objects.all().delete()
+        DestinationPopularity.objects.all().delete()
+
+        DestinationDailyPlans.objects.bulk_create([
+            DestinationDailyPlans(destination_id=destination_id, day=day, count=count)
+            for (destination_id, day), count in daily.items()
+        ], batch_size=1000)
+        DestinationPopularity.objects.bulk_create([
+            DestinationPopularity(
+                destination_id=destination_id,
+                total_plans=count,
+                unique_users=unique_users[destination_id]
+            )
+            for destination_id, count in totals.items()
+        ], batch_size=1000)
+        return refresh_windows(apps=apps)
+
+
+def trending(days=7):
+    """Active destinations with the most plans in the last `days` days (read-only)"""
+    from api.models import Destination
+
+    start = window_start(days, timezone.localdate())
+    return Destination.objects.filter(
+        is_active=True, daily_plans__day__gte=start
+    ).annotate(
+        plans_in_window=Sum('daily_plans__count'),
+        total_plans=F('popularity__total_plans'),
+        unique_users=F('popularity__unique_users')
+    ).filter(plans_in_window__gt=0).order_by('-plans_in_window', '-popularity__total_plans', 'id')
@@ -0,0 +1,43 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+# orjson is an optional dependency: without it we render with the stdlib encoder
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+    Output matches the default renderer: dates, datetimes, Decimals, UUIDs
+    and querysets are handed to DRF's own JSONEncoder so their formatting
+    does not change. Falls back to the default renderer when orjson is not
+    installed, when indentation is requested (browsable API) or when orjson
+    cannot encode a value.
+    """
+    
+    options = 0
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    
+    def __init__(self):
+        self._encoder = self.encoder_class()
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        try:
+            ret = orjson.dumps(data, default=self._encoder.default, option=self.options)
+        except TypeError:
+            # e.g. integers wider than 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        # Same strict javascript subset escaping as JSONRenderer
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
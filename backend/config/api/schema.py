@@ -0,0 +1,194 @@
+"""
+Schema introspection for the api models.
+Walks the model metadata once (cached per process) and renders it as a
+data dictionary, a PlantUML class diagram and a JSON schema. Used by
+`manage.py export_schema` and by generate_srs.py for the SRS data model.
+"""
+from functools import lru_cache
+
+from django.apps import apps
+from django.db.models import NOT_PROVIDED
+
+# Django internal type -> diagram type
+FIELD_TYPES = {
+    'AutoField': 'Integer', 'BigAutoField': 'Integer', 'IntegerField': 'Integer',
+    'PositiveIntegerField': 'Integer', 'SmallIntegerField': 'Integer',
+    'BigIntegerField': 'Integer', 'PositiveSmallIntegerField': 'Integer',
+    'CharField': 'String', 'URLField': 'String', 'EmailField': 'String',
+    'SlugField': 'String', 'TextField': 'Text', 'BooleanField': 'Boolean',
+    'DecimalField': 'Decimal', 'FloatField': 'Float', 'DateField': 'Date',
+    'DateTimeField': 'DateTime', 'JSONField': 'JSON',
+    'ForeignKey': 'Integer', 'OneToOneField': 'Integer',
+}
+
+# Diagram type -> JSON schema (decimals are rendered as strings by the API)
+JSON_TYPES = {
+    'Integer': {'type': 'integer'},
+    'String': {'type': 'string'},
+    'Text': {'type': 'string'},
+    'Boolean': {'type': 'boolean'},
+    'Decimal': {'type': 'string', 'format': 'decimal'},
+    'Float': {'type': 'number'},
+    'Date': {'type': 'string', 'format': 'date'},
+    'DateTime': {'type': 'string', 'format': 'date-time'},
+    'JSON': {},
+}
+
+
+def _describe_field(field):
+    """Plain-dict description of one concrete model field"""
+    internal_type = field.get_internal_type()
+    default = None
+    if field.default is not NOT_PROVIDED:
+        default = field.default() if callable(field.default) else field.default
+    
+    return {
+        'name': field.attname if field.is_relation else field.name,
+        'column': field.column,
+        'type': FIELD_TYPES.get(internal_type, internal_type),
+        'internal_type': internal_type,
+        'primary_key': field.primary_key,
+        'null': field.null,
+        'blank': field.blank,
+        'unique': field.unique,
+        'max_length': field.max_length,
+        'max_digits': getattr(field, 'max_digits', None),
+        'decimal_places': getattr(field, 'decimal_places', None),
+        'default': default,
+        'choices': [value for value, _ in field.choices] if field.choices else None,
+        'description': str(field.help_text or field.verbose_name),
+        'related_model': field.related_model.__name__ if field.is_relation else None,
+        'relation': (
+            'one_to_one' if field.one_to_one else 'many_to_one'
+        ) if field.is_relation else None,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_schema(app_label='api'):
+    """
+    One pass over the app's models (and the models they reference).
+    Returns a list of {name, table, fields, indexes} dicts in model order.
+    """
+    models = list(apps.get_app_config(app_label).get_models())
+    for model in list(models):
+        for field in model._meta.concrete_fields:
+            if field.is_relation and field.related_model not in models:
+                models.append(field.related_model)
+    
+    return [
+        {
+            'name': model.__name__,
+            'app_label': model._meta.app_label,
+            'table': model._meta.db_table,
+            'fields': [_describe_field(field) for field in model._meta.concrete_fields],
+            'indexes': [
+                {'name': index.name, 'fields': list(index.fields)}
+                for index in model._meta.indexes
+            ],
+        }
+        for model in models
+    ]
+
+
+def data_dictionary(schema):
+    """Rows of (model, field, type, nullable, key, default, description)"""
+    rows = []
+    for model in schema:
+        for field in model['fields']:
+            field_type = field['type']
+            if field['choices']:
+                field_type = f"Enum({', '.join(str(value) for value in field['choices'])})"
+            elif field['max_length']:
+                field_type = f"{field_type}({field['max_length']})"
+            elif field['max_digits']:
+                field_type = f"{field_type}({field['max_digits']},{field['decimal_places']})"
+            
+            if field['primary_key']:
+                key = 'PK'
+            elif field['related_model']:
+                key = f"FK → {field['related_model']}"
+            elif field['unique']:
+                key = 'UNIQUE'
+            else:
+                key = ''
+            
+            rows.append({
+                'model': model['name'],
+                'field': field['name'],
+                'type': field_type,
+                'nullable': 'Yes' if field['null'] else 'No',
+                'key': key,
+                'default': '' if field['default'] is None else str(field['default']),
+                'description': field['description'],
+            })
+    return rows
+
+
+def plantuml(schema):
+    """PlantUML class diagram with one relation line per foreign key"""
+    lines = ["@startuml"]
+    relations = []
+    for model in schema:
+        lines.append(f"class {model['name']} {{")
+        for field in model['fields']:
+            if field['related_model']:
+                lines.append(f"  + {field['name']}: Integer [FK]")
+                many = '1' if field['relation'] == 'one_to_one' else '*'
+                optional = '0..1' if field['null'] else '1'
+                relations.append(
+                    f'{model["name"]} "{many}" -- "{optional}" {field["related_model"]} : {field["name"]}'
+                )
+                continue
+            field_type = field['type']
+            if field['choices']:
+                field_type = f"Enum({', '.join(str(value) for value in field['choices'])})"
+            lines.append(f"  + {field['name']}: {field_type}")
+        lines.append("}")
+        lines.append("")
+    lines.extend(relations)
+    lines.append("")
+    lines.append("@enduml")
+    return "\n".join(lines)
+
+
+def json_schema(schema):
+    """JSON Schema (draft 2020-12) with one definition per model"""
+    definitions = {}
+    for model in schema:
+        properties = {}
+        required = []
+        for field in model['fields']:
+            prop = dict(JSON_TYPES.get(field['type'], {}))
+            if field['choices']:
+                prop['enum'] = list(field['choices'])
+            if field['max_length'] and prop.get('type') == 'string':
+                prop['maxLength'] = field['max_length']
+            if field['related_model']:
+                prop['description'] = f"Foreign key to {field['related_model']}"
+            elif field['description']:
+                prop['description'] = field['description']
+            if field['null'] and 'type' in prop:
+                prop['type'] = [prop['type'], 'null']
+            properties[field['name']] = prop
+            if not field['null'] and not field['blank'] and field['default'] is None:
+                required.append(field['name'])
+        definitions[model['name']] = {
+            'type': 'object',
+            'properties': properties,
+            'required': required,
+        }
+    return {
+        '$schema': 'https://json-schema.org/draft/2020-12/schema',
+        '$defs': definitions,
+    }
+
+
+def export_all(app_label='api'):
+    """All three renderings from a single schema walk"""
+    schema = get_schema(app_label)
+    return {
+        'data_dictionary': data_dictionary(schema),
+        'plantuml': plantuml(schema),
+        'json_schema': json_schema(schema),
+    }
@@ -0,0 +1,85 @@
+"""
+Parse Destination.best_season free text into month bitmasks.
+Bit (month - 1) is set for every month the destination is in season, e.g.
+"June - October" → June..October, "Dec-Feb" wraps over the new year,
+"Year-round" → all months. Months next to the season are its shoulder.
+"""
+import re
+
+ALL_MONTHS = (1 << 12) - 1
+
+MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+    'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'jun': 6, 'jul': 7, 'aug': 8,
+    'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+# Meteorological seasons, northern hemisphere (flipped for southern latitudes)
+SEASONS = {
+    'spring': (3, 4, 5),
+    'summer': (6, 7, 8),
+    'autumn': (9, 10, 11),
+    'fall': (9, 10, 11),
+    'winter': (12, 1, 2),
+}
+
+YEAR_ROUND = re.compile(r'\b(year[\s-]*round|all[\s-]*year|any\s*time|anytime)\b')
+WORD = re.compile(r'[a-z]+')
+RANGE_SEPARATOR = re.compile(r'^\s*(-|–|—|to|through|thru|till|until)\s*$')
+
+
+def month_bit(month):
+    return 1 << (month - 1)
+
+
+def month_range(start, end):
+    """Bitmask of start..end inclusive, wrapping past December"""
+    mask = 0
+    month = start
+    while True:
+        mask |= month_bit(month)
+        if month == end:
+            return mask
+        month = month % 12 + 1
+
+
+def parse_season(text, latitude=None):
+    """Bitmask of in-season months described by text (0 if nothing recognised)"""
+    text = (text or '').lower()
+    if YEAR_ROUND.search(text):
+        return ALL_MONTHS
+    
+    mask = 0
+    southern = latitude is not None and latitude < 0
+    previous = None  # (month, end offset of the word)
+    for match in WORD.finditer(text):
+        word = match.group()
+        if word in SEASONS:
+            for month in SEASONS[word]:
+                mask |= month_bit((month + 5) % 12 + 1 if southern else month)
+            previous = None
+            continue
+        month = MONTHS.get(word)
+        if month is None:
+            continue
+        if previous is not None and RANGE_SEPARATOR.match(text[previous[1]:match.start()]):
+            mask |= month_range(previous[0], month)
+        else:
+            mask |= month_bit(month)
+        previous = (month, match.end())
+    return mask
+
+
+def shoulder_of(mask):
+    """Months adjacent to the season but not in it"""
+    if mask in (0, ALL_MONTHS):
+        return 0
+    rotated_left = ((mask << 1) | (mask >> 11)) & ALL_MONTHS
+    rotated_right = ((mask >> 1) | (mask << 11)) & ALL_MONTHS
+    return (rotated_left | rotated_right) & ~mask
+
+
+def months_in(mask):
+    """[1..12] months whose bit is set"""
+    return [month for month in range(1, 13) if mask & month_bit(month)]
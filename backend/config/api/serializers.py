@@ -1,11 +1,160 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
 from api.models import (
     UserPreference, Destination, DestinationImage, Hotel, Transport, 
     TravelPlan, Itinerary
 )
 
 
+# ==================== SPARSE FIELDSETS ====================
+
+def _parse_field_list(value):
+    """Split a comma-separated query param into a list of field names"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [name.strip() for name in value if name and name.strip()]
+
+
+def _apply_field_selection(serializer, selected, expand=()):
+    """
+    Drop every field of `serializer` that was not selected.
+    Dotted names (e.g. destination_details.name) narrow nested serializers.
+    Expandable (nested) fields are only kept when selected or expanded.
+    """
+    top_level = set()
+    nested = {}
+    for name in selected:
+        head, _, rest = name.partition('.')
+        top_level.add(head)
+        if rest:
+            nested.setdefault(head, []).append(rest)
+    top_level.update(expand)
+
+    for name in list(serializer.fields):
+        if name not in top_level:
+            serializer.fields.pop(name)
+
+    for name, sub_fields in nested.items():
+        field = serializer.fields.get(name)
+        field = getattr(field, 'child', field)
+        if isinstance(field, serializers.Serializer) and name not in expand:
+            _apply_field_selection(field, sub_fields)
+
+
+def _queryset_plan(model, serializer, prefix=''):
+    """
+    Work out which columns and relations a serializer reads.
+    Returns (only, select_related, prefetch_related) lookups,
+    or None if a field cannot be mapped onto the model.
+    """
+    only, select, prefetch = [], [], []
+    computed = getattr(getattr(serializer, 'Meta', None), 'computed_fields', ())
+
+    for field in serializer.fields.values():
+        if field.write_only or field.field_name in computed:
+            continue
+        if field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+            return None
+
+        attr, *rest = field.source_attrs
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+
+        nested = getattr(field, 'child', field)
+        lookup = prefix + attr
+
+        if not model_field.is_relation:
+            only.append(lookup)
+        elif model_field.concrete and (model_field.many_to_one or model_field.one_to_one):
+            # Forward foreign key: join it only if the related row is read
+            if isinstance(nested, serializers.Serializer):
+                plan = _queryset_plan(model_field.related_model, nested, lookup + '__')
+                if plan is None:
+                    return None
+                only.append(lookup)
+                select.append(lookup)
+                only += plan[0]
+                select += plan[1]
+                prefetch += plan[2]
+            elif rest:
+                only += [lookup, '__'.join([lookup] + rest)]
+                select.append(lookup)
+            else:
+                only.append(lookup)
+        elif isinstance(nested, serializers.Serializer):
+            # Reverse relation (images, itinerary): prefetch a narrowed queryset
+            related_model = model_field.related_model
+            plan = _queryset_plan(related_model, nested)
+            if plan is None:
+                return None
+            related = related_model.objects.only(model_field.field.name, *plan[0])
+            if plan[1]:
+                related = related.select_related(*plan[1])
+            if plan[2]:
+                related = related.prefetch_related(*plan[2])
+            prefetch.append(Prefetch(lookup, queryset=related))
+        else:
+            return None
+
+    return only, select, prefetch
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets for model serializers.
+    Reads ?fields=a,b,c and ?expand=x from the request (or the `fields` /
+    `expand` keyword arguments) and only renders the requested fields.
+    Nested payloads listed in Meta.expandable_fields are dropped from a
+    ?fields= selection unless they are named there or in ?expand=.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        if request is not None and request.method == 'GET':
+            if fields is None:
+                fields = request.query_params.get('fields')
+            if expand is None:
+                expand = request.query_params.get('expand')
+
+        fields = _parse_field_list(fields)
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        expand = [name for name in _parse_field_list(expand) if name in expandable]
+        self.is_sparse = bool(fields)
+        if self.is_sparse:
+            _apply_field_selection(self, fields, expand)
+
+    @classmethod
+    def setup_queryset(cls, queryset, request=None, fields=None, expand=None):
+        """
+        Narrow a queryset to what this serializer will render:
+        .only() the selected columns, select_related/prefetch_related
+        the nested payloads that were requested and nothing else.
+        """
+        serializer = cls(context={'request': request}, fields=fields, expand=expand)
+        plan = _queryset_plan(queryset.model, serializer)
+        if plan is None:
+            return queryset
+
+        only, select, prefetch = plan
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if serializer.is_sparse:
+            queryset = queryset.only(*only)
+        return queryset
+
+
 # User Serializer
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -32,52 +181,71 @@ class UserPreferenceSerializer(serializers.ModelSerializer):
 
 
 # Destination Image Serializer
-class DestinationImageSerializer(serializers.ModelSerializer):
+class DestinationImageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = DestinationImage
         fields = ['id', 'destination', 'image_url', 'caption', 'is_primary', 'created_at']
 
 
 # Destination Serializer
-class DestinationSerializer(serializers.ModelSerializer):
+class DestinationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     images = DestinationImageSerializer(many=True, read_only=True)
+    # Only present on "near me" queries (annotated by api.geo.near)
+    distance_km = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Destination
         fields = [
             'id', 'name', 'country', 'city', 'description', 'location',
-            'image_url', 'images', 'category', 'best_season', 'avg_temperature',
+            'latitude', 'longitude', 'distance_km',
+            'image_url', 'primary_image_url', 'images', 'category', 'best_season', 'avg_temperature',
             'budget_level', 'budget_min', 'budget_max', 'objectives_supported',
-            'is_active', 'booking_url', 'created_at'
+            'is_active', 'booking_url', 'hotel_count', 'hotel_price_min', 'hotel_price_max',
+            'hotel_stars_min', 'hotel_stars_max', 'route_count', 'created_at', 'updated_at'
         ]
+        expandable_fields = ['images']
+        computed_fields = ['distance_km']
+
+
+# Destination list/card serializer - primary image only, no gallery
+class DestinationListSerializer(DestinationSerializer):
+    images = None
+    
+    class Meta(DestinationSerializer.Meta):
+        fields = [name for name in DestinationSerializer.Meta.fields if name != 'images']
+        expandable_fields = []
 
 
 # Hotel Serializer
-class HotelSerializer(serializers.ModelSerializer):
+class HotelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     destination_name = serializers.CharField(source='destination.name', read_only=True)
+    # Only present on "near me" queries (annotated by api.geo.near)
+    distance_km = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Hotel
         fields = [
             'id', 'destination', 'destination_name', 'name', 'stars', 
             'price_per_night', 'budget_category', 'description', 
-            'image_url', 'amenities', 'created_at'
+            'latitude', 'longitude', 'distance_km',
+            'image_url', 'amenities', 'created_at', 'updated_at'
         ]
+        computed_fields = ['distance_km']
 
 
 # Transport Serializer
-class TransportSerializer(serializers.ModelSerializer):
+class TransportSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Transport
         fields = [
             'id', 'origin', 'destination', 'transport_type', 
             'distance_km', 'estimated_price', 'duration_hours',
-            'availability', 'created_at'
+            'availability', 'created_at', 'updated_at'
         ]
 
 
 # Itinerary Serializer
-class ItinerarySerializer(serializers.ModelSerializer):
+class ItinerarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Itinerary
         fields = [
@@ -87,7 +255,7 @@ class ItinerarySerializer(serializers.ModelSerializer):
 
 
 # Travel Plan Serializer
-class TravelPlanSerializer(serializers.ModelSerializer):
+class TravelPlanSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     destination_details = DestinationSerializer(source='destination', read_only=True)
     hotel_details = HotelSerializer(source='hotel', read_only=True)
     transport_details = TransportSerializer(source='transport', read_only=True)
@@ -101,3 +269,6 @@ class TravelPlanSerializer(serializers.ModelSerializer):
             'travel_date', 'return_date', 'budget', 'num_travelers',
             'notes', 'itinerary', 'created_at', 'updated_at'
         ]
+        expandable_fields = [
+            'destination_details', 'hotel_details', 'transport_details', 'itinerary'
+        ]
@@ -0,0 +1,143 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from api import aggregates, changefeed, dashboard, popularity
+from api.models import ChangeLog, Destination, DestinationImage, Hotel, Transport, TravelPlan, UserPreference
+
+
+# ==================== POPULARITY COUNTERS ====================
+
+@receiver(post_init, sender=TravelPlan)
+def remember_plan_destination(sender, instance, **kwargs):
+    """Keep the loaded destination so a later save can tell it moved"""
+    # Left out by .only() (sparse fields): DEFERRED, reading it would cost a query per row
+    instance._counted_destination_id = instance.__dict__.get('destination_id', DEFERRED)
+
+
+@receiver(pre_save, sender=TravelPlan)
+def load_deferred_plan_destination(sender, instance, raw=False, **kwargs):
+    """Destination deferred at load time but assigned since: read the stored one before it is overwritten"""
+    if (not raw and not instance._state.adding and instance._counted_destination_id is DEFERRED
+            and 'destination_id' in instance.__dict__):
+        instance._counted_destination_id = sender._base_manager.filter(pk=instance.pk).values_list(
+            'destination_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=TravelPlan)
+def count_plan(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        popularity.record_plan(instance)
+    elif instance._counted_destination_id is DEFERRED:
+        # Neither loaded nor assigned: the destination did not change
+        return
+    elif instance.destination_id != instance._counted_destination_id:
+        if instance._counted_destination_id is not None:
+            popularity.forget_plan(instance, destination_id=instance._counted_destination_id)
+        popularity.record_plan(instance)
+    instance._counted_destination_id = instance.destination_id
+
+
+@receiver(post_delete, sender=TravelPlan)
+def uncount_plan(sender, instance, **kwargs):
+    popularity.forget_plan(instance)
+
+
+# ==================== DASHBOARD BUNDLE ====================
+
+@receiver(post_save, sender=TravelPlan)
+@receiver(post_delete, sender=TravelPlan)
+@receiver(post_save, sender=UserPreference)
+@receiver(post_delete, sender=UserPreference)
+def invalidate_dashboard(sender, instance, **kwargs):
+    dashboard.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Destination)
+@receiver(post_delete, sender=Destination)
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+@receiver(post_save, sender=Transport)
+@receiver(post_delete, sender=Transport)
+def invalidate_dashboard_catalog(sender, instance, raw=False, **kwargs):
+    """Bundle ETags embed catalog versions: bump now rather than when the change feed is processed"""
+    if not raw:
+        changefeed.bump_model_version(sender._meta.label_lower)
+
+
+# ==================== PRIMARY IMAGE ====================
+
+@receiver(post_save, sender=DestinationImage)
+@receiver(post_delete, sender=DestinationImage)
+def sync_primary_image(sender, instance, raw=False, **kwargs):
+    if not raw:
+        DestinationImage.refresh_primary_image(instance.destination_id)
+
+
+# ==================== DESTINATION AGGREGATES ====================
+
+# Field naming the destination: a foreign key for hotels, a place name for transport
+AGGREGATE_TARGET_FIELD = {Hotel: 'destination_id', Transport: 'destination'}
+
+
+@receiver(post_init, sender=Hotel)
+@receiver(post_init, sender=Transport)
+def remember_aggregate_target(sender, instance, **kwargs):
+    """Keep the loaded destination so a move also refreshes the old one"""
+    # Left out by .only() (sparse fields): DEFERRED, reading it would cost a query per row
+    instance._aggregated_destination = instance.__dict__.get(AGGREGATE_TARGET_FIELD[sender], DEFERRED)
+
+
+@receiver(pre_save, sender=Hotel)
+@receiver(pre_save, sender=Transport)
+def load_deferred_aggregate_target(sender, instance, raw=False, **kwargs):
+    """Destination deferred at load time but assigned since: read the stored one before it is overwritten"""
+    field = AGGREGATE_TARGET_FIELD[sender]
+    if (not raw and not instance._state.adding and instance._aggregated_destination is DEFERRED
+            and field in instance.__dict__):
+        instance._aggregated_destination = sender._base_manager.filter(pk=instance.pk).values_list(
+            field, flat=True
+        ).first()
+
+
+def aggregate_targets(sender, instance):
+    previous = instance._aggregated_destination
+    if previous is DEFERRED:
+        # Neither loaded nor assigned, so the destination did not move; the current
+        # one is read below (one query on this write, none per loaded row)
+        previous = None
+    if sender is Hotel:
+        return {instance.destination_id, previous} - {None}
+    return aggregates.destinations_for_places({instance.destination, previous})
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_save, sender=Transport)
+def refresh_aggregates_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    aggregates.refresh(aggregate_targets(sender, instance))
+    instance._aggregated_destination = getattr(instance, AGGREGATE_TARGET_FIELD[sender])
+
+
+@receiver(post_delete, sender=Hotel)
+@receiver(post_delete, sender=Transport)
+def refresh_aggregates_on_delete(sender, instance, origin=None, **kwargs):
+    # Hotels deleted along with their destination: nothing left to refresh
+    if isinstance(origin, Destination) or getattr(origin, 'model', None) is Destination:
+        return
+    aggregates.refresh(aggregate_targets(sender, instance))
+
+
+# ==================== CHANGE FEED ====================
+
+def log_delete(sender, instance, **kwargs):
+    """Runs inside the delete transaction (instance, queryset and cascade deletes)"""
+    ChangeLog.record(instance, ChangeLog.DELETE)
+
+
+for model in (Destination, Hotel, Transport, TravelPlan, UserPreference):
+    post_delete.connect(log_delete, sender=model, dispatch_uid=f'changelog_delete_{model._meta.label_lower}')
@@ -0,0 +1,171 @@
+"""
+Static snapshots of the public catalog for CDN distribution.
+build_snapshot() serializes every active destination (with images), hotel
+and transport into one document, names it by content hash and writes it to
+CATALOG_SNAPSHOT_DIR as JSON and, when msgpack is installed, as MessagePack
+- each also precompressed with gzip (and brotli when installed). Files are
+written to a temporary name and renamed, and manifest.json is replaced
+last, so readers only ever see complete versions. Snapshot files never
+change once written and can be cached forever; the manifest (also served
+by /api/catalog/manifest/) says which version is current.
+
+The manifest carries the catalog sync token taken before the catalog was
+read, so a client can continue with /api/catalog/changes/?since=<token>.
+Rebuilt by manage.py build_catalog_snapshot and by the `catalog_snapshot`
+change feed handler whenever catalog rows change.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from api import catalog_sync, changefeed
+from api.models import Destination, Hotel, Transport
+from api.serializers import DestinationSerializer, HotelSerializer, TransportSerializer
+
+# brotli and msgpack are optional: without them only gzip / JSON files are written
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+MANIFEST = 'manifest.json'
+
+# Older versions kept on disk for clients holding a stale manifest
+KEEP_VERSIONS = 3
+
+
+def snapshot_dir():
+    return Path(getattr(settings, 'CATALOG_SNAPSHOT_DIR', settings.BASE_DIR / 'catalog_snapshots'))
+
+
+def snapshot_url(name):
+    return getattr(settings, 'CATALOG_SNAPSHOT_URL', '/catalog/') + name
+
+
+def catalog_document():
+    """The whole public catalog as plain data, with the sync token it is current as of"""
+    token = catalog_sync.current_token()
+    destinations = DestinationSerializer.setup_queryset(
+        Destination.objects.filter(is_active=True).order_by('id')
+    )
+    hotels = HotelSerializer.setup_queryset(Hotel.objects.order_by('id'))
+    transports = Transport.objects.order_by('id')
+    # Round-trip through JSON so both encodings see the same plain types
+    return json.loads(json.dumps({
+        'token': token,
+        'destinations': DestinationSerializer(destinations, many=True).data,
+        'hotels': HotelSerializer(hotels, many=True).data,
+        'transports': TransportSerializer(transports, many=True).data,
+    }, cls=DjangoJSONEncoder))
+
+
+def encodings(document):
+    """{format: bytes} of the document, deterministic for the same content"""
+    encoded = {'json': json.dumps(document, separators=(',', ':'), sort_keys=True).encode()}
+    if msgpack is not None:
+        encoded['msgpack'] = msgpack.packb(document)
+    return encoded
+
+
+def write_atomic(path, data):
+    """Write via a temporary file in the same directory, then rename over `path`"""
+    handle, temporary = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            output.write(data)
+            output.flush()
+            os.fsync(output.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def compressed_variants(name, data):
+    """(file name, bytes) of the file and its precompressed variants"""
+    yield name, data
+    yield f'{name}.gz', gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield f'{name}.br', brotli.compress(data, quality=11)
+
+
+def read_manifest():
+    """Current manifest, or None if no snapshot was built yet"""
+    try:
+        return json.loads((snapshot_dir() / MANIFEST).read_bytes())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def build_snapshot(force=False):
+    """Write a new snapshot version if the catalog changed; returns the manifest"""
+    document = catalog_document()
+    # The token is not content: it lives in the manifest, files stay immutable
+    token = document.pop('token')
+    encoded = encodings(document)
+    version = hashlib.sha256(encoded['json']).hexdigest()[:16]
+
+    current = read_manifest()
+    if current and current['version'] == version and not force:
+        # Same content: only move the token forward so it never falls behind the change log retention
+        if current['token'] != token:
+            current['token'] = token
+            write_atomic(snapshot_dir() / MANIFEST, json.dumps(current, indent=2).encode())
+        return current
+
+    directory = snapshot_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    files = {}
+    for fmt, data in encoded.items():
+        name = f'catalog.{version}.{fmt}'
+        for file_name, content in compressed_variants(name, data):
+            write_atomic(directory / file_name, content)
+        files[fmt] = {
+            'url': snapshot_url(name),
+            'size': len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'precompressed': ['gzip', 'br'] if brotli is not None else ['gzip'],
+        }
+
+    manifest = {
+        'version': version,
+        'token': token,
+        'generated_at': timezone.now().isoformat(),
+        'counts': {key: len(document[key]) for key in ('destinations', 'hotels', 'transports')},
+        'files': files,
+    }
+    write_atomic(directory / MANIFEST, json.dumps(manifest, indent=2).encode())
+    prune(directory, version)
+    return manifest
+
+
+def prune(directory, current_version):
+    """Delete all but the newest KEEP_VERSIONS snapshot versions"""
+    versions = {}
+    for path in directory.glob('catalog.*'):
+        versions.setdefault(path.name.split('.')[1], []).append(path)
+    newest = sorted(versions, key=lambda version: max(p.stat().st_mtime for p in versions[version]), reverse=True)
+    for version in newest[KEEP_VERSIONS:]:
+        if version != current_version:
+            for path in versions[version]:
+                path.unlink(missing_ok=True)
+
+
+@changefeed.register('catalog_snapshot', models=catalog_sync.LABELS)
+def rebuild_on_change(changes):
+    """Rebuild after catalog changes (no-op when the content hash is unchanged)"""
+    if getattr(settings, 'CATALOG_SNAPSHOT_AUTO', True):
+        build_snapshot()
@@ -1,3 +1,1174 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import io
+import json
+import tempfile
+import uuid
+import zipfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Max
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from api import archival, changefeed, counting, export, geo, seasons, snapshots, trip_archive
+from api.coalescing import request_key
+from api.middleware import CompressionMiddleware, parse_accept_encoding
+from api.models import (
+    ArchivedTravelPlan, ChangeCursor, ChangeLog, Destination, DestinationDailyPlans, DestinationImage,
+    DestinationPopularity, Hotel, Itinerary, Transport, TravelPlan, UserPreference
+)
+from api.optimizer import TripOptimizer
+from api.renderers import FastJSONRenderer
+
+
+class CatalogFixtureMixin:
+    """A few destinations with hotels, one transport route and plans for one user"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('traveller', password='secret')
+        cls.admin = User.objects.create_superuser('admin', password='secret')
+        cls.destinations = []
+        for number in range(3):
+            destination = Destination.objects.create(
+                name=f'Destination {number}', country='Tanzania', city=f'City {number}',
+                description='A place to visit', category='beach', best_season='June - October',
+                avg_temperature='25-30°C', budget_level='medium', budget_min=100, budget_max=1000,
+                objectives_supported=['leisure']
+            )
+            for stars in (2, 4):
+                Hotel.objects.create(
+                    destination=destination, name=f'Hotel {number}-{stars}', stars=stars,
+                    price_per_night=40 * stars, budget_category='medium', description='Rooms',
+                    amenities='wifi'
+                )
+            cls.destinations.append(destination)
+        cls.transport = Transport.objects.create(
+            origin='Dar es Salaam', destination='City 0', transport_type='train', distance_km=500,
+            estimated_price=40, duration_hours=8, availability='daily'
+        )
+        today = date.today()
+        cls.plans = []
+        for number in range(5):
+            travel_date = today + timedelta(days=10 * (number - 2))
+            plan = TravelPlan.objects.create(
+                user=cls.user, destination=cls.destinations[number % 3], transport=cls.transport,
+                travel_date=travel_date, return_date=travel_date + timedelta(days=3),
+                budget=1500, num_travelers=2
+            )
+            Itinerary.objects.create(travel_plan=plan, day_number=1, activities='Beach day')
+            cls.plans.append(plan)
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+
+# ==================== SPARSE FIELDSETS ====================
+
+# Local memory cache so only database work is counted (cached counts live in the cache)
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SparseFieldsetTests(CatalogFixtureMixin, TestCase):
+
+    def assert_sparse_list(self, url, fields, queries, user=None):
+        client = self.client_for(user)
+        # COUNT(*) for the page and one SELECT of the requested columns
+        with self.assertNumQueries(queries):
+            response = client.get(url, {'fields': ','.join(fields)})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['results']
+        self.assertTrue(rows)
+        for row in rows:
+            self.assertEqual(sorted(row), sorted(fields))
+
+    def test_destination_list(self):
+        self.assert_sparse_list('/api/destinations/', ['id', 'name', 'country'], 2)
+
+    def test_hotel_list(self):
+        self.assert_sparse_list('/api/hotels/', ['name', 'price_per_night'], 2)
+
+    def test_transport_list(self):
+        self.assert_sparse_list('/api/transports/', ['id', 'origin'], 2)
+
+    def test_travel_plan_list(self):
+        self.assert_sparse_list('/api/travel-plans/', ['id', 'budget'], 2, user=self.user)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for number in range(10):
+            Hotel.objects.create(
+                destination=self.destinations[0], name=f'Extra {number}', stars=3, price_per_night=90,
+                budget_category='medium', description='Rooms', amenities='wifi'
+            )
+        self.assert_sparse_list('/api/hotels/', ['name', 'price_per_night'], 2)
+
+
+# ==================== RENDERING AND COMPRESSION ====================
+
+class FastJSONRendererTests(TestCase):
+    data = {
+        'when': datetime(2026, 3, 1, 9, 30, tzinfo=dt_timezone.utc), 'day': date(2026, 3, 1),
+        'price': Decimal('120.50'), 'id': uuid.UUID(int=1), 'note': 'line\u2028break', 1: 'non-string key',
+    }
+
+    def test_output_matches_the_default_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_falls_back_for_indentation_and_wide_integers(self):
+        context = {'indent': 4}
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, renderer_context=context),
+            JSONRenderer().render(self.data, renderer_context=context)
+        )
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+
+    def test_api_responses_negotiate_json_and_the_browsable_api(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/destinations/', HTTP_ACCEPT='application/json')['Content-Type'],
+                         'application/json')
+        self.assertTrue(client.get('/api/destinations/', HTTP_ACCEPT='text/html')['Content-Type'].startswith('text/html'))
+
+
+class FakeBrotli:
+    """Stands in for the optional brotli package"""
+
+    @staticmethod
+    def compress(data, quality):
+        return b'br:' + bytes(len(data) // 10)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(TestCase):
+    body = b'{"name": "Destination"}' * 50
+
+    def respond(self, accept_encoding, body=None, content_type='application/json'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = HttpResponse(self.body if body is None else body, content_type=content_type)
+        response['ETag'] = '"v1"'
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(parse_accept_encoding('gzip, BR;q=0.9, *;q=0'), {'gzip': 1.0, 'br': 0.9, '*': 0.0})
+        self.assertEqual(parse_accept_encoding('gzip;q=1.2.3, , deflate'), {'gzip': 0.0, 'deflate': 1.0})
+
+    def test_gzip_by_default(self):
+        response = self.respond('gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_refused_and_zip_responses_are_sent_as_is(self):
+        for response in (self.respond('gzip', body=b'{}'), self.respond('gzip;q=0, br;q=0'),
+                         self.respond('gzip', content_type='application/zip'), self.respond('')):
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response['ETag'], '"v1"')
+
+    @mock.patch('api.middleware.brotli', FakeBrotli)
+    def test_brotli_when_preferred_or_tied(self):
+        for accept_encoding in ('br', 'gzip;q=0.5, br', 'gzip, br'):
+            response = self.respond(accept_encoding)
+            self.assertEqual(response['Content-Encoding'], 'br', accept_encoding)
+            self.assertEqual(response['Content-Length'], str(len(response.content)))
+            self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertEqual(self.respond('gzip, br;q=0.5')['Content-Encoding'], 'gzip')
+
+    def test_no_brotli_without_the_package(self):
+        with mock.patch('api.middleware.brotli', None):
+            self.assertEqual(self.respond('br, gzip;q=0.1')['Content-Encoding'], 'gzip')
+
+
+# ==================== HOTEL FILTERS AND KEYSET PAGES ====================
+
+class HotelKeysetTests(CatalogFixtureMixin, TestCase):
+    url = '/api/hotels/'
+
+    def names(self, **params):
+        response = self.client_for().get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['name'] for row in response.json()['results'])
+
+    def walk(self, url, params, key='results'):
+        """Follow `next` links; returns the ids of every page in order"""
+        client = self.client_for()
+        response = client.get(url, params)
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [row['id'] for row in data[key]]
+            if not data['next']:
+                return ids
+            response = client.get(data['next'])
+
+    def test_range_filters(self):
+        self.assertEqual(self.names(price_min=100), ['Hotel 0-4', 'Hotel 1-4', 'Hotel 2-4'])
+        self.assertEqual(self.names(price_max=80, stars_min=2, stars_max=2), ['Hotel 0-2', 'Hotel 1-2', 'Hotel 2-2'])
+        self.assertEqual(self.names(price_min=81, price_max=159), [])
+        # Unparseable bounds are ignored rather than rejected
+        self.assertEqual(len(self.names(price_min='cheap', stars_max='x')), 6)
+
+    def test_cursor_pages_follow_the_sort_and_break_ties_by_id(self):
+        for sort, ordering in (('price', ('price_per_night', 'id')), ('-price', ('-price_per_night', '-id')),
+                               ('-stars', ('-stars', 'price_per_night', 'id'))):
+            expected = list(Hotel.objects.order_by(*ordering).values_list('id', flat=True))
+            self.assertEqual(self.walk(self.url, {'pagination': 'cursor', 'sort': sort, 'limit': 2}), expected, sort)
+
+    def test_rows_inserted_behind_the_cursor_do_not_shift_the_next_page(self):
+        client = self.client_for()
+        first = client.get(self.url, {'pagination': 'cursor', 'sort': 'price', 'limit': 2}).json()
+        Hotel.objects.create(
+            destination=self.destinations[0], name='Hostel', stars=1, price_per_night=10,
+            budget_category='low', description='Dorms', amenities='wifi'
+        )
+        second = client.get(first['next']).json()
+        seen = [row['id'] for row in first['results'] + second['results']]
+        expected = list(Hotel.objects.exclude(name='Hostel').order_by('price_per_night', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected[:4])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client_for().get(self.url, {'cursor': 'not-a-cursor', 'sort': 'price'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_recommended_keyset_pages(self):
+        ids = self.walk('/api/hotels/recommended/', {
+            'destination_id': self.destinations[1].id, 'sort': '-price', 'limit': 1, 'price_min': 50
+        }, key='recommendations')
+        self.assertEqual(ids, [Hotel.objects.get(name=name).id for name in ('Hotel 1-4', 'Hotel 1-2')])
+
+
+# ==================== NEAR ME ====================
+
+class GeoNearTests(CatalogFixtureMixin, TestCase):
+    # One degree of latitude on the haversine sphere
+    KM_PER_DEGREE_LAT = 111.195
+
+    def place(self, name, latitude, longitude):
+        return Destination.objects.create(
+            name=name, country='Tanzania', city=name, description='A place to visit', category='beach',
+            best_season='June - October', avg_temperature='25-30°C', budget_level='medium',
+            latitude=latitude, longitude=longitude
+        )
+
+    def near(self, latitude, longitude, radius_km):
+        return [row.name for row in geo.near(Destination.objects.all(), latitude, longitude, radius_km)]
+
+    def test_includes_points_across_cell_edges(self):
+        # The equator and the prime meridian split every geohash level, so these
+        # neighbours all sit in different cells from the query point
+        for name, latitude, longitude in (('NE', 0.03, 0.03), ('SW', -0.03, -0.03), ('SE', -0.04, 0.02)):
+            self.place(name, latitude, longitude)
+        self.place('Far', 0.1, 0.1)
+        self.assertNotEqual(geo.encode(0.03, 0.03, 1), geo.encode(-0.03, -0.03, 1))
+        self.assertEqual(self.near(0.001, -0.001, 10), ['NE', 'SW', 'SE'])
+
+    def test_radius_boundary(self):
+        self.place('Inside', -6.8 + 9.9 / self.KM_PER_DEGREE_LAT, 39.28)
+        self.place('Outside', -6.8 + 10.1 / self.KM_PER_DEGREE_LAT, 39.28)
+        rows = list(geo.near(Destination.objects.all(), -6.8, 39.28, 10))
+        self.assertEqual([row.name for row in rows], ['Inside'])
+        self.assertAlmostEqual(rows[0].distance_km, 9.9, places=2)
+
+    def test_wraps_around_the_antimeridian(self):
+        self.place('East', 0, 179.99)
+        self.place('West', 0, -179.99)
+        self.assertEqual(self.near(0, 179.995, 5), ['East', 'West'])
+
+    def test_radius_too_wide_for_cells_scans_without_the_prefix(self):
+        self.assertIsNone(geo.covering_cells(0, 0, 6000))
+        self.place('Dar', -6.8, 39.28)
+        self.place('Nairobi', -1.29, 36.82)
+        self.assertEqual(self.near(-6.8, 39.28, 6000), ['Dar', 'Nairobi'])
+
+    def test_covering_cells_contain_the_point(self):
+        for latitude, longitude, radius_km in ((-6.8, 39.28, 1), (60.0, 10.0, 25), (0.0, 0.0, 100)):
+            cells = geo.covering_cells(latitude, longitude, radius_km)
+            self.assertEqual(len(cells), 9)
+            self.assertIn(geo.encode(latitude, longitude, len(cells[0])), cells)
+
+
+# ==================== SEASONS ====================
+
+class SeasonMaskTests(CatalogFixtureMixin, TestCase):
+
+    def months(self, text, latitude=None):
+        return seasons.months_in(seasons.parse_season(text, latitude))
+
+    def test_parse_season(self):
+        self.assertEqual(self.months('June - October'), [6, 7, 8, 9, 10])
+        self.assertEqual(self.months('Dec-Feb'), [1, 2, 12])
+        self.assertEqual(self.months('April to June and September'), [4, 5, 6, 9])
+        self.assertEqual(self.months('Jan, Mar, Sept'), [1, 3, 9])
+        self.assertEqual(self.months('Year-round'), list(range(1, 13)))
+        self.assertEqual(self.months('Best all year'), list(range(1, 13)))
+        self.assertEqual(self.months('Monsoon months'), [])
+        self.assertEqual(self.months(None), [])
+
+    def test_named_seasons_flip_south_of_the_equator(self):
+        self.assertEqual(self.months('Summer', latitude=48.8), [6, 7, 8])
+        self.assertEqual(self.months('Summer', latitude=-6.8), [1, 2, 12])
+        self.assertEqual(self.months('Winter'), [1, 2, 12])
+
+    def test_shoulder_months(self):
+        self.assertEqual(seasons.months_in(seasons.shoulder_of(seasons.parse_season('June - October'))), [5, 11])
+        self.assertEqual(seasons.months_in(seasons.shoulder_of(seasons.parse_season('Dec-Feb'))), [3, 11])
+        self.assertEqual(seasons.shoulder_of(seasons.ALL_MONTHS), 0)
+        self.assertEqual(seasons.shoulder_of(0), 0)
+
+    def test_masks_follow_best_season_on_save(self):
+        destination = self.destinations[1]
+        destination.best_season = 'Dec-Feb'
+        destination.save()
+        destination.refresh_from_db()
+        self.assertEqual(seasons.months_in(destination.season_mask), [1, 2, 12])
+        self.assertEqual(seasons.months_in(destination.shoulder_mask), [3, 11])
+
+    def test_recommended_ranks_and_filters_by_travel_month(self):
+        for destination, best_season in ((self.destinations[1], 'Dec-Feb'), (self.destinations[2], 'March - April')):
+            destination.best_season = best_season
+            destination.save()
+        client = self.client_for()
+
+        def names(**params):
+            response = client.get('/api/destinations/recommended/', params)
+            return [row['name'] for row in response.data['recommendations']]
+
+        # In season, then shoulder season (March - April starts right after February), then the rest
+        ranked = ['Destination 1', 'Destination 2', 'Destination 0']
+        self.assertEqual(names(travel_month=2), ranked)
+        self.assertEqual(names(travel_date='2026-02-14'), ranked)
+        self.assertEqual(names(travel_month=2, in_season='true'), ['Destination 1'])
+        self.assertEqual(names(travel_month=7, in_season='true'), ['Destination 0'])
+        # Out-of-range months are ignored rather than filtering everything out
+        self.assertEqual(len(names(travel_month=13, in_season='true')), 3)
+
+
+# ==================== CHANGE FEED ====================
+
+@override_settings(CHANGEFEED_SETTLE_SECONDS=0)
+class ChangeFeedTests(CatalogFixtureMixin, TestCase):
+
+    def setUp(self):
+        handlers = mock.patch.dict(changefeed.HANDLERS, clear=True)
+        handlers.start()
+        self.addCleanup(handlers.stop)
+        # Start every test handler after the fixture's own changes
+        self.start = ChangeLog.objects.aggregate(highest=Max('id'))['highest']
+        self.seen = {}
+
+    def handler(self, name, models=None, fail_times=0):
+        ChangeCursor.objects.create(handler=name, last_id=self.start)
+        failures = [fail_times]
+
+        @changefeed.register(name, models=models)
+        def handle(changes):
+            self.seen.setdefault(name, []).append([change.object_id for change in changes])
+            if failures[0]:
+                failures[0] -= 1
+                raise RuntimeError('handler failed')
+
+    def cursor(self, name):
+        return ChangeCursor.objects.get(handler=name).last_id
+
+    def rename_hotels(self):
+        hotels = list(Hotel.objects.order_by('id')[:3])
+        for hotel in hotels:
+            hotel.name += ' (renovated)'
+            hotel.save()
+        return [hotel.id for hotel in hotels]
+
+    def test_failed_batch_is_delivered_again_and_the_cursor_waits(self):
+        self.handler('flaky', models=['api.hotel'], fail_times=1)
+        ids = self.rename_hotels()
+        with self.assertLogs('api.changefeed', 'ERROR'):
+            self.assertEqual(changefeed.process(), {'flaky': 0})
+        self.assertEqual(self.cursor('flaky'), self.start)
+
+        self.assertEqual(changefeed.process(), {'flaky': 3})
+        self.assertEqual(self.seen['flaky'], [ids, ids])
+        self.assertEqual(self.cursor('flaky'), ChangeLog.objects.filter(model='api.hotel').latest('id').id)
+        self.assertEqual(changefeed.process(), {'flaky': 0})
+
+    def test_batches_resume_where_the_cursor_stopped(self):
+        self.handler('paged', models=['api.hotel'])
+        ids = self.rename_hotels()
+        self.assertEqual(changefeed.run_handler(changefeed.HANDLERS['paged'], batch_size=2, max_batches=1), 2)
+        self.assertEqual(changefeed.run_handler(changefeed.HANDLERS['paged'], batch_size=2), 1)
+        self.assertEqual(self.seen['paged'], [ids[:2], ids[2:]])
+
+    def test_handlers_only_see_their_models_and_fail_independently(self):
+        self.handler('hotels', models=['api.hotel'], fail_times=1)
+        self.handler('transport', models=['api.transport'])
+        ids = self.rename_hotels()
+        self.transport.estimated_price = 45
+        self.transport.save()
+        with self.assertLogs('api.changefeed', 'ERROR'):
+            self.assertEqual(changefeed.process(), {'hotels': 0, 'transport': 1})
+        self.assertEqual(self.seen['transport'], [[self.transport.id]])
+        self.assertEqual(changefeed.process(), {'hotels': 3, 'transport': 0})
+        self.assertEqual(self.seen['hotels'][-1], ids)
+
+    def test_queryset_updates_are_recorded(self):
+        self.handler('bulk', models=['api.destination'])
+        Destination.objects.filter(pk__in=[d.pk for d in self.destinations[:2]]).update(is_active=False)
+        changefeed.process()
+        self.assertEqual(self.seen['bulk'], [[d.pk for d in self.destinations[:2]]])
+        self.assertIn('is_active', ChangeLog.objects.latest('id').changed_fields)
+
+    @override_settings(CHANGEFEED_SETTLE_SECONDS=60)
+    def test_fresh_changes_wait_to_settle(self):
+        self.handler('patient')
+        self.rename_hotels()
+        self.assertEqual(changefeed.process(), {'patient': 0})
+        self.assertEqual(self.cursor('patient'), self.start)
+
+    def test_purge_keeps_changes_a_handler_has_not_read(self):
+        self.handler('reader')
+        self.rename_hotels()
+        read, unread = ChangeLog.objects.filter(id__lte=self.start).count(), ChangeLog.objects.filter(id__gt=self.start).count()
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(changefeed.purge(), read)
+        self.assertEqual(changefeed.purged_through(), self.start)
+        self.assertEqual(ChangeLog.objects.count(), unread)
+
+        changefeed.process()
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(changefeed.purge(), unread)
+        self.assertFalse(ChangeLog.objects.exists())
+
+
+# ==================== PREFERENCE ANALYTICS ====================
+
+class PreferenceAnalyticsTests(CatalogFixtureMixin, TestCase):
+    url = '/api/admin/preferences-tracking/'
+
+    def setUp(self):
+        # One preference per user (one-to-one): the stored row is always the user's newest
+        self.preferences = []
+        for number, (budget, interest, location) in enumerate((
+            ('low', 'beach', 'zanzibar'), ('low', 'wildlife', ' Zanzibar '), ('high', 'beach', ''),
+        )):
+            user = User.objects.create_user(f'analyst{number}', password='secret')
+            self.preferences.append(UserPreference.objects.create(
+                user=user, budget=budget, interest=interest, location=location, num_travelers=number + 1
+            ))
+
+    def analytics(self, **params):
+        response = self.client_for(self.admin).get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_distributions_and_cross_tabs(self):
+        data = self.analytics()
+        self.assertEqual(data['total_preferences'], 3)
+        self.assertEqual(data['budget_distribution'], [{'budget': 'high', 'count': 1}, {'budget': 'low', 'count': 2}])
+        # Free-text locations are grouped case-insensitively; blanks are left out
+        self.assertEqual(data['location_preferences'], [{'location': 'Zanzibar', 'count': 2}])
+        self.assertEqual(data['cross_tabs']['interest_by_budget'], [
+            {'interest': 'beach', 'budget': 'high', 'count': 1},
+            {'interest': 'beach', 'budget': 'low', 'count': 1},
+            {'interest': 'wildlife', 'budget': 'low', 'count': 1},
+        ])
+
+    def test_changed_preference_moves_the_user_between_groups(self):
+        self.assertEqual(self.analytics()['budget_distribution'][0], {'budget': 'high', 'count': 1})
+        preference = self.preferences[0]
+        preference.budget = 'high'
+        preference.save()
+        data = self.analytics()
+        self.assertEqual(data['total_preferences'], 3)
+        self.assertEqual(data['budget_distribution'], [{'budget': 'high', 'count': 2}, {'budget': 'low', 'count': 1}])
+
+        UserPreference.objects.filter(pk=self.preferences[1].pk).update(interest='culture')
+        self.assertIn({'interest': 'culture', 'count': 1}, self.analytics()['interest_distribution'])
+        self.preferences[2].delete()
+        self.assertEqual(self.analytics()['total_preferences'], 2)
+
+    def test_date_range(self):
+        UserPreference.objects.filter(pk=self.preferences[0].pk).update(
+            created_at=timezone.now() - timedelta(days=40)
+        )
+        since = (date.today() - timedelta(days=7)).isoformat()
+        self.assertEqual(self.analytics(since=since)['total_preferences'], 2)
+        self.assertEqual(self.analytics(until=since)['total_preferences'], 1)
+        response = self.client_for(self.admin).get(self.url, {'since': 'last week'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_result_needs_no_grouped_query(self):
+        self.analytics()
+        with CaptureQueriesContext(connection) as queries:
+            self.analytics()
+        self.assertFalse([query for query in queries if 'GROUP BY' in query['sql']])
+
+
+# ==================== ROW COUNTS ====================
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=100)
+class EstimatedCountTests(CatalogFixtureMixin, TestCase):
+
+    def estimate(self, rows):
+        return mock.patch('api.counting.table_estimate', return_value=rows)
+
+    def test_small_or_unknown_tables_are_counted_exactly(self):
+        self.assertIsNone(counting.table_estimate(Destination))  # No statistics on SQLite
+        for rows in (None, 99):
+            with self.estimate(rows):
+                self.assertEqual(counting.fast_count(Hotel.objects.all()), 6)
+
+    def test_large_unfiltered_tables_use_the_estimate_without_counting(self):
+        with self.estimate(5000), self.assertNumQueries(0):
+            self.assertEqual(counting.fast_count(Hotel.objects.all()), 5000)
+            # The live manager's own archived_at filter does not count as filtering
+            self.assertEqual(counting.fast_count(Destination.objects.all()), 5000)
+
+    def test_large_filtered_tables_get_a_cached_exact_count(self):
+        with self.estimate(5000):
+            self.assertEqual(counting.fast_count(Hotel.objects.filter(stars=4)), 3)
+            Hotel.objects.filter(stars=4).first().delete()
+            # Reused for COUNT_TIMEOUT seconds, even after a delete
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(counting.fast_count(Hotel.objects.filter(stars=4)), 3)
+            self.assertFalse([query for query in queries if 'COUNT' in query['sql']])
+            self.assertEqual(counting.fast_count(Hotel.objects.filter(stars=2)), 3)
+            self.assertEqual(counting.fast_count(Destination.objects.values('country').distinct()), 1)
+
+    def test_paginator_and_api_pages(self):
+        self.assertEqual(counting.EstimatedCountPaginator([1, 2, 3], 2).count, 3)
+        with self.estimate(5000):
+            self.assertEqual(counting.EstimatedCountPaginator(Hotel.objects.order_by('id'), 2).num_pages, 2500)
+            response = self.client_for().get('/api/hotels/')
+        self.assertEqual(response.json()['count'], 5000)
+        self.assertEqual(len(response.json()['results']), 6)
+        self.assertEqual(self.client_for().get('/api/hotels/').json()['count'], 6)
+
+
+# ==================== DESTINATION IMAGES ====================
+
+class DestinationGalleryTests(CatalogFixtureMixin, TestCase):
+
+    def add_image(self, destination, name, is_primary=False):
+        return DestinationImage.objects.create(
+            destination=destination, image_url=f'https://img.example.com/{name}.jpg', is_primary=is_primary
+        )
+
+    def primary_url(self, destination):
+        return Destination.objects.values_list('primary_image_url', flat=True).get(pk=destination.pk)
+
+    def test_gallery_groups_images_by_destination_in_one_query(self):
+        first, second, inactive = self.destinations
+        older = self.add_image(first, 'older')
+        primary = self.add_image(first, 'primary', is_primary=True)
+        other = self.add_image(second, 'other')
+        self.add_image(inactive, 'hidden')
+        Destination.objects.filter(pk=inactive.pk).update(is_active=False)
+
+        with self.assertNumQueries(1):
+            response = self.client_for().get(
+                '/api/destinations/gallery/', {'ids': f'{first.id},{second.id},{inactive.id},x,999999'}
+            )
+        galleries = response.json()['galleries']
+        self.assertEqual(list(galleries), [str(first.id), str(second.id), str(inactive.id), '999999'])
+        self.assertEqual([image['id'] for image in galleries[str(first.id)]], [primary.id, older.id])
+        self.assertEqual([image['id'] for image in galleries[str(second.id)]], [other.id])
+        self.assertEqual(galleries[str(inactive.id)], [])
+        self.assertEqual(self.client_for().get('/api/destinations/gallery/', {'ids': 'x'}).status_code, 400)
+
+    def test_primary_image_follows_image_changes(self):
+        destination = self.destinations[0]
+        older = self.add_image(destination, 'older')
+        self.assertEqual(self.primary_url(destination), older.image_url)
+        primary = self.add_image(destination, 'primary', is_primary=True)
+        self.assertEqual(self.primary_url(destination), primary.image_url)
+
+        primary.delete()
+        self.assertEqual(self.primary_url(destination), older.image_url)
+        older.delete()
+        self.assertEqual(self.primary_url(destination), '')
+
+    def test_lists_render_cards_and_retrieve_the_gallery(self):
+        destination = self.destinations[0]
+        self.add_image(destination, 'primary', is_primary=True)
+        row = self.client_for().get('/api/destinations/').json()['results'][0]
+        self.assertNotIn('images', row)
+        self.assertEqual(row['primary_image_url'], 'https://img.example.com/primary.jpg')
+        detail = self.client_for().get(f'/api/destinations/{destination.id}/').json()
+        self.assertEqual([image['image_url'] for image in detail['images']], [row['primary_image_url']])
+
+
+# ==================== TRIP OPTIMIZER ====================
+
+class TripOptimizerTests(CatalogFixtureMixin, TestCase):
+
+    def optimize(self, budget, origin=None, limit=10):
+        optimizer = TripOptimizer(budget=budget, nights=2, num_travelers=1, origin=origin, limit=limit)
+        return optimizer.optimize(Destination.objects.order_by('id'))
+
+    def test_plans_are_ranked_by_stars_then_cost(self):
+        plans = self.optimize(1000)
+        self.assertEqual([plan['stars'] for plan in plans], [4, 4, 4, 2, 2, 2])
+        totals = [plan['total_cost'] for plan in plans[:3]]
+        self.assertEqual(totals, sorted(totals))
+
+    def test_budget_prunes_hotels_and_routes(self):
+        # Hotels cost 160 (2 stars) or 320 (4 stars) for two nights; the train is 40
+        plans = self.optimize(200, origin='Dar es Salaam')
+        self.assertEqual(len(plans), 1)
+        self.assertEqual((plans[0]['destination_id'], plans[0]['stars']), (self.destinations[0].pk, 2))
+        self.assertEqual(plans[0]['total_cost'], Decimal('200.00'))
+        self.assertEqual(plans[0]['remaining_budget'], Decimal('0.00'))
+        self.assertEqual(self.optimize(199, origin='Dar es Salaam'), [])
+
+    def test_origin_skips_destinations_without_a_route(self):
+        plans = self.optimize(1000, origin='Dar es Salaam')
+        self.assertEqual({plan['destination_id'] for plan in plans}, {self.destinations[0].pk})
+        self.assertTrue(all(plan['transport_id'] == self.transport.pk for plan in plans))
+
+    def test_without_origin_unrouted_destinations_have_no_transport_cost(self):
+        plans = self.optimize(1000)
+        unrouted = [plan for plan in plans if plan['destination_id'] != self.destinations[0].pk]
+        self.assertEqual(len(unrouted), 4)
+        self.assertTrue(all(plan['transport_id'] is None and plan['transport_cost'] == 0 for plan in unrouted))
+
+
+# ==================== POPULARITY COUNTERS ====================
+
+class PopularityCounterTests(CatalogFixtureMixin, TestCase):
+
+    def total_plans(self, destination):
+        return DestinationPopularity.objects.get(destination=destination).total_plans
+
+    def test_loading_plans_with_deferred_destination_runs_no_extra_queries(self):
+        with self.assertNumQueries(1):
+            plans = list(TravelPlan.objects.only('id', 'budget'))
+        self.assertEqual(len(plans), 5)
+
+    def test_saving_plan_with_deferred_destination_keeps_counts(self):
+        before = [self.total_plans(destination) for destination in self.destinations]
+        plan = TravelPlan.objects.only('id', 'budget').get(pk=self.plans[0].pk)
+        plan.budget = 900
+        plan.save()
+        self.assertEqual([self.total_plans(destination) for destination in self.destinations], before)
+
+    def test_moving_plan_loaded_without_destination_moves_the_count(self):
+        old, new = self.destinations[0], self.destinations[2]
+        before_old, before_new = self.total_plans(old), self.total_plans(new)
+        plan = TravelPlan.objects.only('id').get(pk=self.plans[0].pk)
+        plan.destination = new
+        plan.save()
+        self.assertEqual(self.total_plans(old), before_old - 1)
+        self.assertEqual(self.total_plans(new), before_new + 1)
+
+
+    def test_trending_sums_the_window_without_writing(self):
+        destination = self.destinations[0]
+        # Stale precomputed windows and an old rollup day outside the 7 day window
+        DestinationPopularity.objects.update(plans_7d=0, plans_30d=0, window_date=date.today() - timedelta(days=3))
+        DestinationDailyPlans.objects.create(destination=destination, day=date.today() - timedelta(days=10), count=4)
+        client = self.client_for()
+        with CaptureQueriesContext(connection) as queries:
+            week = client.get('/api/destinations/trending/').json()
+        self.assertFalse([query for query in queries if not query['sql'].startswith('SELECT')])
+        month = client.get('/api/destinations/trending/', {'window': 30}).json()
+        plans = {row['id']: row['popularity']['plans'] for row in week['trending']}
+        self.assertEqual(plans, {destination.pk: 2, self.destinations[1].pk: 2, self.destinations[2].pk: 1})
+        plans = {row['id']: row['popularity']['plans'] for row in month['trending']}
+        self.assertEqual(plans[destination.pk], 6)
+        self.assertEqual(week['trending'][0]['id'], destination.pk)
+
+# ==================== DESTINATION AGGREGATES ====================
+
+class DestinationAggregateTests(CatalogFixtureMixin, TestCase):
+
+    def test_loading_hotels_and_transport_with_deferred_destination_runs_no_extra_queries(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(len(Hotel.objects.only('id', 'name')), 6)
+            self.assertEqual(len(Transport.objects.only('id', 'origin')), 1)
+
+    def test_price_change_on_sparse_hotel_refreshes_its_destination(self):
+        hotel = Hotel.objects.only('id', 'price_per_night').get(name='Hotel 0-2')
+        hotel.price_per_night = 10
+        hotel.save()
+        self.destinations[0].refresh_from_db()
+        self.assertEqual(self.destinations[0].hotel_price_min, 10)
+
+    def test_moving_sparse_hotel_refreshes_both_destinations(self):
+        old, new = self.destinations[0], self.destinations[1]
+        hotel = Hotel.objects.only('id').get(name='Hotel 0-4')
+        hotel.destination = new
+        hotel.save()
+        old.refresh_from_db()
+        new.refresh_from_db()
+        self.assertEqual((old.hotel_count, old.hotel_stars_max), (1, 2))
+        self.assertEqual((new.hotel_count, new.hotel_stars_max), (3, 4))
+
+    def test_moving_sparse_transport_refreshes_both_destinations(self):
+        transport = Transport.objects.only('id').get(pk=self.transport.pk)
+        transport.destination = 'City 1'
+        transport.save()
+        counts = dict(Destination.objects.values_list('city', 'route_count'))
+        self.assertEqual((counts['City 0'], counts['City 1']), (0, 1))
+
+
+# ==================== SOFT DELETE ====================
+
+class ArchivalTests(CatalogFixtureMixin, TestCase):
+    changelist = '/admin/api/destination/'
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.destination = self.destinations[2]
+
+    def run_action(self, url, action, objects):
+        return self.client.post(url, {'action': action, '_selected_action': [obj.pk for obj in objects]})
+
+    def test_admin_archives_lists_and_restores_with_cascaded_hotels(self):
+        earlier, cascaded = self.destination.hotels.order_by('stars')
+        earlier.archive()
+        self.run_action(self.changelist, 'archive_destinations', [self.destination])
+        archival.archive_hotels_of([self.destination.pk])
+        self.assertFalse(Destination.objects.filter(pk=self.destination.pk).exists())
+        self.assertFalse(Hotel.objects.filter(destination=self.destination).exists())
+
+        response = self.client.get(self.changelist, {'archived': 'archived'})
+        self.assertEqual([row.pk for row in response.context['cl'].result_list], [self.destination.pk])
+        live = self.client.get(self.changelist, {'archived': 'live'}).context['cl'].result_list
+        self.assertNotIn(self.destination.pk, [row.pk for row in live])
+
+        response = self.run_action(self.changelist, 'restore_archived', [self.destination])
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Destination.objects.filter(pk=self.destination.pk).exists())
+        self.assertEqual(list(Hotel.objects.filter(destination=self.destination)), [cascaded])
+        self.assertEqual(archival.restore(Hotel.all_objects.filter(pk=earlier.pk)), 1)
+
+    def test_archived_hotel_opens_in_admin(self):
+        hotel = self.destination.hotels.first()
+        hotel.archive()
+        self.assertEqual(self.client.get(f'/admin/api/hotel/{hotel.pk}/change/').status_code, 200)
+
+    def test_bulk_status_counts_only_changed_rows(self):
+        client = self.client_for(self.admin)
+        url = '/api/admin/destinations/bulk-status/'
+        ids = [destination.pk for destination in self.destinations]
+        response = client.post(url, {'ids': ids[:2], 'is_active': False}, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        response = client.post(url, {'ids': ids[:2], 'is_active': False}, format='json')
+        self.assertEqual(response.data['updated'], 0)
+        response = client.post(url, {'ids': ids, 'is_active': True}, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(Destination.objects.filter(is_active=True).count(), 3)
+
+    def test_bulk_status_rejects_bad_bodies(self):
+        client = self.client_for(self.admin)
+        response = client.post('/api/admin/destinations/bulk-status/', {'ids': 3, 'is_active': 'yes'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+# ==================== TRIP ARCHIVE ====================
+
+class TripArchiveTests(CatalogFixtureMixin, TestCase):
+
+    def setUp(self):
+        # Two plans that returned long ago, one with a budget beyond 10 digits
+        self.old_plans = []
+        for days_ago, budget in ((800, 1500), (700, Decimal('123456789012.50'))):
+            travel_date = date.today() - timedelta(days=days_ago)
+            plan = TravelPlan.objects.create(
+                user=self.user, destination=self.destinations[1], hotel=self.destinations[1].hotels.first(),
+                transport=self.transport, travel_date=travel_date, return_date=travel_date + timedelta(days=4),
+                budget=budget, num_travelers=3, notes='Archived trip'
+            )
+            Itinerary.objects.create(travel_plan=plan, day_number=1, activities='Safari')
+            self.old_plans.append(plan)
+
+    def test_archive_round_trip(self):
+        client = self.client_for(self.user)
+        before = client.get('/api/dashboard/past-trips/?limit=100').json()
+        popularity = DestinationPopularity.objects.get(destination=self.destinations[1]).total_plans
+
+        self.assertEqual(trip_archive.archive_past_plans(days=365), 2)
+
+        self.assertFalse(TravelPlan.objects.filter(pk__in=[plan.pk for plan in self.old_plans]).exists())
+        self.assertFalse(Itinerary.objects.filter(travel_plan_id__in=[plan.pk for plan in self.old_plans]).exists())
+        archived = ArchivedTravelPlan.objects.get(pk=self.old_plans[1].pk)
+        self.assertEqual(archived.budget, Decimal('123456789012.50'))
+        self.assertTrue(archived.has_itinerary)
+
+        after = client.get('/api/dashboard/past-trips/?limit=100').json()
+        self.assertEqual(after['count'], before['count'])
+        self.assertEqual([trip['id'] for trip in after['trips']], [trip['id'] for trip in before['trips']])
+        for old, new in zip(before['trips'], after['trips']):
+            if new.get('archived'):
+                self.assertEqual({**old, 'archived': True}, new)
+        self.assertEqual(DestinationPopularity.objects.get(destination=self.destinations[1]).total_plans, popularity)
+
+    def test_dashboard_recent_destinations_include_archived_trips(self):
+        client = self.client_for(self.user)
+        before = client.get('/api/dashboard/bundle/').json()['stats']
+        self.assertEqual(
+            before['recent_destinations'], ['Destination 1', 'Destination 0', 'Destination 1', 'Destination 1']
+        )
+
+        trip_archive.archive_past_plans(days=365)
+
+        after = client.get('/api/dashboard/bundle/').json()['stats']
+        self.assertEqual(after['recent_destinations'], before['recent_destinations'])
+        self.assertEqual(after['statistics'], before['statistics'])
+
+    def test_recent_plans_stay_hot(self):
+        trip_archive.archive_past_plans(days=365)
+        self.assertEqual(TravelPlan.objects.filter(user=self.user).count(), len(self.plans))
+
+
+# ==================== DATA EXPORT ====================
+
+class DataExportTests(CatalogFixtureMixin, TestCase):
+    members = [
+        'profile.json', 'preferences.json', 'travel_plans.json', 'archived_travel_plans.json', 'travel_plans.csv',
+        'destinations.json', 'hotels.json', 'transports.json',
+    ]
+
+    def download(self, url='/api/auth/export/', user=None):
+        response = self.client_for(user or self.user).get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        return response, archive
+
+    def read_json(self, archive, name):
+        return json.loads(archive.read(name).decode())
+
+    def test_member_names_and_contents(self):
+        plan = self.plans[0]
+        plan.notes = 'Safari & café ☕'
+        plan.save()
+        response, archive = self.download()
+        self.assertIn('traveller-export-', response['Content-Disposition'])
+        self.assertEqual(archive.namelist(), self.members)
+
+        self.assertEqual(self.read_json(archive, 'profile.json')['username'], 'traveller')
+        self.assertIsNone(self.read_json(archive, 'preferences.json'))
+        plans = self.read_json(archive, 'travel_plans.json')
+        self.assertEqual([row['id'] for row in plans], [plan.id for plan in self.plans])
+        self.assertEqual(plans[0]['notes'], 'Safari & café ☕')
+        self.assertEqual(plans[0]['itinerary']['activities'], 'Beach day')
+        self.assertEqual(self.read_json(archive, 'archived_travel_plans.json'), [])
+
+        rows = list(csv.reader(io.StringIO(archive.read('travel_plans.csv').decode())))
+        self.assertEqual(rows[0], export.CSV_FIELDS)
+        self.assertEqual([row[0] for row in rows[1:]], [str(plan.id) for plan in self.plans])
+        # Only what the plans reference
+        self.assertEqual([row['id'] for row in self.read_json(archive, 'destinations.json')],
+                         [destination.id for destination in self.destinations])
+        self.assertEqual(self.read_json(archive, 'hotels.json'), [])
+        self.assertEqual([row['id'] for row in self.read_json(archive, 'transports.json')], [self.transport.id])
+
+    def test_archived_plans_and_catalog_rows_are_included(self):
+        travel_date = date.today() - timedelta(days=800)
+        old = TravelPlan.objects.create(
+            user=self.user, destination=self.destinations[2], hotel=self.destinations[2].hotels.first(),
+            travel_date=travel_date, return_date=travel_date + timedelta(days=2), budget=900, num_travelers=1
+        )
+        trip_archive.archive_past_plans(days=365)
+        self.destinations[2].archive()
+
+        _, archive = self.download()
+        self.assertEqual([row['id'] for row in self.read_json(archive, 'archived_travel_plans.json')], [old.id])
+        rows = list(csv.DictReader(io.StringIO(archive.read('travel_plans.csv').decode())))
+        self.assertEqual([row['id'] for row in rows if row['archived'] == 'True'], [str(old.id)])
+        self.assertIn(self.destinations[2].id, [row['id'] for row in self.read_json(archive, 'destinations.json')])
+
+    def test_admin_export_of_another_user(self):
+        _, archive = self.download(f'/api/admin/users/{self.user.id}/export/', user=self.admin)
+        self.assertEqual(self.read_json(archive, 'profile.json')['id'], self.user.id)
+        self.assertEqual(self.client_for(self.user).get(f'/api/admin/users/{self.admin.id}/export/').status_code, 403)
+        self.assertEqual(self.client_for().get('/api/auth/export/').status_code, 401)
+
+
+# ==================== RATE LIMITING ====================
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'recommendations': '3/min'}
+})
+class TokenBucketThrottleTests(CatalogFixtureMixin, TestCase):
+    url = '/api/destinations/recommended/'
+
+    def get_at(self, client, moment):
+        # Replace the module reference only: patching time.time would also move the cache's expiry clock
+        with mock.patch('api.throttling.time') as clock:
+            clock.time.return_value = moment
+            return client.get(self.url)
+
+    def test_burst_then_refill(self):
+        client = self.client_for()
+        start = 1_700_000_000.0
+        self.assertEqual([self.get_at(client, start).status_code for _ in range(3)], [200, 200, 200])
+        response = self.get_at(client, start + 1)
+        self.assertEqual(response.status_code, 429)
+        # 0.95 tokens short at 0.05 per second, rounded up
+        self.assertIn(int(response['Retry-After']), (19, 20))
+        # One token every 20 seconds
+        self.assertEqual(self.get_at(client, start + 21).status_code, 200)
+        self.assertEqual(self.get_at(client, start + 22).status_code, 429)
+        # Idle for a full period: the bucket is full again, never fuller
+        statuses = [self.get_at(client, start + 200).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_clients_have_separate_buckets(self):
+        start = 1_700_000_000.0
+        for _ in range(3):
+            self.get_at(self.client_for(), start)
+        self.assertEqual(self.get_at(self.client_for(), start).status_code, 429)
+        self.assertEqual(self.get_at(self.client_for(self.user), start).status_code, 200)
+
+
+# ==================== RECOMMENDATIONS ====================
+
+class RecommendationPageTests(CatalogFixtureMixin, TestCase):
+
+    def test_count_is_the_total_not_the_page_length(self):
+        response = self.client_for().get('/api/destinations/recommended/', {'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['recommendations']), 1)
+        self.assertEqual(response.data['count'], 3)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_hotel_count_with_keyset_pages(self):
+        response = self.client_for().get(
+            '/api/hotels/recommended/', {'destination_id': self.destinations[0].id, 'sort': 'price', 'limit': 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['recommendations']), 1)
+        self.assertEqual(response.data['count'], 2)
+
+
+class TransportRecommendationTests(CatalogFixtureMixin, TestCase):
+    url = '/api/transports/recommended/'
+
+    def setUp(self):
+        self.bus = Transport.objects.create(
+            origin='Dar es Salaam', destination='City 0', transport_type='bus', distance_km=180,
+            estimated_price=60, duration_hours=4, availability='daily'
+        )
+
+    def locate(self):
+        # About 157 km apart: a bus distance by the straight-line rule
+        Destination.objects.create(
+            name='Dar es Salaam', country='Tanzania', city='Dar es Salaam', description='Port city',
+            category='city', best_season='June - October', avg_temperature='25-30°C', budget_level='medium',
+            latitude=-6.79, longitude=39.21
+        )
+        Destination.objects.filter(pk=self.destinations[0].pk).update(latitude=-5.38, longitude=39.24)
+
+    def ids(self, **params):
+        response = self.client_for().get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [transport['id'] for transport in response.data['recommendations']]
+
+    def test_route_keeps_every_mode_and_ranks_the_suggested_one_first(self):
+        self.locate()
+        self.assertEqual(self.ids(origin='Dar es Salaam', destination='City 0'), [self.bus.id, self.transport.id])
+
+    def test_route_without_coordinates_is_cheapest_first(self):
+        self.assertEqual(self.ids(origin='Dar es Salaam', destination='City 0'), [self.transport.id, self.bus.id])
+
+    def test_distance_alone_matches_the_mode_and_distance_band(self):
+        self.assertEqual(self.ids(distance_km=480), [self.transport.id])
+        self.assertEqual(self.ids(distance_km=150), [self.bus.id])
+
+
+# ==================== REQUEST COALESCING ====================
+
+class RequestKeyTests(CatalogFixtureMixin, TestCase):
+
+    def key_for(self, user, personalized):
+        request = APIRequestFactory().get('/api/destinations/recommended/', {'blend': 'true'})
+        force_authenticate(request, user)
+        return request_key(Request(request), 'destinations', personalized=personalized)
+
+    def test_shared_requests_key_on_path_and_query_only(self):
+        self.assertEqual(self.key_for(self.user, False), self.key_for(self.admin, False))
+
+    def test_personalized_requests_are_not_shared_between_users(self):
+        self.assertNotEqual(self.key_for(self.user, True), self.key_for(self.admin, True))
+        self.assertEqual(self.key_for(self.user, True), self.key_for(self.user, True))
+
+
+# ==================== DASHBOARD BUNDLE ====================
+
+@override_settings(COMPRESSION_MIN_SIZE=0)
+class DashboardBundleTests(CatalogFixtureMixin, TestCase):
+    url = '/api/dashboard/bundle/'
+
+    def test_gzip_etag_sent_back_gets_304(self):
+        client = self.client_for(self.user)
+        response = client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/'))
+        response = client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_strong_and_wildcard_etags_match(self):
+        client = self.client_for(self.user)
+        etag = client.get(self.url)['ETag'].removeprefix('W/')
+        for if_none_match in (etag, f'"other", {etag}', '*'):
+            response = client.get(self.url, HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, 304, if_none_match)
+
+    def test_plan_change_invalidates_the_etag(self):
+        client = self.client_for(self.user)
+        etag = client.get(self.url)['ETag']
+        plan = self.plans[0]
+        plan.budget = 2500
+        plan.save()
+        self.assertEqual(client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_catalog_change_invalidates_the_etag_before_the_change_feed_runs(self):
+        client = self.client_for(self.user)
+        etag = client.get(self.url)['ETag']
+        destination = self.destinations[1]
+        destination.name = 'Renamed'
+        destination.save()
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed', response.json()['stats']['recent_destinations'])
+
+
+# ==================== CATALOG SYNC ====================
+
+@override_settings(CHANGEFEED_SETTLE_SECONDS=0)
+class CatalogSyncTests(CatalogFixtureMixin, TestCase):
+    url = '/api/catalog/changes/'
+
+    def sync(self, **params):
+        response = self.client_for().get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_updates_and_tombstones_since_a_token(self):
+        token = self.sync()['token']
+        kept = Hotel.objects.filter(destination=self.destinations[0]).earliest('id')
+        deleted, archived = Hotel.objects.filter(destination=self.destinations[1]).order_by('id')
+        kept.price_per_night = 95
+        kept.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        archived.archive()
+        Destination.objects.filter(pk=self.destinations[2].pk).update(is_active=False)
+
+        changes = self.sync(since=token)
+        self.assertEqual([row['id'] for row in changes['hotels']['updated']], [kept.id])
+        self.assertEqual(changes['hotels']['updated'][0]['price_per_night'], '95.00')
+        self.assertEqual(changes['hotels']['deleted'], sorted([deleted_id, archived.id]))
+        self.assertEqual(changes['destinations']['deleted'], [self.destinations[2].id])
+        self.assertEqual(changes['transports'], {'updated': [], 'deleted': []})
+        self.assertFalse(changes['has_more'])
+
+        # The returned token continues exactly where this sync stopped
+        self.assertEqual(self.sync(since=changes['token']), {
+            'token': changes['token'], 'has_more': False,
+            'destinations': {'updated': [], 'deleted': []},
+            'hotels': {'updated': [], 'deleted': []},
+            'transports': {'updated': [], 'deleted': []},
+        })
+        self.assertEqual(self.sync()['token'], changes['token'])
+
+    def test_limited_pages_cover_every_change(self):
+        token = self.sync()['token']
+        for hotel in Hotel.objects.order_by('id'):
+            hotel.name += ' (renovated)'
+            hotel.save()
+        updated = set()
+        while True:
+            changes = self.sync(since=token, limit=2)
+            updated |= {row['id'] for row in changes['hotels']['updated']}
+            self.assertGreater(int(changes['token']), int(token))
+            token = changes['token']
+            if not changes['has_more']:
+                break
+        self.assertEqual(updated, set(Hotel.objects.values_list('id', flat=True)))
+
+    def test_bad_and_expired_tokens(self):
+        self.assertEqual(self.client_for().get(self.url, {'since': 'abc'}).status_code, 400)
+        token = self.sync()['token']
+        ChangeCursor.objects.create(handler=changefeed.PURGED_CURSOR, last_id=int(token) + 10)
+        response = self.client_for().get(self.url, {'since': token})
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()['reset'])
+        self.assertEqual(response.json()['token'], str(int(token) + 10))
+
+    @override_settings(CHANGEFEED_SETTLE_SECONDS=60)
+    def test_unsettled_changes_wait(self):
+        token = self.sync()['token']
+        self.transport.estimated_price = 50
+        self.transport.save()
+        self.assertEqual(self.sync()['token'], token)
+        self.assertEqual(self.sync(since=token)['transports']['updated'], [])
+
+
+# ==================== CATALOG SNAPSHOTS ====================
+
+class CatalogSnapshotTests(CatalogFixtureMixin, TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(CATALOG_SNAPSHOT_DIR=directory.name, CATALOG_SNAPSHOT_URL='/catalog/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_manifest_describes_the_written_files(self):
+        manifest = snapshots.build_snapshot()
+        self.assertEqual(manifest['counts'], {'destinations': 3, 'hotels': 6, 'transports': 1})
+        self.assertEqual(json.loads((self.directory / 'manifest.json').read_bytes()), manifest)
+
+        name = f'catalog.{manifest["version"]}.json'
+        self.assertEqual(manifest['files']['json']['url'], f'/catalog/{name}')
+        data = (self.directory / name).read_bytes()
+        self.assertEqual(manifest['files']['json']['sha256'], hashlib.sha256(data).hexdigest())
+        self.assertEqual(gzip.decompress((self.directory / f'{name}.gz').read_bytes()), data)
+        document = json.loads(data)
+        self.assertEqual([row['id'] for row in document['destinations']], [d.id for d in self.destinations])
+
+        response = self.client_for().get('/api/catalog/manifest/')
+        self.assertEqual(response.json(), manifest)
+
+    def test_unchanged_catalog_keeps_its_version(self):
+        first = snapshots.build_snapshot()
+        files = sorted(path.name for path in self.directory.iterdir())
+        self.assertEqual(snapshots.build_snapshot()['version'], first['version'])
+        self.assertEqual(sorted(path.name for path in self.directory.iterdir()), files)
+
+        Destination.objects.filter(pk=self.destinations[0].pk).update(name='Renamed')
+        second = snapshots.build_snapshot()
+        self.assertNotEqual(second['version'], first['version'])
+        # The previous version stays readable for clients holding the old manifest
+        self.assertTrue((self.directory / f'catalog.{first["version"]}.json').exists())
+
+    def test_failed_write_leaves_the_old_file_and_no_temporary(self):
+        manifest = snapshots.build_snapshot()
+        path = self.directory / 'manifest.json'
+        before = path.read_bytes()
+        with mock.patch('api.snapshots.os.fsync', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                snapshots.write_atomic(path, b'{"partial"')
+        self.assertEqual(path.read_bytes(), before)
+        self.assertEqual(json.loads(before)['version'], manifest['version'])
+        self.assertEqual(list(self.directory.glob('.tmp-*')), [])
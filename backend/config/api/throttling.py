@@ -0,0 +1,110 @@
+import time
+
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token-bucket rate limiting per client.
+    The bucket holds up to `num_requests` tokens and refills continuously at
+    num_requests / duration tokens per second, so short bursts are allowed
+    while the sustained rate stays at the configured limit.
+    Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][scope]
+    using DRF's "<num>/<sec|min|hour|day>" syntax.
+    Clients are keyed by auth token (or user id) if authenticated, else by IP.
+    
+    Bucket state lives in the `cache_alias` cache, shared by all workers and
+    hosts: the wall-clock time the bucket was last full (epoch) and the
+    tokens used since then, so tokens = num_requests + elapsed * rate - used.
+    Requests take a token with an atomic cache.incr, so concurrent workers
+    cannot overspend it on backends with atomic incr (Redis, local memory).
+    On the database cache incr is a read then a write and the limit is
+    approximate under concurrency.
+    """
+    scope = None
+    cache_alias = 'default'
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+    
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        self.num_requests, self.duration = self.parse_rate(rate)
+        self.cache = caches[self.cache_alias]
+        self.tokens = None
+    
+    def parse_rate(self, rate):
+        """
+        Given the request rate string, return a two tuple of:
+        <allowed number of requests>, <period of time in seconds>
+        """
+        if rate is None:
+            return None, None
+        num, period = rate.split('/')
+        duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+        return int(num), duration
+    
+    def get_cache_key(self, request, view):
+        if request.auth is not None:
+            ident = getattr(request.auth, 'key', request.auth)
+        elif request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+    
+    @property
+    def refill_rate(self):
+        """Tokens added per second"""
+        return self.num_requests / self.duration
+    
+    def allow_request(self, request, view):
+        if self.num_requests is None:
+            return True
+        
+        key = self.get_cache_key(request, view)
+        epoch_key, used_key = f'{key}:epoch', f'{key}:used'
+        # Wall clock, not monotonic: the bucket is compared across processes and hosts
+        now = time.time()
+        
+        state = self.cache.get_many([epoch_key, used_key])
+        epoch = state.get(epoch_key)
+        if epoch is None or (now - epoch) * self.refill_rate >= state.get(used_key, 0):
+            # New or refilled completely: count from a full bucket (a concurrent reset
+            # of a full bucket can at worst forget a token taken at the same moment)
+            epoch = now
+            self.cache.set_many({epoch_key: epoch, used_key: 0}, self.duration)
+        
+        try:
+            used = self.cache.incr(used_key)
+        except ValueError:
+            # Expired in between
+            self.cache.set(used_key, 1, self.duration)
+            used = 1
+        tokens = self.num_requests + (now - epoch) * self.refill_rate - used
+        allowed = tokens >= 0
+        if allowed:
+            # Keep the bucket until it would have refilled completely
+            self.cache.touch(epoch_key, self.duration)
+            self.cache.touch(used_key, self.duration)
+        else:
+            # Give the token back: rejected requests do not drain the bucket further
+            try:
+                self.cache.decr(used_key)
+            except ValueError:
+                pass
+            tokens += 1
+        
+        self.tokens = tokens
+        return allowed
+    
+    def wait(self):
+        """Seconds until the next token is available"""
+        if self.tokens is None or self.tokens >= 1:
+            return None
+        return (1 - self.tokens) / self.refill_rate
+
+
+class RecommendationRateThrottle(TokenBucketThrottle):
+    """Limits the public `recommended` actions"""
+    scope = 'recommendations'
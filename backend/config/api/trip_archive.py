@@ -0,0 +1,145 @@
+"""
+Archival of past travel plans.
+Plans whose return_date is more than TRAVEL_PLAN_ARCHIVE_DAYS in the past
+are moved, chunk by chunk, from TravelPlan/Itinerary into
+ArchivedTravelPlan: a few summary columns for statistics plus the fully
+serialized plan (destination, hotel, transport, itinerary) as compressed
+JSON. The hot tables then only hold recent and upcoming plans.
+
+The past trips endpoint reads both: it merges the (return_date, id) keys of
+hot and archived past trips, and only loads and decompresses the rows of the
+requested page.
+"""
+import heapq
+import json
+import zlib
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from api import dashboard
+from api.archival import in_chunks
+from api.models import ArchivedTravelPlan, ChangeLog, Itinerary, TravelPlan
+from api.serializers import TravelPlanSerializer
+
+CHUNK_SIZE = 500
+
+
+def archive_horizon():
+    return getattr(settings, 'TRAVEL_PLAN_ARCHIVE_DAYS', 365)
+
+
+def compress(data):
+    return zlib.compress(json.dumps(data, cls=DjangoJSONEncoder).encode())
+
+
+def decompress(payload):
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+def archived_row(plan, data):
+    return ArchivedTravelPlan(
+        id=plan.id,
+        user_id=plan.user_id,
+        destination_id=plan.destination_id,
+        destination_name=plan.destination.name if plan.destination else '',
+        travel_date=plan.travel_date,
+        return_date=plan.return_date,
+        budget=plan.budget,
+        num_travelers=plan.num_travelers,
+        has_itinerary=data.get('itinerary') is not None,
+        created_at=plan.created_at,
+        payload=compress(data)
+    )
+
+
+def archive_past_plans(days=None, chunk_size=CHUNK_SIZE):
+    """Move plans that returned more than `days` days ago; returns plans archived"""
+    cutoff = timezone.localdate() - timedelta(days=archive_horizon() if days is None else days)
+    plans = TravelPlan.objects.filter(return_date__lt=cutoff).order_by('return_date', 'id')
+    archived = 0
+    for ids in in_chunks(plans, chunk_size):
+        batch = list(TravelPlanSerializer.setup_queryset(TravelPlan.objects.filter(pk__in=ids)))
+        data = TravelPlanSerializer(batch, many=True).data
+        with transaction.atomic():
+            ArchivedTravelPlan.objects.bulk_create(
+                [archived_row(plan, plan_data) for plan, plan_data in zip(batch, data)]
+            )
+            # Raw deletes skip the post_delete receivers on purpose: an archived
+            # plan still counts towards destination popularity
+            Itinerary.objects.filter(travel_plan_id__in=ids)._raw_delete(Itinerary.objects.db)
+            TravelPlan.objects.filter(pk__in=ids)._raw_delete(TravelPlan.objects.db)
+            ChangeLog.record_many(TravelPlan, ids, ChangeLog.DELETE)
+        for user_id in {plan.user_id for plan in batch}:
+            dashboard.invalidate(user_id)
+        archived += len(ids)
+    return archived
+
+
+# ==================== ARCHIVE READER ====================
+
+def past_trip_keys(user, today, limit):
+    """Newest `limit` (return_date, id, archived) keys of hot and archived past trips, merged"""
+    hot = TravelPlan.objects.filter(user=user, return_date__lt=today).order_by(
+        '-return_date', '-id'
+    ).values_list('return_date', 'id')[:limit]
+    archived = ArchivedTravelPlan.objects.filter(user=user).order_by(
+        '-return_date', '-id'
+    ).values_list('return_date', 'id')[:limit]
+    merged = heapq.merge(
+        ((return_date, plan_id, False) for return_date, plan_id in hot),
+        ((return_date, plan_id, True) for return_date, plan_id in archived),
+        reverse=True
+    )
+    return list(islice(merged, limit))
+
+
+def recent_destination_names(user, past_plans, limit=5):
+    """
+    Destination names of the newest `limit` past trips, hot and archived.
+    `past_plans` are the user's loaded hot past plans, newest first.
+    """
+    archived = ArchivedTravelPlan.objects.filter(user=user).order_by(
+        '-return_date', '-id'
+    ).values_list('return_date', 'id', 'destination_name')[:limit]
+    merged = heapq.merge(
+        ((plan.return_date, plan.id, plan.destination.name if plan.destination else None)
+         for plan in past_plans[:limit]),
+        ((return_date, plan_id, name or None) for return_date, plan_id, name in archived),
+        key=lambda trip: trip[:2],
+        reverse=True
+    )
+    return [name for _, _, name in islice(merged, limit)]
+
+
+def count_past_trips(user, today):
+    return (TravelPlan.objects.filter(user=user, return_date__lt=today).count()
+            + ArchivedTravelPlan.objects.filter(user=user).count())
+
+
+def past_trips_page(user, today, offset, limit, request=None):
+    """
+    (trips, has_next) for one page of past trips, newest first.
+    Hot plans are serialized as usual; archived ones come from their payload
+    with "archived": true.
+    """
+    keys = past_trip_keys(user, today, offset + limit + 1)
+    page = keys[offset:offset + limit]
+
+    hot_ids = [plan_id for _, plan_id, archived in page if not archived]
+    archived_ids = [plan_id for _, plan_id, archived in page if archived]
+    trips = {}
+    if hot_ids:
+        plans = list(TravelPlanSerializer.setup_queryset(TravelPlan.objects.filter(pk__in=hot_ids), request))
+        serializer = TravelPlanSerializer(plans, many=True, context={'request': request})
+        for plan, data in zip(plans, serializer.data):
+            trips[(plan.id, False)] = data
+    if archived_ids:
+        for plan_id, payload in ArchivedTravelPlan.objects.filter(pk__in=archived_ids).values_list('id', 'payload'):
+            trips[(plan_id, True)] = dict(decompress(payload), archived=True)
+
+    return [trips[(plan_id, archived)] for _, plan_id, archived in page], len(keys) > offset + limit
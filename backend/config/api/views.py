@@ -3,22 +3,59 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.authtoken.models import Token
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Sum, Avg, Q, F, Func, Case, When, Value, IntegerField, OuterRef, Subquery, FloatField
 from api.models import (
     UserPreference, Destination, DestinationImage, Hotel, Transport, 
-    TravelPlan, Itinerary
+    TravelPlan, Itinerary, DestinationPopularity, SimilarDestination, ArchivedTravelPlan
 )
 from api.serializers import (
-    UserSerializer, UserPreferenceSerializer, DestinationSerializer,
+    UserSerializer, UserPreferenceSerializer, DestinationSerializer, DestinationListSerializer,
     DestinationImageSerializer, HotelSerializer, TransportSerializer, 
     TravelPlanSerializer, ItinerarySerializer
 )
+from api.throttling import RecommendationRateThrottle
+from api.coalescing import recommendations_flight, request_key
+from api.pagination import KeysetPagination, WindowPagination
+from api.counting import fast_count
+from api.optimizer import TripOptimizer
+from api import geo, seasons, popularity, analytics, dashboard, trip_archive, export, catalog_sync, snapshots
 from datetime import timedelta, datetime
 from decimal import Decimal
 
 
+def parse_point(params):
+    """
+    Read a "near me" query from params: latitude, longitude, radius_km
+    Returns (latitude, longitude, radius_km), or (None, None, None) if incomplete/invalid
+    """
+    try:
+        latitude = float(params['latitude'])
+        longitude = float(params['longitude'])
+        radius_km = float(params['radius_km'])
+    except (KeyError, TypeError, ValueError):
+        return None, None, None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius_km <= 0:
+        return None, None, None
+    return latitude, longitude, radius_km
+
+
+def parse_travel_month(params):
+    """Month 1-12 from travel_month or travel_date (YYYY-MM-DD), or None"""
+    try:
+        month = int(params['travel_month'])
+    except (KeyError, TypeError, ValueError):
+        try:
+            month = datetime.strptime(params['travel_date'], '%Y-%m-%d').month
+        except (KeyError, TypeError, ValueError):
+            return None
+    return month if 1 <= month <= 12 else None
+
+
 # ==================== RULE-BASED RECOMMENDATION ENGINE ====================
 
 class RecommendationEngine:
@@ -28,7 +65,10 @@ class RecommendationEngine:
     """
     
     @staticmethod
-    def recommend_destinations(budget=None, interest=None, country=None, budget_min=None, budget_max=None, objective=None, location=None):
+    def recommend_destinations(budget=None, interest=None, country=None, budget_min=None, budget_max=None, objective=None, location=None,
+                               latitude=None, longitude=None, radius_km=None,
+                               travel_month=None, in_season_only=False, based_on=None,
+                               hotel_price_max=None, hotel_stars_min=None, with_transport=False, sort=None):
         """
         Enhanced Rule: Recommend destinations based on multiple criteria
         IF budget_min/budget_max provided → filter by budget range
@@ -36,6 +76,16 @@ class RecommendationEngine:
         IF country is specified → filter by country
         IF objective provided → filter by objectives_supported
         IF location provided → filter by location
+        IF latitude/longitude/radius_km provided → only destinations within radius, nearest first
+        IF travel_month provided → in-season destinations first, then shoulder season
+        IF in_season_only → only destinations in season that month
+        IF based_on (destination ids) provided → blend in "users like you": destinations
+           most similar to those (precomputed similarity) rank first
+        IF hotel_price_max provided → only destinations with a hotel at or below that nightly price
+        IF hotel_stars_min provided → only destinations with a hotel of at least that many stars
+        IF with_transport → only destinations with at least one transport route in
+        IF sort provided (hotel_price, hotels, stars, routes) → order by that aggregate first
+        Ties are ranked by popularity (plans in the last 30 days)
         Only show active destinations
         """
         query = Destination.objects.filter(is_active=True)
@@ -66,15 +116,83 @@ class RecommendationEngine:
         if objective:
             query = query.filter(objectives_supported__contains=[objective])
         
-        return query
+        # Rule: Near me - geohash cells around the point, then exact distance
+        if latitude is not None and longitude is not None and radius_km is not None:
+            query = geo.near(query, latitude, longitude, radius_km)
+        
+        # Rule: Hotel and transport filters read the precomputed aggregates
+        if hotel_price_max is not None:
+            query = query.filter(hotel_price_min__lte=hotel_price_max)
+        if hotel_stars_min is not None:
+            query = query.filter(hotel_stars_max__gte=hotel_stars_min)
+        if with_transport:
+            query = query.filter(route_count__gt=0)
+        
+        ordering = list(query.query.order_by)
+        
+        # Rule: Season match is a bitmask check on the precomputed month calendar
+        if travel_month:
+            bit = seasons.month_bit(travel_month)
+            query = query.annotate(
+                in_season=F('season_mask').bitand(bit),
+                in_shoulder=F('shoulder_mask').bitand(bit)
+            ).annotate(season_score=Case(
+                When(in_season__gt=0, then=Value(2)),
+                When(in_shoulder__gt=0, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()
+            ))
+            if in_season_only:
+                query = query.filter(in_season__gt=0)
+            ordering.insert(0, '-season_score')
+        
+        # Rule: Collaborative blend - summed similarity to the given destinations
+        if based_on:
+            affinity = SimilarDestination.objects.filter(
+                similar=OuterRef('pk'), destination_id__in=based_on
+            ).values('similar').annotate(total=Sum('score')).values('total')
+            query = query.exclude(id__in=based_on).annotate(
+                affinity=Subquery(affinity, output_field=FloatField())
+            )
+            ordering.insert(1 if travel_month else 0, F('affinity').desc(nulls_last=True))
+        
+        # Rule: Explicit sort on an aggregate wins over every ranking above
+        if sort in RecommendationEngine.DESTINATION_SORTS:
+            ordering.insert(0, RecommendationEngine.DESTINATION_SORTS[sort])
+        
+        # Rule: Popular destinations first among equals (precomputed counters)
+        return query.order_by(*ordering, F('popularity__plans_30d').desc(nulls_last=True), 'id')
+    
+    # Sort options for destinations → aggregate column (destinations without hotels last)
+    DESTINATION_SORTS = {
+        'hotel_price': F('hotel_price_min').asc(nulls_last=True),
+        '-hotel_price': F('hotel_price_min').desc(nulls_last=True),
+        'hotels': F('hotel_count').desc(),
+        'stars': F('hotel_stars_max').desc(nulls_last=True),
+        'routes': F('route_count').desc(),
+    }
+    
+    # Sort options for hotels → keyset ordering (always ends in a unique column)
+    HOTEL_SORTS = {
+        'price': ('price_per_night', 'id'),
+        '-price': ('-price_per_night', '-id'),
+        'stars': ('stars', 'price_per_night', 'id'),
+        '-stars': ('-stars', 'price_per_night', 'id'),
+    }
     
     @staticmethod
-    def recommend_hotels(destination_id, budget):
+    def recommend_hotels(destination_id, budget, price_min=None, price_max=None,
+                         stars_min=None, stars_max=None, sort=None,
+                         latitude=None, longitude=None, radius_km=None):
         """
         Rule 2: Recommend hotels based on destination and budget
         IF budget = Low → show guest houses/budget hotels (1-2 stars)
         IF budget = Medium → show 3-star hotels
         IF budget = High → show 4-5 star hotels
+        IF stars_min/stars_max provided → use that star range instead
+        IF price_min/price_max provided → filter by price per night
+        IF sort provided (price, -price, stars, -stars) → order accordingly
+        IF latitude/longitude/radius_km provided → only hotels within radius, nearest first
         """
         if budget == 'low':
             star_range = [1, 2]
@@ -85,29 +203,82 @@ class RecommendationEngine:
         else:
             star_range = [1, 2, 3, 4, 5]
         
-        return Hotel.objects.filter(
-            destination_id=destination_id,
-            stars__in=star_range,
-            budget_category=budget
-        )
+        query = Hotel.objects.all()
+        if destination_id:
+            query = query.filter(destination_id=destination_id)
+        
+        # Rule: Explicit star range overrides the budget star mapping
+        if stars_min is not None or stars_max is not None:
+            query = query.filter(stars__gte=stars_min or 1, stars__lte=stars_max or 5)
+        else:
+            query = query.filter(stars__in=star_range)
+        
+        if budget:
+            query = query.filter(budget_category=budget)
+        
+        # Rule: Price range per night (served by the destination/price index)
+        if price_min is not None:
+            query = query.filter(price_per_night__gte=price_min)
+        if price_max is not None:
+            query = query.filter(price_per_night__lte=price_max)
+        
+        # Rule: Near me
+        if latitude is not None and longitude is not None and radius_km is not None:
+            query = geo.near(query, latitude, longitude, radius_km)
+        
+        if sort in RecommendationEngine.HOTEL_SORTS:
+            query = query.order_by(*RecommendationEngine.HOTEL_SORTS[sort])
+        
+        return query
     
     @staticmethod
-    def recommend_transport(distance_km, budget):
+    def recommend_transport(distance_km, budget, origin=None, destination=None):
         """
         Rule 3: Recommend transport based on distance and budget
         IF distance < 200km → Bus
         IF distance 200-1000km → Train
         IF distance > 1000km → Flight
+        IF no distance given → haversine distance between origin and destination
+        IF origin/destination given → every mode on that route, the suggested one first
+        IF no route given → only the suggested mode within ±25% of the distance, closest distance first
+        Cheapest first
         Budget consideration affects price selection
         """
-        if distance_km < 200:
+        if distance_km is None and origin and destination:
+            distance_km = Destination.distance_between(origin, destination)
+        
+        if distance_km is None:
+            transport_type = None
+        elif distance_km < 200:
             transport_type = 'bus'
         elif distance_km <= 1000:
             transport_type = 'train'
         else:
             transport_type = 'flight'
         
-        return Transport.objects.filter(transport_type=transport_type)
+        if origin or destination:
+            # The route decides; straight-line distance only ranks its modes
+            query = Transport.objects.all()
+            if origin:
+                query = query.filter(origin__iexact=origin)
+            if destination:
+                query = query.filter(destination__iexact=destination)
+            if transport_type is None:
+                return query.order_by('estimated_price', 'id')
+            query = query.annotate(type_rank=Case(
+                When(transport_type=transport_type, then=Value(0)), default=Value(1), output_field=IntegerField()
+            ))
+            return query.order_by('type_rank', 'estimated_price', 'id')
+        
+        if transport_type is None:
+            return Transport.objects.none()
+        
+        # Rule: Similar distance only - served by the (transport_type, distance_km) index
+        query = Transport.objects.filter(
+            transport_type=transport_type,
+            distance_km__gte=int(distance_km * 0.75), distance_km__lte=int(distance_km * 1.25) + 1
+        ).annotate(distance_gap=Func(F('distance_km') - distance_km, function='ABS'))
+        return query.order_by('distance_gap', 'estimated_price', 'id')
     
     @staticmethod
     def generate_itinerary(travel_days, destination_id, num_travelers):
@@ -255,8 +426,62 @@ def change_password_view(request):
     })
 
 
+def export_response(user):
+    """Streamed zip of a user's data (api/export.py), written as it is downloaded"""
+    response = StreamingHttpResponse(export.export_user(user), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{export.filename_for(user)}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_data_view(request):
+    """
+    Download everything stored about the current user as a zip:
+    profile, preferences, travel plans (with itineraries, archived ones too)
+    and the destinations, hotels and transport they reference
+    """
+    return export_response(request.user)
+
+
 # ==================== VIEWSETS ====================
 
+class SparseFieldsetMixin:
+    """
+    Narrow read querysets to the fields requested with ?fields= / ?expand=
+    so only the rendered columns are loaded and unused nested payloads
+    are neither joined nor prefetched.
+    """
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method == 'GET':
+            queryset = self.get_serializer_class().setup_queryset(queryset, self.request)
+        return queryset
+
+
+class CursorPaginationMixin:
+    """
+    Opt-in keyset pagination for infinite scroll: ?pagination=cursor (and the
+    ?cursor= links it returns) switch the list from numbered pages to
+    KeysetPagination over `cursor_ordering` (None disables it per viewset)
+    """
+    cursor_ordering = ('id',)
+    
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            ordering = self.get_cursor_ordering()
+            if ordering and (params.get('pagination') == 'cursor' or 'cursor' in params):
+                self._paginator = KeysetPagination(ordering)
+        return super().paginator
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """User registration and profile management"""
     queryset = User.objects.all()
@@ -337,7 +562,7 @@ class UserPreferenceViewSet(viewsets.ModelViewSet):
             return Response({'message': 'No preferences set'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class DestinationViewSet(viewsets.ReadOnlyModelViewSet):
+class DestinationViewSet(CursorPaginationMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """Destination management and recommendations"""
     queryset = Destination.objects.filter(is_active=True)
     serializer_class = DestinationSerializer
@@ -345,13 +570,52 @@ class DestinationViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         """Override to only show active destinations"""
-        return Destination.objects.filter(is_active=True)
+        return Destination.objects.filter(is_active=True).order_by('id')
+    
+    def get_serializer_class(self):
+        """
+        Lists and recommendations render cards: primary_image_url only.
+        The full gallery comes with retrieve, ?expand=images or ?fields=images
+        """
+        if self.action == 'retrieve':
+            return DestinationSerializer
+        params = self.request.query_params
+        requested = params.get('expand', '').split(',') + params.get('fields', '').split(',')
+        if any(name.strip().split('.')[0] == 'images' for name in requested):
+            return DestinationSerializer
+        return DestinationListSerializer
     
     @action(detail=False, methods=['get'])
+    def gallery(self, request):
+        """
+        Images of many destinations in one query, grouped by destination id
+        Query params: ids (comma-separated, max 100)
+        """
+        ids = [int(value) for value in request.query_params.get('ids', '').split(',')
+               if value.strip().isdigit()][:100]
+        if not ids:
+            return Response({'error': 'ids is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        images = DestinationImage.objects.filter(
+            destination_id__in=ids, destination__is_active=True
+        ).order_by('destination_id', '-is_primary', 'created_at', 'id')
+        galleries = {str(destination_id): [] for destination_id in ids}
+        for image in DestinationImageSerializer(images, many=True).data:
+            galleries[str(image['destination'])].append(image)
+        
+        return Response({'galleries': galleries})
+    
+    @action(detail=False, methods=['get'], throttle_classes=[RecommendationRateThrottle])
     def recommended(self, request):
         """
         Get recommended destinations based on user preferences
-        Query params: budget, interest, country, budget_min, budget_max, objective, location
+        Query params: budget, interest, country, budget_min, budget_max, objective, location,
+                      latitude, longitude, radius_km (near me),
+                      travel_month or travel_date (season boost), in_season=true (season filter),
+                      similar_to=<id,id> or blend=true (rank by similarity to the user's planned destinations),
+                      hotel_price_max, hotel_stars_min, with_transport=true,
+                      sort=hotel_price|-hotel_price|hotels|stars|routes,
+                      page, limit (follow `next` for the next page)
         """
         budget = request.query_params.get('budget')
         interest = request.query_params.get('interest')
@@ -373,6 +637,28 @@ class DestinationViewSet(viewsets.ReadOnlyModelViewSet):
             except:
                 budget_max = None
         
+        latitude, longitude, radius_km = parse_point(request.query_params)
+        travel_month = parse_travel_month(request.query_params)
+        in_season_only = request.query_params.get('in_season', '').lower() in ('true', '1', 'yes')
+        
+        based_on = [int(value) for value in request.query_params.get('similar_to', '').split(',')
+                    if value.strip().isdigit()]
+        blend = request.query_params.get('blend', '').lower() in ('true', '1', 'yes')
+        
+        try:
+            hotel_price_max = Decimal(request.query_params['hotel_price_max'])
+        except (KeyError, ArithmeticError):
+            hotel_price_max = None
+        try:
+            hotel_stars_min = int(request.query_params['hotel_stars_min'])
+        except (KeyError, ValueError):
+            hotel_stars_min = None
+        with_transport = request.query_params.get('with_transport', '').lower() in ('true', '1', 'yes')
+        if blend and not based_on and request.user.is_authenticated:
+            based_on = list(TravelPlan.objects.filter(
+                user=request.user, destination__isnull=False
+            ).values_list('destination_id', flat=True).distinct())
+        
         destinations = RecommendationEngine.recommend_destinations(
             budget=budget,
             interest=interest,
@@ -380,91 +666,265 @@ class DestinationViewSet(viewsets.ReadOnlyModelViewSet):
             budget_min=budget_min,
             budget_max=budget_max,
             objective=objective,
-            location=location
+            location=location,
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km,
+            travel_month=travel_month,
+            in_season_only=in_season_only,
+            based_on=based_on,
+            hotel_price_max=hotel_price_max,
+            hotel_stars_min=hotel_stars_min,
+            with_transport=with_transport,
+            sort=request.query_params.get('sort')
         )
+        destinations = self.filter_queryset(destinations)
+        
+        def build():
+            # One bounded query: the requested page plus one row to detect `next`
+            paginator = WindowPagination()
+            page = paginator.paginate_queryset(destinations, request, view=self)
+            serializer = self.get_serializer(page, many=True)
+            return {
+                'count': paginator.get_count(),
+                'next': paginator.get_next_link(),
+                'recommendations': serializer.data
+            }
+        
+        # Identical concurrent requests share one engine run (per user when blended with their plans)
+        key = request_key(request, 'destinations', personalized=blend)
+        return Response(recommendations_flight.do(key, build))
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        Destinations planned by the same travellers, from the precomputed similarity table
+        Query params: limit (default 10, max 50)
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
         
+        destination = self.get_object()
+        destinations = Destination.objects.filter(
+            is_active=True, similar_from__destination=destination
+        ).annotate(
+            similarity=F('similar_from__score')
+        ).order_by('similar_from__rank')
+        destinations = self.filter_queryset(destinations)[:limit]
         serializer = self.get_serializer(destinations, many=True)
+        similar = []
+        for neighbour, data in zip(destinations, serializer.data):
+            data['similarity'] = neighbour.similarity
+            similar.append(data)
+        
         return Response({
-            'count': destinations.count(),
-            'recommendations': serializer.data
+            'destination_id': destination.id,
+            'count': len(similar),
+            'similar': similar
+        })
+    
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        Most planned destinations, read from the precomputed popularity counters
+        Query params: window=7|30 (days, default 7), limit (default 10, max 50)
+        """
+        window = request.query_params.get('window', '7')
+        if window not in ('7', '30'):
+            return Response({'error': 'window must be 7 or 30'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        
+        destinations = self.filter_queryset(popularity.trending(days=int(window)))[:limit]
+        serializer = self.get_serializer(destinations, many=True)
+        trending = []
+        for destination, data in zip(destinations, serializer.data):
+            data['popularity'] = {
+                'plans': destination.plans_in_window,
+                'total_plans': destination.total_plans,
+                'unique_users': destination.unique_users
+            }
+            trending.append(data)
+        
+        return Response({
+            'window_days': int(window),
+            'count': len(trending),
+            'trending': trending
         })
 
 
-class HotelViewSet(viewsets.ReadOnlyModelViewSet):
+class HotelViewSet(CursorPaginationMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """Hotel management and recommendations"""
     queryset = Hotel.objects.all()
     serializer_class = HotelSerializer
     permission_classes = [AllowAny]
     
-    @action(detail=False, methods=['get'])
+    def get_range_filters(self):
+        """
+        Parse price_min, price_max, stars_min, stars_max from query params
+        Invalid values are ignored
+        """
+        params = self.request.query_params
+        filters = {}
+        for name, convert in [('price_min', Decimal), ('price_max', Decimal),
+                              ('stars_min', int), ('stars_max', int)]:
+            value = params.get(name)
+            if value:
+                try:
+                    filters[name] = convert(value)
+                except (ArithmeticError, ValueError):
+                    pass
+        return filters
+    
+    def get_queryset(self):
+        """
+        Optional filters: destination_id, price_min, price_max, stars_min, stars_max
+        Optional ordering: sort=price|-price|stars|-stars
+        """
+        queryset = Hotel.objects.all()
+        destination_id = self.request.query_params.get('destination_id')
+        if destination_id:
+            queryset = queryset.filter(destination_id=destination_id)
+        
+        filters = self.get_range_filters()
+        if 'price_min' in filters:
+            queryset = queryset.filter(price_per_night__gte=filters['price_min'])
+        if 'price_max' in filters:
+            queryset = queryset.filter(price_per_night__lte=filters['price_max'])
+        if 'stars_min' in filters:
+            queryset = queryset.filter(stars__gte=filters['stars_min'])
+        if 'stars_max' in filters:
+            queryset = queryset.filter(stars__lte=filters['stars_max'])
+        
+        sort = self.request.query_params.get('sort')
+        return queryset.order_by(*RecommendationEngine.HOTEL_SORTS.get(sort, ('id',)))
+    
+    def get_cursor_ordering(self):
+        """Infinite scroll follows the requested sort"""
+        return RecommendationEngine.HOTEL_SORTS.get(self.request.query_params.get('sort'), ('id',))
+    
+    @action(detail=False, methods=['get'], throttle_classes=[RecommendationRateThrottle])
     def recommended(self, request):
         """
         Get recommended hotels based on destination and budget
-        Query params: destination_id, budget
+        Query params: destination_id, budget,
+                      price_min, price_max, stars_min, stars_max,
+                      sort (price, -price, stars, -stars), cursor, page, limit,
+                      latitude, longitude, radius_km (near me)
+        Paginated (keyset with sort, page numbers otherwise): follow `next` for the next page
         """
         destination_id = request.query_params.get('destination_id')
         budget = request.query_params.get('budget')
+        sort = request.query_params.get('sort')
+        latitude, longitude, radius_km = parse_point(request.query_params)
         
-        if not destination_id:
+        if not destination_id and radius_km is None:
             return Response(
-                {'error': 'destination_id is required'},
+                {'error': 'destination_id or latitude, longitude and radius_km are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        hotels = RecommendationEngine.recommend_hotels(destination_id, budget)
-        serializer = self.get_serializer(hotels, many=True)
-        return Response({
-            'count': hotels.count(),
-            'recommendations': serializer.data
-        })
+        if sort and sort not in RecommendationEngine.HOTEL_SORTS:
+            return Response(
+                {'error': f'sort must be one of: {", ".join(RecommendationEngine.HOTEL_SORTS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        hotels = RecommendationEngine.recommend_hotels(
+            destination_id, budget, sort=sort,
+            latitude=latitude, longitude=longitude, radius_km=radius_km,
+            **self.get_range_filters()
+        )
+        hotels = self.filter_queryset(hotels)
+        
+        def build():
+            if sort:
+                # Keyset page: an index range scan on (destination, price/stars)
+                paginator = KeysetPagination(
+                    RecommendationEngine.HOTEL_SORTS[sort],
+                    default_limit=getattr(settings, 'RECOMMENDATIONS_PAGE_SIZE', 20),
+                    max_limit=getattr(settings, 'RECOMMENDATIONS_MAX_PAGE_SIZE', 100)
+                )
+            else:
+                paginator = WindowPagination()
+            page = paginator.paginate_queryset(hotels, request, view=self)
+            serializer = self.get_serializer(page, many=True)
+            return {
+                'count': fast_count(hotels),
+                'next': paginator.get_next_link(),
+                'recommendations': serializer.data
+            }
+        
+        return Response(recommendations_flight.do(request_key(request, 'hotels'), build))
 
 
-class TransportViewSet(viewsets.ReadOnlyModelViewSet):
+class TransportViewSet(CursorPaginationMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """Transport management and recommendations"""
-    queryset = Transport.objects.all()
+    queryset = Transport.objects.order_by('id')
     serializer_class = TransportSerializer
     permission_classes = [AllowAny]
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], throttle_classes=[RecommendationRateThrottle])
     def recommended(self, request):
         """
         Get recommended transport based on distance and budget
-        Query params: distance_km, budget
+        Query params: distance_km, budget, origin, destination, page, limit
+        With origin/destination only that route is returned; distance_km, or the
+        distance between their coordinates, ranks the suggested mode first
+        Paginated: follow `next` for the next page
         """
         distance_km = request.query_params.get('distance_km')
         budget = request.query_params.get('budget')
+        origin = request.query_params.get('origin')
+        destination = request.query_params.get('destination')
         
-        if not distance_km:
+        if not distance_km and not (origin and destination):
             return Response(
-                {'error': 'distance_km is required'},
+                {'error': 'distance_km or origin and destination are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            distance_km = int(distance_km)
-        except ValueError:
-            return Response(
-                {'error': 'distance_km must be an integer'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if distance_km:
+            try:
+                distance_km = int(distance_km)
+            except ValueError:
+                return Response(
+                    {'error': 'distance_km must be an integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            distance_km = None
         
-        transport = RecommendationEngine.recommend_transport(distance_km, budget)
-        serializer = self.get_serializer(transport, many=True)
-        return Response({
-            'count': transport.count(),
-            'recommendations': serializer.data
-        })
+        transport = RecommendationEngine.recommend_transport(distance_km, budget, origin, destination)
+        transport = self.filter_queryset(transport)
+        
+        def build():
+            paginator = WindowPagination()
+            page = paginator.paginate_queryset(transport, request, view=self)
+            serializer = self.get_serializer(page, many=True)
+            return {
+                'count': paginator.get_count(),
+                'next': paginator.get_next_link(),
+                'recommendations': serializer.data
+            }
+        
+        return Response(recommendations_flight.do(request_key(request, 'transport'), build))
 
 
-class TravelPlanViewSet(viewsets.ModelViewSet):
+class TravelPlanViewSet(CursorPaginationMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """Travel plan management and itinerary generation"""
     queryset = TravelPlan.objects.all()
     serializer_class = TravelPlanSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-id',)
     
     def get_queryset(self):
-        # Users see only their own travel plans
-        return TravelPlan.objects.filter(user=self.request.user)
+        # Users see only their own travel plans, newest first
+        return TravelPlan.objects.filter(user=self.request.user).order_by('-id')
     
     def perform_create(self, serializer):
         # Automatically assign current user
@@ -510,63 +970,135 @@ class TravelPlanViewSet(viewsets.ModelViewSet):
             'itinerary': serializer.data
         })
     
-    @action(detail=False, methods=['post'])
-    def create_plan_with_recommendations(self, request):
+    def parse_trip_params(self, data):
         """
-        Create a complete travel plan with recommendations
-        Body: travel_date, return_date, budget, num_travelers, interest, country
+        Validate trip parameters shared by optimize_trip and
+        create_plan_with_recommendations.
+        Returns (params, None) or (None, error_response)
         """
-        travel_date = request.data.get('travel_date')
-        return_date = request.data.get('return_date')
-        budget = request.data.get('budget')
-        num_travelers = request.data.get('num_travelers')
-        interest = request.data.get('interest')
-        country = request.data.get('country')
+        travel_date = data.get('travel_date')
+        return_date = data.get('return_date')
+        budget = data.get('budget')
+        num_travelers = data.get('num_travelers')
         
         if not all([travel_date, return_date, budget, num_travelers]):
-            return Response(
+            return None, Response(
                 {'error': 'Missing required fields'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Step 1: Get recommended destinations
-        destinations = RecommendationEngine.recommend_destinations(budget, interest, country)
+        try:
+            travel_date = datetime.strptime(str(travel_date), '%Y-%m-%d').date()
+            return_date = datetime.strptime(str(return_date), '%Y-%m-%d').date()
+        except ValueError:
+            return None, Response(
+                {'error': 'Dates must be in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if not destinations.exists():
-            return Response(
-                {'error': 'No destinations found matching your criteria'},
-                status=status.HTTP_404_NOT_FOUND
+        if return_date < travel_date:
+            return None, Response(
+                {'error': 'Return date must be after travel date'},
+                status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Step 2: Select first recommended destination
-        destination = destinations.first()
+        try:
+            budget = Decimal(str(budget))
+            num_travelers = int(num_travelers)
+        except (ArithmeticError, ValueError):
+            return None, Response(
+                {'error': 'budget must be an amount and num_travelers an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Step 3: Get recommended hotels
-        hotels = RecommendationEngine.recommend_hotels(destination.id, budget)
-        hotel = hotels.first() if hotels.exists() else None
+        try:
+            limit = max(1, min(int(data.get('limit', 5)), 50))
+        except (TypeError, ValueError):
+            limit = 5
         
-        # Step 4: Get recommended transport (dummy distance for now)
-        transport = RecommendationEngine.recommend_transport(500, budget)
-        transport_obj = transport.first() if transport.exists() else None
+        return {
+            'travel_date': travel_date,
+            'return_date': return_date,
+            'budget': budget,
+            'num_travelers': num_travelers,
+            'budget_level': data.get('budget_level'),
+            'interest': data.get('interest'),
+            'country': data.get('country'),
+            'origin': data.get('origin'),
+            'limit': limit,
+        }, None
+    
+    def optimize(self, params):
+        """Run the trip optimizer over the destinations matching params"""
+        destinations = RecommendationEngine.recommend_destinations(
+            params['budget_level'], params['interest'], params['country']
+        )
+        optimizer = TripOptimizer(
+            budget=params['budget'],
+            nights=(params['return_date'] - params['travel_date']).days,
+            num_travelers=params['num_travelers'],
+            origin=params['origin'],
+            limit=params['limit']
+        )
+        return optimizer.optimize(destinations)
+    
+    @action(detail=False, methods=['post'])
+    def optimize_trip(self, request):
+        """
+        Find the best destination + hotel + transport combinations within budget
+        Body: travel_date, return_date, budget (total amount), num_travelers,
+              origin, budget_level, interest, country, limit (default 5)
+        """
+        params, error = self.parse_trip_params(request.data)
+        if error:
+            return error
         
-        # Step 5: Create travel plan
+        plans = self.optimize(params)
+        return Response({
+            'count': len(plans),
+            'plans': plans
+        })
+    
+    @action(detail=False, methods=['post'])
+    def create_plan_with_recommendations(self, request):
+        """
+        Create a complete travel plan with recommendations
+        Body: travel_date, return_date, budget (total amount), num_travelers,
+              origin, budget_level, interest, country
+        Picks the best destination, hotel and transport that fit the budget
+        """
+        params, error = self.parse_trip_params(request.data)
+        if error:
+            return error
+        
+        # Step 1-3: Best destination, hotel and transport within budget
+        plans = self.optimize(dict(params, limit=1))
+        
+        if not plans:
+            return Response(
+                {'error': 'No destinations found matching your criteria and budget'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        best = plans[0]
+        
+        # Step 4: Create travel plan
         travel_plan = TravelPlan.objects.create(
             user=request.user,
-            destination=destination,
-            hotel=hotel,
-            transport=transport_obj,
-            travel_date=travel_date,
-            return_date=return_date,
-            budget=budget,
-            num_travelers=num_travelers
+            destination_id=best['destination_id'],
+            hotel_id=best['hotel_id'],
+            transport_id=best['transport_id'],
+            travel_date=params['travel_date'],
+            return_date=params['return_date'],
+            budget=params['budget'],
+            num_travelers=params['num_travelers']
         )
         
-        # Step 6: Generate itinerary
+        # Step 5: Generate itinerary
         travel_days = (travel_plan.return_date - travel_plan.travel_date).days + 1
         itinerary_template = RecommendationEngine.generate_itinerary(
             travel_days,
-            destination.id,
-            num_travelers
+            best['destination_id'],
+            params['num_travelers']
         )
         
         for item in itinerary_template:
@@ -579,11 +1111,12 @@ class TravelPlanViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(travel_plan)
         return Response({
             'message': 'Travel plan created with recommendations',
-            'travel_plan': serializer.data
+            'travel_plan': serializer.data,
+            'estimated_cost': best
         }, status=status.HTTP_201_CREATED)
 
 
-class ItineraryViewSet(viewsets.ModelViewSet):
+class ItineraryViewSet(CursorPaginationMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """Itinerary management"""
     queryset = Itinerary.objects.all()
     serializer_class = ItinerarySerializer
@@ -591,10 +1124,10 @@ class ItineraryViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # Users see itineraries for their travel plans
-        return Itinerary.objects.filter(travel_plan__user=self.request.user)
+        return Itinerary.objects.filter(travel_plan__user=self.request.user).order_by('id')
 
 
-class DestinationImageViewSet(viewsets.ReadOnlyModelViewSet):
+class DestinationImageViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """Destination images management"""
     queryset = DestinationImage.objects.all()
     serializer_class = DestinationImageSerializer
@@ -617,9 +1150,12 @@ def budget_summary(request):
     Get budget summary for user's travel plans
     Shows total planned budget, spent budget, and remaining budget
     """
-    user = request.user
-    travel_plans = TravelPlan.objects.filter(user=user)
-    
+    travel_plans = TravelPlan.objects.filter(user=request.user).select_related('destination', 'hotel', 'transport')
+    return Response(summarize_budget(travel_plans))
+
+
+def summarize_budget(travel_plans):
+    """Budget totals and per-plan estimated costs (hotel nights + transport per traveler)"""
     total_budget = Decimal('0.00')
     total_spent = Decimal('0.00')
     
@@ -637,7 +1173,7 @@ def budget_summary(request):
             hotel_cost = Decimal(str(plan.hotel.price_per_night)) * nights * plan.num_travelers
         
         if plan.transport:
-            transport_cost = Decimal(str(plan.transport.price)) * plan.num_travelers
+            transport_cost = Decimal(str(plan.transport.estimated_price)) * plan.num_travelers
         
         estimated_spent = hotel_cost + transport_cost
         remaining = plan_budget - estimated_spent
@@ -655,12 +1191,12 @@ def budget_summary(request):
         total_budget += plan_budget
         total_spent += estimated_spent
     
-    return Response({
+    return {
         'total_budget': float(total_budget),
         'total_estimated_spent': float(total_spent),
         'total_remaining': float(total_budget - total_spent),
         'plans': plans_data
-    })
+    }
 
 
 @api_view(['GET'])
@@ -709,6 +1245,54 @@ def budget_breakdown(request, plan_id):
     return Response(breakdown)
 
 
+# ==================== CATALOG SYNC ====================
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def catalog_changes(request):
+    """
+    Incremental catalog sync
+    Without `since`: returns the current token; download the catalog, then sync from it.
+    With since=<token>: destinations, hotels and transport created/updated (serialized)
+    or deleted/hidden (ids) after the token, and the token to send next time.
+    Keep calling while has_more is true. 410 Gone = token too old, download again.
+    Query params: since, limit (change log rows, default 500, max 1000), fields
+    """
+    if 'since' not in request.query_params:
+        return Response({'token': catalog_sync.current_token(), 'reset': True})
+    
+    since = catalog_sync.parse_token(request.query_params['since'])
+    if since is None:
+        return Response({'error': 'Invalid since token'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 500)), 1000))
+    except ValueError:
+        limit = 500
+    
+    try:
+        changes = catalog_sync.changes_since(since, limit, request)
+    except catalog_sync.TokenExpired:
+        return Response({
+            'error': 'Token expired, download the catalog again',
+            'token': catalog_sync.current_token(),
+            'reset': True
+        }, status=status.HTTP_410_GONE)
+    return Response(changes)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def catalog_manifest(request):
+    """
+    Current static catalog snapshot: version, sync token and file URLs
+    (JSON, MessagePack when available; .gz/.br variants next to each file)
+    """
+    manifest = snapshots.read_manifest()
+    if manifest is None:
+        return Response({'error': 'No catalog snapshot built yet'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(manifest, headers={'Cache-Control': 'public, max-age=60'})
+
+
 # ==================== DASHBOARD VIEWS ====================
 
 @api_view(['GET'])
@@ -722,15 +1306,17 @@ def dashboard_stats(request):
     
     # User stats
     travel_plans = TravelPlan.objects.filter(user=user)
-    total_plans = travel_plans.count()
+    archived_plans = ArchivedTravelPlan.objects.filter(user=user)
+    archived = archived_plans.aggregate(count=Count('id'), total=Sum('budget'))
+    total_plans = travel_plans.count() + archived['count']
     
-    # Upcoming and past trips
+    # Upcoming and past trips (archived plans are all past)
     today = datetime.now().date()
     upcoming_trips = travel_plans.filter(travel_date__gte=today).count()
-    past_trips = travel_plans.filter(return_date__lt=today).count()
+    past_trips = travel_plans.filter(return_date__lt=today).count() + archived['count']
     
     # Budget statistics
-    total_budget = travel_plans.aggregate(total=Sum('budget'))['total'] or 0
+    total_budget = (travel_plans.aggregate(total=Sum('budget'))['total'] or 0) + (archived['total'] or 0)
     
     # Preferences
     try:
@@ -744,9 +1330,13 @@ def dashboard_stats(request):
         preferred_interest = None
     
     # Recent destinations visited
-    recent_destinations = travel_plans.filter(
+    recent_destinations = list(travel_plans.filter(
         return_date__lt=today
-    ).order_by('-return_date')[:5].values_list('destination__name', flat=True)
+    ).order_by('-return_date')[:5].values_list('destination__name', flat=True))
+    if len(recent_destinations) < 5:
+        recent_destinations += archived_plans.order_by('-return_date', '-id')[
+            :5 - len(recent_destinations)
+        ].values_list('destination_name', flat=True)
     
     # Recommendations available
     if has_preferences:
@@ -773,7 +1363,7 @@ def dashboard_stats(request):
             'budget': preferred_budget,
             'interest': preferred_interest
         },
-        'recent_destinations': list(recent_destinations),
+        'recent_destinations': recent_destinations,
         'recommendations_available': recommended_destinations
     })
 
@@ -787,8 +1377,9 @@ def upcoming_trips(request):
         user=request.user,
         travel_date__gte=today
     ).order_by('travel_date')
+    plans = TravelPlanSerializer.setup_queryset(plans, request)
     
-    serializer = TravelPlanSerializer(plans, many=True)
+    serializer = TravelPlanSerializer(plans, many=True, context={'request': request})
     return Response({
         'count': plans.count(),
         'trips': serializer.data
@@ -798,20 +1389,100 @@ def upcoming_trips(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def past_trips(request):
-    """Get user's past trips"""
+    """
+    Get user's past trips, newest first, including archived ones
+    Query params: page, limit (default PAST_TRIPS_PAGE_SIZE, max 100; follow `next`)
+    """
     today = datetime.now().date()
-    plans = TravelPlan.objects.filter(
-        user=request.user,
-        return_date__lt=today
-    ).order_by('-return_date')
-    
-    serializer = TravelPlanSerializer(plans, many=True)
+    try:
+        page = max(1, int(request.query_params.get('page', 1)))
+        limit = max(1, min(int(request.query_params.get('limit', settings.PAST_TRIPS_PAGE_SIZE)), 100))
+    except ValueError:
+        return Response({'error': 'page and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    trips, has_next = trip_archive.past_trips_page(request.user, today, (page - 1) * limit, limit, request)
+    next_url = None
+    if has_next:
+        next_url = replace_query_param(request.build_absolute_uri(), 'page', page + 1)
     return Response({
-        'count': plans.count(),
-        'trips': serializer.data
+        'count': trip_archive.count_past_trips(request.user, today),
+        'next': next_url,
+        'trips': trips
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_bundle(request):
+    """
+    Everything the dashboard shows in one response, from one plan fetch:
+    stats, upcoming trips, past trips, budget summary and preferences
+    Cached per user until their plans/preferences change; send If-None-Match
+    with the returned ETag to get 304 Not Modified without any database work
+    """
+    user = request.user
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    
+    def build():
+        today = datetime.now().date()
+        plans = list(TravelPlanSerializer.setup_queryset(TravelPlan.objects.filter(user=user)))
+        upcoming = sorted((plan for plan in plans if plan.travel_date >= today),
+                          key=lambda plan: (plan.travel_date, plan.id))
+        past = sorted((plan for plan in plans if plan.return_date < today),
+                      key=lambda plan: (plan.return_date, plan.id), reverse=True)
+        preference = UserPreference.objects.filter(user=user).first()
+        archived = ArchivedTravelPlan.objects.filter(user=user).aggregate(count=Count('id'), total=Sum('budget'))
+        
+        if preference:
+            recommendations_available = RecommendationEngine.recommend_destinations(
+                preference.budget, preference.interest
+            ).count()
+        else:
+            recommendations_available = 0
+        
+        return {
+            'stats': {
+                'user': {
+                    'username': user.username,
+                    'email': user.email,
+                    'member_since': user.date_joined
+                },
+                'statistics': {
+                    'total_plans': len(plans) + archived['count'],
+                    'upcoming_trips': len(upcoming),
+                    'past_trips': len(past) + archived['count'],
+                    'total_budget_planned': float(sum(plan.budget for plan in plans) + (archived['total'] or 0))
+                },
+                'preferences': {
+                    'has_preferences': preference is not None,
+                    'budget': preference.budget if preference else None,
+                    'interest': preference.interest if preference else None
+                },
+                # Same sources as past_trips: hot plans and the archive
+                'recent_destinations': trip_archive.recent_destination_names(user, past),
+                'recommendations_available': recommendations_available
+            },
+            'upcoming_trips': {
+                'count': len(upcoming),
+                'trips': TravelPlanSerializer(upcoming, many=True).data
+            },
+            # Recent past trips only; older ones are paged from the archive by past_trips
+            'past_trips': {
+                'count': len(past) + archived['count'],
+                'trips': TravelPlanSerializer(past, many=True).data
+            },
+            'budget_summary': summarize_budget(plans),
+            'preferences': UserPreferenceSerializer(preference).data if preference else None
+        }
+    
+    etag = dashboard.etag_for(user.id)
+    if if_none_match and dashboard.etag_matches(etag, if_none_match):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    
+    etag, bundle = dashboard.get_bundle(user.id, build)
+    return Response(bundle, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
+
+
 # ==================== ADMIN MANAGEMENT VIEWS ====================
 
 @api_view(['GET'])
@@ -823,11 +1494,16 @@ def admin_dashboard(request):
     # User statistics
     total_users = User.objects.count()
     users_with_preferences = UserPreference.objects.count()
-    users_with_plans = TravelPlan.objects.values('user').distinct().count()
+    users_with_plans = TravelPlan.objects.values('user').union(
+        ArchivedTravelPlan.objects.values('user')
+    ).count()
     
-    # Travel plan statistics
-    total_plans = TravelPlan.objects.count()
-    total_itineraries = Itinerary.objects.count()
+    # Travel plan statistics (hot tables plus archive summary rows)
+    archived = ArchivedTravelPlan.objects.aggregate(
+        count=Count('id'), itineraries=Count('id', filter=Q(has_itinerary=True)), total=Sum('budget')
+    )
+    total_plans = TravelPlan.objects.count() + archived['count']
+    total_itineraries = Itinerary.objects.count() + archived['itineraries']
     
     # Content statistics
     total_destinations = Destination.objects.count()
@@ -835,15 +1511,15 @@ def admin_dashboard(request):
     total_transport = Transport.objects.count()
     
     # Budget statistics
-    total_budget_value = TravelPlan.objects.aggregate(total=Sum('budget'))['total'] or 0
-    avg_budget = TravelPlan.objects.aggregate(avg=Avg('budget'))['avg'] or 0
+    total_budget_value = (TravelPlan.objects.aggregate(total=Sum('budget'))['total'] or 0) + (archived['total'] or 0)
+    avg_budget = total_budget_value / total_plans if total_plans else 0
     
-    # Popular destinations
-    popular_destinations = TravelPlan.objects.values(
+    # Popular destinations (precomputed counters)
+    popular_destinations = DestinationPopularity.objects.values(
         'destination__name'
     ).annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
+        count=F('total_plans')
+    ).order_by('-total_plans')[:5]
     
     # Recent activity
     recent_plans = TravelPlan.objects.order_by('-created_at')[:10].values(
@@ -858,6 +1534,7 @@ def admin_dashboard(request):
         },
         'travel_plans': {
             'total': total_plans,
+            'archived': archived['count'],
             'total_itineraries': total_itineraries
         },
         'content': {
@@ -926,8 +1603,8 @@ def admin_user_details(request, user_id):
         preferences_data = None
     
     # Get user's travel plans
-    plans = TravelPlan.objects.filter(user=user)
-    plans_data = TravelPlanSerializer(plans, many=True).data
+    plans = TravelPlanSerializer.setup_queryset(TravelPlan.objects.filter(user=user), request)
+    plans_data = TravelPlanSerializer(plans, many=True, context={'request': request}).data
     
     return Response({
         'user': {
@@ -951,6 +1628,7 @@ def admin_user_details(request, user_id):
 def admin_all_travel_plans(request):
     """
     Get all travel plans across all users
+    Archived plans are only counted (see archive_travel_plans)
     """
     plans = TravelPlan.objects.select_related(
         'user', 'destination', 'hotel', 'transport'
@@ -963,7 +1641,7 @@ def admin_all_travel_plans(request):
             'user': plan.user.username,
             'destination': plan.destination.name if plan.destination else None,
             'hotel': plan.hotel.name if plan.hotel else None,
-            'transport': plan.transport.name if plan.transport else None,
+            'transport': str(plan.transport) if plan.transport else None,
             'travel_date': plan.travel_date,
             'return_date': plan.return_date,
             'budget': float(plan.budget) if plan.budget else 0,
@@ -973,6 +1651,7 @@ def admin_all_travel_plans(request):
     
     return Response({
         'count': len(plans_data),
+        'archived_count': ArchivedTravelPlan.objects.count(),
         'plans': plans_data
     })
 
@@ -982,36 +1661,41 @@ def admin_all_travel_plans(request):
 def admin_preferences_tracking(request):
     """
     Track and analyze user preferences across the system
+    Distributions of budget, interest, objective, accommodation type, location and
+    travelers, plus cross-tabs (e.g. interest × budget), from one grouped query (cached)
+    Query params: since, until (YYYY-MM-DD, preference created date)
     """
-    preferences = UserPreference.objects.all()
-    
-    # Budget distribution
-    budget_distribution = preferences.values('budget').annotate(
-        count=Count('id')
-    ).order_by('budget')
-    
-    # Interest distribution
-    interest_distribution = preferences.values('interest').annotate(
-        count=Count('id')
-    ).order_by('interest')
-    
-    # Country preferences
-    country_preferences = preferences.values('preferred_country').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    dates = {}
+    for name in ('since', 'until'):
+        value = request.query_params.get(name)
+        if value:
+            try:
+                dates[name] = datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                return Response(
+                    {'error': f'{name} must be a date (YYYY-MM-DD)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
     
-    # Traveler size distribution
-    travelers_distribution = preferences.values('num_travelers').annotate(
-        count=Count('id')
-    ).order_by('num_travelers')
+    return Response(analytics.preference_analytics(**dates))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_user_export(request, user_id):
+    """
+    Download everything stored about a user as a zip, streamed
+    (same archive as the user's own export)
+    """
+    try:
+        user = User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        return Response(
+            {'error': 'User not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
     
-    return Response({
-        'total_preferences': preferences.count(),
-        'budget_distribution': list(budget_distribution),
-        'interest_distribution': list(interest_distribution),
-        'country_preferences': list(country_preferences),
-        'travelers_distribution': list(travelers_distribution)
-    })
+    return export_response(user)
 
 
 @api_view(['POST'])
@@ -1046,7 +1730,8 @@ def admin_manage_destinations(request):
     """
     if request.method == 'GET':
         destinations = Destination.objects.all().order_by('-created_at')
-        serializer = DestinationSerializer(destinations, many=True)
+        destinations = DestinationSerializer.setup_queryset(destinations, request)
+        serializer = DestinationSerializer(destinations, many=True, context={'request': request})
         return Response({
             'count': destinations.count(),
             'destinations': serializer.data
@@ -1063,6 +1748,29 @@ def admin_manage_destinations(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def admin_bulk_destination_status(request):
+    """
+    Activate or deactivate many destinations in one UPDATE (admin only)
+    Body: {"ids": [1, 2, 3], "is_active": true}
+    """
+    ids = request.data.get('ids')
+    is_active = request.data.get('is_active')
+    if not isinstance(ids, list) or not isinstance(is_active, bool):
+        return Response(
+            {'error': 'ids (list) and is_active (boolean) are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Rows already in the requested state are not rewritten
+    updated = Destination.objects.filter(id__in=ids).exclude(is_active=is_active).update(is_active=is_active)
+    return Response({
+        'message': f'{updated} destinations {"activated" if is_active else "deactivated"}',
+        'updated': updated
+    })
+
+
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAdminUser])
 def admin_destination_detail(request, destination_id):
@@ -1093,8 +1801,9 @@ def admin_destination_detail(request, destination_id):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
+        # Soft delete: hotels are archived in the background, rows purged later
         name = destination.name
-        destination.delete()
+        destination.archive()
         return Response({'message': f'Destination "{name}" deleted successfully'})
 
 
@@ -1106,7 +1815,8 @@ def admin_manage_hotels(request):
     """
     if request.method == 'GET':
         hotels = Hotel.objects.all().order_by('-created_at')
-        serializer = HotelSerializer(hotels, many=True)
+        hotels = HotelSerializer.setup_queryset(hotels, request)
+        serializer = HotelSerializer(hotels, many=True, context={'request': request})
         return Response({
             'count': hotels.count(),
             'hotels': serializer.data
@@ -1153,8 +1863,9 @@ def admin_hotel_detail(request, hotel_id):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
+        # Soft delete: purged later by manage.py purge_archived
         name = hotel.name
-        hotel.delete()
+        hotel.archive()
         return Response({'message': f'Hotel "{name}" deleted successfully'})
 
 
@@ -1166,7 +1877,8 @@ def admin_manage_transport(request):
     """
     if request.method == 'GET':
         transports = Transport.objects.all().order_by('-created_at')
-        serializer = TransportSerializer(transports, many=True)
+        transports = TransportSerializer.setup_queryset(transports, request)
+        serializer = TransportSerializer(transports, many=True, context={'request': request})
         return Response({
             'count': transports.count(),
             'transports': serializer.data
@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -153,14 +154,68 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cache - must be shared by every worker and management command: throttling buckets,
+# cached counts and the version keys that invalidate analytics, dashboard bundles and
+# change feed derived data all live here. Redis when REDIS_URL is set, otherwise a
+# database table (python manage.py createcachetable)
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+            'KEY_PREFIX': 'travel-planner',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'travel_planner_cache',
+        }
+    }
+
 # REST Framework
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.EstimatedCountPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        # Token bucket for the public `recommended` actions (per token or IP)
+        'recommendations': os.getenv('RECOMMENDATIONS_THROTTLE_RATE', '60/min'),
+    },
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Response compression (api.middleware.CompressionMiddleware)
+# Responses smaller than this many bytes are not compressed
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+
+# Change feed (api.changefeed): outbox rows younger than this are left for the next run
+CHANGEFEED_SETTLE_SECONDS = int(os.getenv('CHANGEFEED_SETTLE_SECONDS', '2'))
+
+# Recommended actions (api.pagination.WindowPagination): page size and result caps
+RECOMMENDATIONS_PAGE_SIZE = int(os.getenv('RECOMMENDATIONS_PAGE_SIZE', '20'))
+RECOMMENDATIONS_MAX_PAGE_SIZE = int(os.getenv('RECOMMENDATIONS_MAX_PAGE_SIZE', '100'))
+RECOMMENDATIONS_MAX_RESULTS = int(os.getenv('RECOMMENDATIONS_MAX_RESULTS', '500'))
+
+# Row counts (api.counting): unfiltered tables above this many rows use table statistics
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ESTIMATED_COUNT_THRESHOLD', '100000'))
+
+# Travel plan archival (api.trip_archive): plans that returned more than this many days ago
+TRAVEL_PLAN_ARCHIVE_DAYS = int(os.getenv('TRAVEL_PLAN_ARCHIVE_DAYS', '365'))
+PAST_TRIPS_PAGE_SIZE = int(os.getenv('PAST_TRIPS_PAGE_SIZE', '50'))
+
+# Static catalog snapshots (api.snapshots): written to this directory, served from this URL
+# by the web server or CDN; with DEBUG, config/urls.py serves a path URL itself
+CATALOG_SNAPSHOT_DIR = os.getenv('CATALOG_SNAPSHOT_DIR', str(BASE_DIR / 'catalog_snapshots'))
+CATALOG_SNAPSHOT_URL = os.getenv('CATALOG_SNAPSHOT_URL', '/catalog/')
+CATALOG_SNAPSHOT_AUTO = os.getenv('CATALOG_SNAPSHOT_AUTO', 'True') == 'True'
+
 # Default auto field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
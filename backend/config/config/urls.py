@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
@@ -39,27 +41,35 @@ urlpatterns = [
     path('api/auth/login/', views.login_view, name='login'),
     path('api/auth/logout/', views.logout_view, name='logout'),
     path('api/auth/change-password/', views.change_password_view, name='change_password'),
+    path('api/auth/export/', views.export_data_view, name='export_data'),
     path('api/auth-token/', obtain_auth_token, name='api_token_auth'),
     
     # Budget tracking endpoints
     path('api/budget/summary/', views.budget_summary, name='budget_summary'),
     path('api/budget/breakdown/<int:plan_id>/', views.budget_breakdown, name='budget_breakdown'),
     
+    # Catalog delta sync
+    path('api/catalog/changes/', views.catalog_changes, name='catalog_changes'),
+    path('api/catalog/manifest/', views.catalog_manifest, name='catalog_manifest'),
+    
     # Dashboard endpoints
     path('api/dashboard/stats/', views.dashboard_stats, name='dashboard_stats'),
     path('api/dashboard/upcoming-trips/', views.upcoming_trips, name='upcoming_trips'),
     path('api/dashboard/past-trips/', views.past_trips, name='past_trips'),
+    path('api/dashboard/bundle/', views.dashboard_bundle, name='dashboard_bundle'),
     
     # Admin management endpoints
     path('api/admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('api/admin/users/', views.admin_users_list, name='admin_users_list'),
     path('api/admin/users/<int:user_id>/', views.admin_user_details, name='admin_user_details'),
+    path('api/admin/users/<int:user_id>/export/', views.admin_user_export, name='admin_user_export'),
     path('api/admin/users/<int:user_id>/toggle-status/', views.admin_toggle_user_status, name='admin_toggle_user_status'),
     path('api/admin/travel-plans/', views.admin_all_travel_plans, name='admin_all_travel_plans'),
     path('api/admin/preferences-tracking/', views.admin_preferences_tracking, name='admin_preferences_tracking'),
     
     # Admin content management endpoints
     path('api/admin/destinations/', views.admin_manage_destinations, name='admin_manage_destinations'),
+    path('api/admin/destinations/bulk-status/', views.admin_bulk_destination_status, name='admin_bulk_destination_status'),
     path('api/admin/destinations/<int:destination_id>/', views.admin_destination_detail, name='admin_destination_detail'),
     path('api/admin/hotels/', views.admin_manage_hotels, name='admin_manage_hotels'),
     path('api/admin/hotels/<int:hotel_id>/', views.admin_hotel_detail, name='admin_hotel_detail'),
@@ -70,3 +80,6 @@ urlpatterns = [
     path('api-auth/', include('rest_framework.urls')),
 ]
 
+# Catalog snapshots for local development; in production the web server or CDN
+# serves CATALOG_SNAPSHOT_DIR at CATALOG_SNAPSHOT_URL (static() is a no-op without DEBUG)
+urlpatterns += static(settings.CATALOG_SNAPSHOT_URL, document_root=settings.CATALOG_SNAPSHOT_DIR)
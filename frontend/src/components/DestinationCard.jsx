@@ -7,7 +7,7 @@ const DestinationCard = ({ destination }) => {
     <div className="destination-card">
       <div className="card-image">
         <img
-          src={destination.image_url || 'https://images.unsplash.com/photo-1488646953014-85cb44e25828?w=400'}
+          src={destination.primary_image_url || destination.image_url || 'https://images.unsplash.com/photo-1488646953014-85cb44e25828?w=400'}
           alt={destination.name}
           onError={(e) => {
             e.target.src = 'https://images.unsplash.com/photo-1488646953014-85cb44e25828?w=400';
@@ -37,6 +37,9 @@ export const changePassword = (oldPassword, newPassword) =>
     new_password: newPassword,
   });
 
+// Zip of the user's profile, preferences and travel plans
+export const exportUserData = () => api.get('/auth/export/', { responseType: 'blob' });
+
 export const getUserProfile = () => api.get('/users/profile/');
 
 export const updateUserProfile = (data) => api.patch('/users/update_profile/', data);
@@ -123,6 +126,12 @@ export const getBudgetSummary = () => api.get('/budget/summary/');
 
 export const getBudgetBreakdown = (planId) => api.get(`/budget/breakdown/${planId}/`);
 
+// ==================== CATALOG SYNC ====================
+
+// Without a token: current token. With one: catalog rows changed since then
+export const getCatalogChanges = (since) =>
+  api.get('/catalog/changes/', { params: since === undefined ? {} : { since } });
+
 // ==================== DASHBOARD ENDPOINTS ====================
 
 export const getDashboardStats = () => api.get('/dashboard/stats/');
@@ -131,6 +140,9 @@ export const getUpcomingTrips = () => api.get('/dashboard/upcoming-trips/');
 
 export const getPastTrips = () => api.get('/dashboard/past-trips/');
 
+// Stats, trips, budget summary and preferences in one cached response
+export const getDashboardBundle = () => api.get('/dashboard/bundle/');
+
 // ==================== ADMIN ENDPOINTS ====================
 
 export const getAdminDashboard = () => api.get('/admin/dashboard/');
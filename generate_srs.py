@@ -2,15 +2,38 @@
 """
 SRS Document Generator for Travel Planning & Recommendation System
 Generates a comprehensive Software Requirements Specification document following IEEE 830-1998 standard
+
+Each section is rendered independently (in a process pool) into its own
+document fragment under .srs_fragments/, then the fragments are merged.
+A fragment is only rebuilt when its section changed, so regenerating one
+section does not rebuild the whole document. The data model section is
+built from the Django model metadata in backend/config/api/models.py.
+
+Usage:
+  python3 generate_srs.py                          # rebuild stale sections, merge
+  python3 generate_srs.py --sections data_model    # force-rebuild given sections
+  python3 generate_srs.py --force                  # rebuild every section
 """
 
 from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from pathlib import Path
+import argparse
+import copy
+import hashlib
+import inspect
+import json
+import os
 import sys
 
+ROOT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = ROOT_DIR / 'backend' / 'config'
+FRAGMENTS_DIR = ROOT_DIR / '.srs_fragments'
+
 def add_title_page(doc):
     """Add title page with project information"""
     # Title
@@ -661,117 +684,26 @@ def add_requirements_specification(doc):
     ]
     for req in maintainability:
         doc.add_paragraph(req, style='List Bullet')
-    
-    # 3.4 Data Model
-    doc.add_heading("3.4 Data Model", 2)
-    doc.add_paragraph("Entity Relationship Diagram (PlantUML Class Diagram):")
-    
-    data_model = """@startuml
-class User {
-  + id: Integer
-  + username: String
-  + email: String
-  + password: String (hashed)
-  + created_at: DateTime
-  --
-  + register()
-  + login()
-}
-
-class UserPreference {
-  + id: Integer
-  + user_id: Integer [FK]
-  + budget: Enum(low, medium, high)
-  + interest: Enum(beach, wildlife, historical, city_tour, adventure, culture)
-  + num_travelers: Integer
-  + created_at: DateTime
-  --
-  + save_preferences()
-  + get_preferences()
-}
-
-class Destination {
-  + id: Integer
-  + name: String
-  + country: String
-  + city: String
-  + category: String
-  + budget_level: Enum(low, medium, high)
-  + description: Text
-  + image_url: String
-  + booking_url: String
-  --
-  + get_by_category()
-  + get_by_budget()
-}
-
-class Hotel {
-  + id: Integer
-  + destination_id: Integer [FK]
-  + name: String
-  + star_rating: Integer (1-5)
-  + price_per_night: Decimal
-  + budget_category: Enum(low, medium, high)
-  + amenities: Text
-  + location: String
-  --
-  + get_by_destination()
-  + get_by_budget()
-}
-
-class Transport {
-  + id: Integer
-  + origin: String
-  + destination: String
-  + type: Enum(bus, train, flight, car)
-  + distance_km: Integer
-  + duration_hours: Decimal
-  + price: Decimal
-  --
-  + get_by_distance()
-  + calculate_price()
-}
-
-class TravelPlan {
-  + id: Integer
-  + user_id: Integer [FK]
-  + destination_id: Integer [FK]
-  + hotel_id: Integer [FK]
-  + transport_id: Integer [FK]
-  + start_date: Date
-  + end_date: Date
-  + num_travelers: Integer
-  + total_budget: Decimal
-  + created_at: DateTime
-  --
-  + create_plan()
-  + calculate_total()
-}
-
-class Itinerary {
-  + id: Integer
-  + travel_plan_id: Integer [FK]
-  + day_number: Integer
-  + date: Date
-  + activities: Text
-  + accommodation: String
-  + notes: Text
-  --
-  + generate()
-  + get_by_plan()
-}
-
-User "1" -- "1" UserPreference : has
-User "1" -- "*" TravelPlan : creates
-TravelPlan "*" -- "1" Destination : includes
-TravelPlan "*" -- "1" Hotel : books
-TravelPlan "*" -- "0..1" Transport : uses
-TravelPlan "1" -- "*" Itinerary : has
-Destination "1" -- "*" Hotel : contains
 
-@enduml"""
-    
-    p = doc.add_paragraph(data_model)
+def add_data_model(doc):
+    """Add Section 3.4 Data Model, generated from the Django models"""
+    doc.add_heading("3.4 Data Model", 2)
+    schema = export_model_schema()
+    
+    doc.add_paragraph("Data Dictionary:")
+    columns = ['model', 'field', 'type', 'nullable', 'key', 'default', 'description']
+    table = doc.add_table(rows=1, cols=len(columns))
+    table.style = 'Table Grid'
+    for cell, column in zip(table.rows[0].cells, columns):
+        cell.text = column.title()
+    for row in schema['data_dictionary']:
+        cells = table.add_row().cells
+        for cell, column in zip(cells, columns):
+            cell.text = row[column]
+    
+    doc.add_paragraph("\nEntity Relationship Diagram (PlantUML Class Diagram):")
+    
+    p = doc.add_paragraph(schema['plantuml'])
     p.style = 'Intense Quote'
     
     doc.add_paragraph("\nState Diagram for Travel Plan:")
@@ -847,40 +779,129 @@ def add_appendices(doc):
     for ide in ide_list:
         doc.add_paragraph(ide, style='List Bullet')
 
-def generate_srs_document():
-    """Main function to generate the complete SRS document"""
-    print("Generating Software Requirements Specification document...")
-    
-    # Create document
+# ==================== DATA MODEL (from Django models) ====================
+
+def setup_django():
+    """Make the backend importable and configure Django (no database access needed)"""
+    import django
+    from django.conf import settings
+    if not settings.configured:
+        sys.path.insert(0, str(BACKEND_DIR))
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+        django.setup()
+
+
+def export_model_schema():
+    """Data dictionary, PlantUML and JSON schema from one pass over the models (api.schema)"""
+    setup_django()
+    from api.schema import export_all
+    return export_all()
+
+
+def model_schema_fingerprint():
+    """Changes whenever a model field, type or relation changes"""
+    return json.dumps(export_model_schema()['json_schema'], sort_keys=True, default=str)
+
+
+# ==================== SECTION ENGINE ====================
+
+def setup_document():
+    """New document with the SRS default font"""
     doc = Document()
-    
-    # Set default font
     style = doc.styles['Normal']
     font = style.font
     font.name = 'Times New Roman'
     font.size = Pt(12)
+    return doc
+
+
+# Section name -> (builder, extra input that invalidates the cached fragment)
+SECTIONS = {
+    'title': (add_title_page, lambda: datetime.now().strftime('%Y-%m-%d')),
+    'toc': (add_toc, None),
+    'figures': (add_list_of_figures, None),
+    'introduction': (add_introduction, None),
+    'overall_description': (add_overall_description, None),
+    'requirements': (add_requirements_specification, None),
+    'data_model': (add_data_model, model_schema_fingerprint),
+    'appendices': (add_appendices, None),
+}
+
+
+def section_fingerprint(name):
+    """Hash of the section's code and inputs; a fragment is stale when it changes"""
+    builder, inputs = SECTIONS[name]
+    digest = hashlib.sha256(inspect.getsource(builder).encode())
+    if inputs is not None:
+        digest.update(inputs().encode())
+    return digest.hexdigest()
+
+
+def fragment_path(name):
+    return FRAGMENTS_DIR / f"{name}.docx"
+
+
+def load_manifest():
+    try:
+        return json.loads((FRAGMENTS_DIR / 'manifest.json').read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def render_section(name):
+    """Render one section into its own fragment document (runs in a worker process)"""
+    builder, _ = SECTIONS[name]
+    doc = setup_document()
+    builder(doc)
+    doc.save(fragment_path(name))
+    return name, section_fingerprint(name), len(doc.paragraphs)
+
+
+def merge_fragments(names):
+    """Append the body of every fragment, in order, into one document"""
+    doc = setup_document()
+    sect_pr = doc.element.body.sectPr
+    for name in names:
+        fragment = Document(fragment_path(name))
+        for element in fragment.element.body.iterchildren():
+            if element.tag.endswith('}sectPr'):
+                continue
+            sect_pr.addprevious(copy.deepcopy(element))
+    return doc
+
+
+def generate_srs_document(sections=None, force=False, jobs=None):
+    """
+    Main function to generate the complete SRS document
+    sections: names to rebuild regardless of cache; stale sections are always rebuilt
+    force: rebuild every section
+    """
+    print("Generating Software Requirements Specification document...")
+    FRAGMENTS_DIR.mkdir(exist_ok=True)
+    
+    manifest = load_manifest()
+    requested = set(sections or [])
+    stale = [
+        name for name in SECTIONS
+        if force
+        or name in requested
+        or not fragment_path(name).exists()
+        or manifest.get(name) != section_fingerprint(name)
+    ]
     
-    # Add sections
-    print("Adding title page...")
-    add_title_page(doc)
-    
-    print("Adding table of contents...")
-    add_toc(doc)
-    
-    print("Adding list of figures...")
-    add_list_of_figures(doc)
-    
-    print("Adding introduction...")
-    add_introduction(doc)
-    
-    print("Adding overall description...")
-    add_overall_description(doc)
-    
-    print("Adding requirements specification...")
-    add_requirements_specification(doc)
+    if stale:
+        print(f"Rendering sections: {', '.join(stale)}")
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for name, fingerprint, paragraphs in pool.map(render_section, stale):
+                manifest[name] = fingerprint
+                print(f"  ✓ {name} ({paragraphs} paragraphs)")
+        (FRAGMENTS_DIR / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+    else:
+        print("All sections are up to date")
     
-    print("Adding appendices...")
-    add_appendices(doc)
+    # Merge fragments in document order
+    print("Merging sections...")
+    doc = merge_fragments(list(SECTIONS))
     
     # Save document
     filename = f"Travel_Planning_System_SRS_v1.0_{datetime.now().strftime('%Y%m%d')}.docx"
@@ -888,11 +909,13 @@ def generate_srs_document():
     
     print(f"\n✓ SRS document generated successfully: {filename}")
     print(f"✓ Document size: {len(doc.paragraphs)} paragraphs")
+    print(f"✓ Sections rebuilt: {len(stale)} of {len(SECTIONS)}")
     print(f"✓ Document includes:")
     print("  - Title page with project information")
     print("  - Complete table of contents")
     print("  - All IEEE 830-1998 required sections")
     print("  - PlantUML diagrams (use case, class, state)")
+    print("  - Data model generated from the Django models")
     print("  - Detailed functional and non-functional requirements")
     print("  - Comprehensive feasibility study")
     print("  - Budget breakdown with student benefits")
@@ -900,12 +923,33 @@ def generate_srs_document():
     
     return filename
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the SRS document")
+    parser.add_argument(
+        '--sections',
+        help=f"Comma-separated sections to rebuild ({', '.join(SECTIONS)})"
+    )
+    parser.add_argument('--force', action='store_true', help="Rebuild every section")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    
+    if args.sections:
+        args.sections = [name.strip() for name in args.sections.split(',') if name.strip()]
+        unknown = [name for name in args.sections if name not in SECTIONS]
+        if unknown:
+            parser.error(f"Unknown sections: {', '.join(unknown)}")
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        filename = generate_srs_document()
+        filename = generate_srs_document(args.sections, args.force, args.jobs)
         sys.exit(0)
     except Exception as e:
         print(f"\n✗ Error generating SRS document: {str(e)}")
-        print("\nPlease ensure python-docx is installed:")
+        print("\nPlease ensure python-docx and the backend requirements are installed:")
         print("  pip install python-docx")
+        print("  pip install -r backend/config/requirements.txt")
         sys.exit(1)